@@ -1,9 +1,27 @@
+import functools
+import gc
+import inspect
+import json
+import logging
 import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from types import MappingProxyType
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import scipy.sparse as sp
 import streamlit as st
 import statsmodels.api as sm
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from snapshots import get_data_version, get_export_time, resolve_snapshot_dir
 import os
 import pandas as pd
 import plotly.express as px
@@ -11,9 +29,16 @@ import plotly.graph_objects as go
 import streamlit as st
 import statsmodels.api 
 
-DATA_DIR = "HR_ALL"
+# Copy-on-Write lets every session share the cached frames and copy only what it modifies
+# (always on from pandas 3.0)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+DATA_DIR = os.environ.get("HR_DATA_DIR", "HR_ALL") # Override to serve another export, e.g. a synthetic dataset
 DATE_FORMAT = "%d-%b-%y"
+ISO_DATE_FORMAT = "%Y-%m-%d" # Report procedures export dates with TO_CHAR(..., 'YYYY-MM-DD')
 GIF_PATH = "./assets/emp.gif"
+DATE_COLS_TO_CLEAN = ['hire_date', 'start_date', 'end_date', 'date_of_birth', 'exit_date', 'last_promotion_date']
 
 COLORS = {
  'background': '#F5F6F5',
@@ -38,43 +63,295 @@ COLORS = {
  'bar_colors': ['#6F42C1', '#7E57C2', '#343A40'],
  'pie_colors': ['#6F42C1', '#343A40', '#FF00FF', '#5C6BC0', '#B39DDB', '#4B0082'],
 }
+# --- Messages ---
+_logger = logging.getLogger("hr_app")
+
+def notify(level: str, message: str):
+    """Shows a warning/error/info message in the running Streamlit page, or logs it when headless."""
+    if get_script_run_ctx(suppress_warning=True) is not None:
+        getattr(st, level)(message)
+    else:
+        _logger.log(logging.INFO if level == "info" else getattr(logging, level.upper()), message)
+
+# --- Performance Instrumentation ---
+# Opt-in per-stage timings for a rerun: wall time, rows, cache hit/miss and payload bytes.
+# HR_PERF_LOG=1 emits one JSON line per stage on the "hr_app.perf" logger (stdout by default);
+# opening the app with ?debug=perf shows the stages of the current rerun in the sidebar.
+PERF_LOG = os.environ.get("HR_PERF_LOG", "") == "1"
+DEBUG_PARAM = "debug" # ?debug=perf, ?debug=memory, ?debug=cache or a comma-separated mix
+PERF_MAX_STAGES = 200 # Fragment reruns append to the last trace; cap it for long-lived sessions
+_perf_logger = logging.getLogger("hr_app.perf")
+_perf_state = threading.local() # Streamlit runs each session's script in its own thread
+
+if PERF_LOG and not _perf_logger.handlers:
+    _perf_handler = logging.StreamHandler()
+    _perf_handler.setFormatter(logging.Formatter("%(message)s"))
+    _perf_logger.addHandler(_perf_handler)
+    _perf_logger.setLevel(logging.INFO)
+    _perf_logger.propagate = False
+
+def start_perf_trace(page: str, panel: bool = False):
+    """Starts recording the stages of this rerun; returns the trace, or None when instrumentation is off."""
+    trace = None
+    if panel or PERF_LOG:
+        trace = {'run_id': uuid.uuid4().hex[:8], 'page': page, 'started': time.perf_counter(), 'stages': []}
+    _perf_state.trace = trace
+    _perf_state.cache_misses = set()
+    return trace
+
+def perf_active() -> bool:
+    return PERF_LOG or getattr(_perf_state, 'trace', None) is not None
+
+def note_cache_miss(name: str):
+    """Called from inside a cached function body, which only runs on a cache miss."""
+    if perf_active():
+        getattr(_perf_state, 'cache_misses', set()).add(name)
+
+@contextmanager
+def perf_stage(stage: str, rows: int = None, cached: bool = False, payload_bytes: int = None):
+    """Times the enclosed block as one stage; the yielded dict accepts rows/bytes set inside.
+
+    With cached=True the stage is reported as a cache miss if note_cache_miss(stage) ran inside it.
+    """
+    if not perf_active():
+        yield {}
+        return
+    record = {'stage': stage, 'ms': None, 'rows': rows, 'cache': None, 'bytes': payload_bytes}
+    misses = getattr(_perf_state, 'cache_misses', set())
+    misses.discard(stage)
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['ms'] = round((time.perf_counter() - start) * 1000, 3)
+        if cached:
+            record['cache'] = 'miss' if stage in misses else 'hit'
+        trace = getattr(_perf_state, 'trace', None)
+        if trace is not None and len(trace['stages']) < PERF_MAX_STAGES:
+            trace['stages'].append(record)
+        if PERF_LOG:
+            _perf_logger.info(json.dumps({'event': 'stage', 'run_id': trace and trace['run_id'],
+                                          'page': trace and trace['page'], **record}))
+
+def finish_perf_trace(trace: dict) -> float:
+    """Logs the rerun total and returns it in milliseconds."""
+    total_ms = round((time.perf_counter() - trace['started']) * 1000, 3)
+    if PERF_LOG:
+        _perf_logger.info(json.dumps({'event': 'rerun', 'run_id': trace['run_id'], 'page': trace['page'],
+                                      'ms': total_ms, 'stages': len(trace['stages'])}))
+    return total_ms
+
+def figure_points(fig) -> int:
+    """Data points sent with a Plotly figure (longest of x/y/values per trace)."""
+    return int(sum(max((len(getattr(trace, attr)) for attr in ('x', 'y', 'values')
+                        if getattr(trace, attr, None) is not None), default=0) for trace in fig.data))
+
+# --- Cache Policies ---
+# Every shared cache belongs to a layer with a TTL (seconds, 0 = none), a maximum entry count and a
+# byte cap (MB, 0 = none); the least recently used entries are evicted first. Override any of them
+# with HR_CACHE_POLICY, e.g. "figures.max_mb=32,aggregates.ttl_s=600". ?debug=cache shows the
+# per-layer hit, miss and eviction counters.
+CACHE_POLICIES = {
+    'data_store': {'ttl_s': 0, 'max_entries': 2, 'max_mb': 0}, # Loaded and cleaned frames, one entry per data version
+    # None: derived when the caches are created, one entry per policy_cache('indexes') builder, per
+    # salary measure (each has its own version key) and per data version kept in data_store
+    'indexes': {'ttl_s': 0, 'max_entries': None, 'max_mb': 0},
+    'aggregates': {'ttl_s': 3600, 'max_entries': 64, 'max_mb': 16},
+    'figures': {'ttl_s': 3600, 'max_entries': 256, 'max_mb': 64},
+}
+CACHE_EVENT_LIMIT = 20
+CACHE_BUILDERS = {} # Layer -> names of the policy_cache functions registered on it
+
+def _parse_cache_policies(spec: str) -> dict:
+    policies = {layer: dict(policy) for layer, policy in CACHE_POLICIES.items()}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        setting, _, value = item.partition("=")
+        layer, _, option = setting.strip().partition(".")
+        try:
+            if layer not in policies or option not in policies[layer]:
+                raise ValueError(setting)
+            policies[layer][option] = int(value) if option == 'max_entries' else float(value)
+        except ValueError:
+            _logger.warning("Ignoring invalid HR_CACHE_POLICY entry '%s'", item)
+    for layer, policy in policies.items():
+        if policy['max_entries'] is None: # Every builder, for every measure and every data version kept
+            policy['max_entries'] = len(CACHE_BUILDERS.get(layer, ())) * len(SALARY_MEASURES) * policies['data_store']['max_entries']
+    return policies
+
+@st.cache_resource
+def cache_layers() -> dict:
+    """Process-wide cache state per layer: policy, LRU-ordered entries and counters."""
+    return {layer: {'layer': layer, 'policy': policy, 'entries': OrderedDict(), 'bytes': 0, 'building': {}, 'lock': threading.Lock(),
+                    'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'rejections': 0, 'events': []}
+            for layer, policy in _parse_cache_policies(os.environ.get("HR_CACHE_POLICY", "")).items()}
+
+def _live_entry(cache: dict, key: tuple):
+    """The entry for key, or None if it is missing or past its TTL (expired entries are dropped). Hold the lock."""
+    entry = cache['entries'].get(key)
+    if entry is None:
+        return None
+    ttl_s = cache['policy']['ttl_s']
+    if ttl_s and time.monotonic() - entry['created'] > ttl_s:
+        _drop_entry(cache, key, 'expired')
+        return None
+    cache['entries'].move_to_end(key)
+    return entry
+
+def _expire_entries(cache: dict):
+    """Drops every entry past the layer's TTL without touching the LRU order. Hold the lock."""
+    ttl_s = cache['policy']['ttl_s']
+    if ttl_s:
+        now = time.monotonic()
+        for key in [key for key, entry in cache['entries'].items() if now - entry['created'] > ttl_s]:
+            _drop_entry(cache, key, 'expired')
+
+def _record_event(cache: dict, key: tuple, reason: str, size: int):
+    cache['events'] = (cache['events'] + [{'time': pd.Timestamp.now().strftime('%H:%M:%S'), 'key': key[0],
+                                           'reason': reason, 'mb': round(size / MB, 2)}])[-CACHE_EVENT_LIMIT:]
+
+def _drop_entry(cache: dict, key: tuple, reason: str):
+    entry = cache['entries'].pop(key)
+    cache['bytes'] -= entry['bytes']
+    cache['expirations' if reason == 'expired' else 'evictions'] += 1
+    _record_event(cache, key, reason, entry['bytes'])
+
+def _store_entry(cache: dict, key: tuple, value, size: int):
+    """Inserts an entry, then evicts least recently used ones until the layer is within its limits. Hold the lock.
+
+    A value larger than the whole byte cap is not stored, so it never flushes entries that do fit.
+    """
+    policy = cache['policy']
+    max_bytes = policy['max_mb'] * MB
+    if max_bytes and size > max_bytes:
+        cache['rejections'] += 1
+        _record_event(cache, key, 'larger than byte cap, not stored', size)
+        _logger.warning("Not caching %s: %.1f MB is over the %s layer's %.0f MB cap", key[0], size / MB, cache['layer'], policy['max_mb'])
+        return
+    _expire_entries(cache)
+    cache['entries'][key] = {'value': value, 'bytes': size, 'created': time.monotonic()}
+    cache['bytes'] += size
+    while cache['entries'] and (len(cache['entries']) > policy['max_entries'] or (max_bytes and cache['bytes'] > max_bytes)):
+        oldest = next(iter(cache['entries']))
+        _drop_entry(cache, oldest, 'over byte cap' if len(cache['entries']) <= policy['max_entries'] else 'over max entries')
+
+def cached_call(layer: str, key: tuple, build, spinner: str = None):
+    """Returns the value cached under key in layer, building it on a miss.
+
+    key[0] names the builder (it is what note_cache_miss and the cache panel report). Concurrent
+    misses on one key build it once. An entry larger than the layer's byte cap is returned but not kept.
+    """
+    cache = cache_layers()[layer]
+    with cache['lock']:
+        entry = _live_entry(cache, key)
+        if entry is not None:
+            cache['hits'] += 1
+            return entry['value']
+        build_lock = cache['building'].setdefault(key, threading.Lock())
+    with build_lock:
+        with cache['lock']:
+            entry = _live_entry(cache, key)
+            if entry is not None: # Built by another session while this one waited
+                cache['hits'] += 1
+                return entry['value']
+        note_cache_miss(key[0])
+        try:
+            if spinner and get_script_run_ctx(suppress_warning=True) is not None:
+                with st.spinner(spinner):
+                    value = build()
+            else:
+                value = build()
+            size = estimate_bytes(value)
+            with cache['lock']:
+                cache['misses'] += 1
+                _store_entry(cache, key, value, size)
+        finally:
+            with cache['lock']:
+                cache['building'].pop(key, None)
+    return value
+
+def policy_cache(layer: str, spinner: str = None):
+    """Decorator form of cached_call, keyed like st.cache_*: by the arguments not prefixed with '_'."""
+    def decorator(func):
+        signature = inspect.signature(func)
+        CACHE_BUILDERS.setdefault(layer, set()).add(func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (func.__name__, *(value for name, value in bound.arguments.items() if not name.startswith('_')))
+            return cached_call(layer, key, lambda: func(*args, **kwargs), spinner)
+
+        wrapper.clear = lambda: clear_cache_layer(layer, func.__name__)
+        return wrapper
+    return decorator
+
+def clear_cache_layer(layer: str, name: str = None):
+    """Evicts every entry of a layer, or only those built by the named function."""
+    cache = cache_layers()[layer]
+    with cache['lock']:
+        for key in [key for key in cache['entries'] if name is None or key[0] == name]:
+            _drop_entry(cache, key, 'cleared')
+
+def build_cache_report() -> pd.DataFrame:
+    """One row per cache layer: policy, current size and hit/miss/eviction counters."""
+    rows = []
+    for layer, cache in cache_layers().items():
+        with cache['lock']:
+            _expire_entries(cache)
+            lookups = cache['hits'] + cache['misses']
+            rows.append({
+                'layer': layer, 'entries': len(cache['entries']), 'mb': cache['bytes'] / MB,
+                'max_entries': cache['policy']['max_entries'], 'max_mb': cache['policy']['max_mb'] or None,
+                'ttl_s': cache['policy']['ttl_s'] or None, 'hits': cache['hits'], 'misses': cache['misses'],
+                'hit_rate': cache['hits'] / lookups if lookups else None,
+                'evictions': cache['evictions'], 'expirations': cache['expirations'], 'rejections': cache['rejections'],
+            })
+    return pd.DataFrame(rows)
+
 # --- Data Loading and Caching ---
-@st.cache_data
-def load_csv_files(directory: str) -> dict:
-    """Loads all CSV files from a directory into pandas DataFrames."""
+def dataset_name(filename: str) -> str:
+    """Dict key for a CSV export, e.g. 'Job-History.csv' -> 'job_history'."""
+    return filename[:-4].lower().replace(" ", "_").replace("-", "_")
+
+def load_csv_files(directory: str, names: set = None) -> dict:
+    """Loads all CSV files (or only the datasets in names) from a directory into pandas DataFrames."""
     dataframes = {}
     if not os.path.exists(directory) or not os.path.isdir(directory):
         # This error will be caught in main() if directory doesn't exist.
         # Still good to have a check here if called elsewhere.
         return dataframes
     for filename in os.listdir(directory):
-        if filename.endswith(".csv"):
+        if filename.endswith(".csv") and (names is None or dataset_name(filename) in names):
             filepath = os.path.join(directory, filename)
             try:
                 df = pd.read_csv(filepath)
                 # Standardize column names
                 df.columns = [str(col).strip().lower().replace(" ", "_") for col in df.columns]
-                dataframes[filename[:-4].lower().replace(" ", "_").replace("-", "_")] = df # Standardize dict keys
+                dataframes[dataset_name(filename)] = df # Standardize dict keys
             except Exception as e:
-                st.warning(f"Error loading {filename}: {e}")
+                notify("warning", f"Error loading {filename}: {e}")
     return dataframes
 
-@st.cache_data
 def clean_dataframe(df: pd.DataFrame, date_cols: list = None, numeric_cols: list = None) -> pd.DataFrame:
-    """Cleans a DataFrame: handles NA, strips strings, converts dates and numerics."""
-    df_copy = df.copy() # Work on a copy to avoid mutating cached objects inplace
+    """Cleans a DataFrame: handles NA, strips strings, converts dates and numerics.
 
-    df_copy.replace(['NULL', 'null', '', 'NA', 'N/A', 'NaN', 'nan'], pd.NA, inplace=True)
+    Returns a new frame and never modifies df.
+    """
+    df_copy = df.replace(['NULL', 'null', '', 'NA', 'N/A', 'NaN', 'nan'], pd.NA)
 
     for col in df_copy.select_dtypes(include=['object']).columns:
         if col in df_copy.columns:
-            df_copy[col] = df_copy[col].astype(str).str.strip().str.replace('"', '', regex=False)
-            df_copy[col].replace(['None', '<NA>'], pd.NA, inplace=True) # Replace string 'None' or '<NA>' after strip
+            df_copy[col] = df_copy[col].astype(str).str.strip().str.replace('"', '', regex=False) \
+                                       .replace(['None', '<NA>'], pd.NA) # Replace string 'None' or '<NA>' after strip
 
     if date_cols:
         for col in date_cols:
             if col in df_copy.columns:
-                df_copy[col] = pd.to_datetime(df_copy[col], format=DATE_FORMAT, errors='coerce')
+                parsed = pd.to_datetime(df_copy[col], format=DATE_FORMAT, errors='coerce')
+                # Fall back to ISO dates for the per-report exports (dept_*, tenure_comparison, ...)
+                iso_parsed = pd.to_datetime(df_copy[col], format=ISO_DATE_FORMAT, errors='coerce')
+                df_copy[col] = parsed.fillna(iso_parsed)
 
     # Define a more comprehensive list of potential numeric columns likely in HR data
     default_numeric_cols = [
@@ -93,24 +370,488 @@ def clean_dataframe(df: pd.DataFrame, date_cols: list = None, numeric_cols: list
             df_copy[col] = pd.to_numeric(df_copy[col], errors='coerce')
     return df_copy
 
+def freeze_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """Rebuilds df on write-protected NumPy arrays so shared data cannot be modified in place."""
+    columns = {}
+    for col in df.columns:
+        if isinstance(df[col].dtype, np.dtype):
+            values = df[col].to_numpy(copy=True)
+            values.flags.writeable = False
+            columns[col] = values
+        else: # Extension arrays (strings, nullable ints, categoricals) are left as they are
+            columns[col] = df[col].array
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+# Dimension columns repeated across reports, by dimension. Each dimension gets one sorted dictionary
+# (a CategoricalDtype) shared by every report, so a value is stored once and the columns hold small
+# integer codes: joins and groupbys across reports compare codes, never strings.
+SHARED_DIMENSIONS = {
+    'department': ['department', 'department_name'],
+    'job_title': ['job_title'],
+    'city': ['city'],
+    'country': ['country'],
+    'region': ['region'],
+}
+
+def build_dimension_dtypes(frames: dict) -> dict:
+    """One CategoricalDtype per dimension over the values found in any report."""
+    dtypes = {}
+    for dimension, columns in SHARED_DIMENSIONS.items():
+        values = [np.asarray(df[col].dropna().unique(), dtype=object) for df in frames.values() for col in columns if col in df.columns]
+        if not values:
+            continue
+        categories = pd.Index(np.concatenate(values)).unique()
+        try:
+            categories = categories.sort_values()
+        except TypeError: # Mixed value types; keep first-seen order
+            pass
+        dtypes[dimension] = pd.CategoricalDtype(categories)
+    return dtypes
+
+def encode_shared_dimensions(frames: dict) -> dict:
+    """Stores every dimension column as integer codes into its dimension's shared dictionary."""
+    dtypes = build_dimension_dtypes(frames)
+    encoded = {}
+    for name, df in frames.items():
+        columns = {col: df[col].astype(dtypes[dimension]) for dimension, cols in SHARED_DIMENSIONS.items()
+                   if dimension in dtypes for col in cols if col in df.columns}
+        encoded[name] = df.assign(**columns) if columns else df
+    return encoded
+
+@policy_cache('data_store', spinner="Loading HR data...")
+def build_data_store(directory: str, data_version: str, summary_only: bool = False) -> MappingProxyType:
+    """Loads, cleans and freezes every CSV once per data version, shared by all sessions.
+
+    data_version only keys the cache, so a new export is picked up on the next rerun. With
+    HR_DATA_PLANE_DIR set, frames are attached from (or first published to) the shared data plane.
+    summary_only keeps just SUMMARY_DATASETS, and datasets over their memory budget are dropped.
+    """
+    names = set(SUMMARY_DATASETS) if summary_only else None
+    if DATA_PLANE_DIR and data_version:
+        with perf_stage("attach_data_plane") as record:
+            try:
+                frames = attach_data_plane(DATA_PLANE_DIR, data_version)
+            except OSError as e: # Pruned by another worker's publish while attaching; load the CSVs instead
+                _logger.warning("Could not attach data version %s from '%s': %s", data_version, DATA_PLANE_DIR, e)
+                frames = None
+            record['rows'] = sum(len(df) for df in frames.values()) if frames else 0
+        if frames is not None:
+            frames = {name: df for name, df in frames.items() if names is None or name in names}
+            return MappingProxyType(apply_dataset_budgets(frames))
+
+    with perf_stage("load_csv_files") as record:
+        raw_dfs = load_csv_files(directory, names)
+        record['rows'] = sum(len(df) for df in raw_dfs.values())
+    with perf_stage("clean_dataframe", rows=sum(len(df) for df in raw_dfs.values())):
+        frames = {name: clean_dataframe(df_raw, date_cols=DATE_COLS_TO_CLEAN) for name, df_raw in raw_dfs.items()}
+    with perf_stage("encode_shared_dimensions"):
+        frames = encode_shared_dimensions(frames)
+    if DATA_PLANE_DIR and data_version and frames and not summary_only: # Only complete versions are published
+        try:
+            publish_data_plane(frames, DATA_PLANE_DIR, data_version, get_export_time(directory))
+            attached = attach_data_plane(DATA_PLANE_DIR, data_version)
+            if attached is not None:
+                return MappingProxyType(apply_dataset_budgets(attached))
+        except OSError as e:
+            notify("warning", f"Could not publish data to the shared data plane at '{DATA_PLANE_DIR}': {e}")
+    return MappingProxyType({name: freeze_dataframe(df) for name, df in apply_dataset_budgets(frames).items()})
+
+def get_session_views(store: MappingProxyType) -> dict:
+    """Shallow per-session views of the shared frames; Copy-on-Write copies only what a page changes."""
+    return {name: df.copy(deep=False) for name, df in store.items()}
+
+# --- Shared Data Plane (multi-process deployments) ---
+# Set HR_DATA_PLANE_DIR (e.g. /dev/shm/hr_app) to share cleaned frames between Streamlit replicas.
+# The first worker to see a data version publishes it as .npy files; every worker then attaches
+# with memory maps, so the OS page cache holds one copy regardless of the number of replicas.
+DATA_PLANE_DIR = os.environ.get("HR_DATA_PLANE_DIR", "")
+DATA_PLANE_RETENTION = 2 # Published versions kept on disk; older ones are removed after a publish
+DATA_PLANE_LAYOUT = "v2" # Part of every version directory name; bump it when the file layout changes
+_NUMPY_PLANE_KINDS = "biufcmM"
+
+def _save_plane_categories(directory: str, stem: str, categories: pd.Index) -> dict:
+    """Writes one category dictionary as .npy files and returns its manifest entry.
+
+    Numeric and datetime categories are one raw array. Anything else is stored as text: the UTF-8
+    bytes of every category back to back plus int64 offsets, so no pickled objects are needed.
+    """
+    if isinstance(categories.dtype, np.dtype) and categories.dtype.kind in _NUMPY_PLANE_KINDS:
+        np.save(os.path.join(directory, f"{stem}.npy"), categories.to_numpy())
+        return {'kind': 'numpy', 'file': f"{stem}.npy"}
+    encoded = [str(value).encode('utf-8') for value in categories]
+    offsets = np.zeros(len(encoded) + 1, dtype='int64')
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    np.save(os.path.join(directory, f"{stem}.npy"), np.frombuffer(b"".join(encoded), dtype='uint8'))
+    np.save(os.path.join(directory, f"{stem}_offsets.npy"), offsets)
+    return {'kind': 'utf8', 'file': f"{stem}.npy", 'offsets_file': f"{stem}_offsets.npy"}
+
+def _load_plane_categories(directory: str, entry: dict) -> pd.Index:
+    values = np.load(os.path.join(directory, entry['file']), mmap_mode='r', allow_pickle=False)
+    if entry['kind'] == 'numpy':
+        return pd.Index(values, copy=False)
+    offsets = np.load(os.path.join(directory, entry['offsets_file']), mmap_mode='r', allow_pickle=False).tolist()
+    text = values.tobytes()
+    return pd.Index([text[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])])
+
+def publish_data_plane(frames: dict, plane_dir: str, data_version: str, exported_at: int = 0) -> str:
+    """Writes cleaned frames to <plane_dir>/<data_version>.<DATA_PLANE_LAYOUT> and returns that path.
+
+    Numeric and datetime columns are stored as raw .npy arrays; every other column is stored as
+    integer category codes plus a category dictionary in its own .npy files, written once per
+    distinct dictionary (columns of one shared dimension point at the same files). manifest.json
+    holds only names, file names, lengths and exported_at (the export's newest CSV mtime, which
+    orders versions for pruning). The version directory is written under a temporary name and
+    renamed into place, so readers never see a partial version.
+    """
+    version_dir = os.path.join(plane_dir, f"{data_version}.{DATA_PLANE_LAYOUT}")
+    if os.path.isdir(version_dir):
+        return version_dir
+    os.makedirs(plane_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=f".{data_version}-", dir=plane_dir)
+
+    manifest = {'version': data_version, 'exported_at': exported_at, 'frames': {}, 'dictionaries': []}
+    dictionary_numbers = {} # CategoricalDtype -> position in manifest['dictionaries']
+    for frame_no, (name, df) in enumerate(frames.items()):
+        frame_entry = {'length': len(df), 'columns': []}
+        if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+            frame_entry['index_file'] = f"{frame_no}_index.npy"
+            np.save(os.path.join(staging_dir, frame_entry['index_file']), df.index.to_numpy())
+        for col_no, col in enumerate(df.columns):
+            filename = f"{frame_no}_{col_no}.npy"
+            series = df[col]
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in _NUMPY_PLANE_KINDS:
+                np.save(os.path.join(staging_dir, filename), series.to_numpy())
+                frame_entry['columns'].append({'name': col, 'file': filename, 'kind': 'numpy'})
+            else:
+                categorical = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+                dictionary_no = dictionary_numbers.get(categorical.dtype)
+                if dictionary_no is None:
+                    dictionary_no = dictionary_numbers[categorical.dtype] = len(manifest['dictionaries'])
+                    manifest['dictionaries'].append(_save_plane_categories(staging_dir, f"dict_{dictionary_no}", categorical.cat.categories))
+                np.save(os.path.join(staging_dir, filename), categorical.array.codes)
+                frame_entry['columns'].append({'name': col, 'file': filename, 'kind': 'categorical', 'dictionary': dictionary_no})
+        manifest['frames'][name] = frame_entry
+    with open(os.path.join(staging_dir, "manifest.json"), "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, default=str)
+
+    try:
+        os.rename(staging_dir, version_dir)
+    except OSError: # Another worker published the same version first
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    _prune_data_plane(plane_dir, keep=os.path.basename(version_dir))
+    return version_dir
+
+def attach_data_plane(plane_dir: str, data_version: str):
+    """Memory-maps a published version read-only; returns None when it has not been published."""
+    version_dir = os.path.join(plane_dir, f"{data_version}.{DATA_PLANE_LAYOUT}")
+    manifest_path = os.path.join(version_dir, "manifest.json")
+    if not os.path.isfile(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
+
+    frames = {}
+    shared_dtypes = {} # One CategoricalDtype per dictionary, so shared dimensions stay shared once attached
+    for name, frame_entry in manifest['frames'].items():
+        if 'index_file' in frame_entry:
+            index = pd.Index(np.load(os.path.join(version_dir, frame_entry['index_file']), mmap_mode='r', allow_pickle=False))
+        else:
+            index = pd.RangeIndex(frame_entry['length'])
+        columns = {}
+        for column in frame_entry['columns']:
+            values = np.load(os.path.join(version_dir, column['file']), mmap_mode='r', allow_pickle=False)
+            if column['kind'] == 'categorical':
+                dtype = shared_dtypes.get(column['dictionary'])
+                if dtype is None:
+                    categories = _load_plane_categories(version_dir, manifest['dictionaries'][column['dictionary']])
+                    dtype = shared_dtypes[column['dictionary']] = pd.CategoricalDtype(categories)
+                values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+            columns[column['name']] = values
+        frames[name] = pd.DataFrame(columns, index=index, copy=False)
+    return frames
+
+def _data_plane_exported_at(version_dir: str) -> int:
+    try:
+        with open(os.path.join(version_dir, "manifest.json"), encoding="utf-8") as manifest_file:
+            return int(json.load(manifest_file).get('exported_at', 0))
+    except (OSError, ValueError, TypeError):
+        return 0
+
+def _prune_data_plane(plane_dir: str, keep: str):
+    """Removes published versions outside the DATA_PLANE_RETENTION newest exports, never `keep`.
+
+    Versions are ordered by the export time in their manifests, not by directory mtime, so a worker
+    still on an old data version that republishes it cannot evict the versions the others moved to.
+    Each version is renamed to a hidden name before it is deleted; workers still attached to it keep
+    reading their mapped pages, and a worker attaching at that moment falls back to the CSVs.
+    """
+    published = [entry.path for entry in os.scandir(plane_dir) if entry.is_dir() and not entry.name.startswith('.')]
+    published.sort(key=lambda path: (_data_plane_exported_at(path), os.path.basename(path)), reverse=True)
+    for path in published[DATA_PLANE_RETENTION:]:
+        if os.path.basename(path) == keep:
+            continue
+        doomed_dir = os.path.join(plane_dir, f".removing-{os.path.basename(path)}-{uuid.uuid4().hex[:6]}")
+        try:
+            os.rename(path, doomed_dir)
+        except OSError: # Removed by another worker already
+            continue
+        shutil.rmtree(doomed_dir, ignore_errors=True)
+
+# --- Memory Accounting ---
+# Budgets in MB (0 = no limit). HR_MEMORY_BUDGET_MB caps the process RSS: a rerun that finds RSS
+# above it first evicts the derived caches (indexes, aggregates and figures), then downgrades the
+# process to summary-only mode, which keeps only the aggregate reports in memory.
+# HR_DATASET_BUDGET_MB caps every cleaned dataset, with overrides in HR_DATASET_BUDGETS
+# (e.g. "job_history_analysis=50,all_employees=200"); a dataset over its budget is not kept.
+def _parse_budgets(spec: str) -> dict:
+    budgets = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        try:
+            budgets[name.strip()] = float(value)
+        except ValueError:
+            _logger.warning("Ignoring invalid HR_DATASET_BUDGETS entry '%s'", item)
+    return budgets
+
+MB = 1024 * 1024
+MEMORY_BUDGET_MB = float(os.environ.get("HR_MEMORY_BUDGET_MB", "0") or 0)
+DATASET_BUDGET_MB = float(os.environ.get("HR_DATASET_BUDGET_MB", "0") or 0)
+# Aggregate reports kept in summary-only mode; per-employee reports and dept_* rosters are dropped
+SUMMARY_DATASETS = [
+    'all_departments', 'department_salary_analysis', 'job_experience_salary', 'job_salary_statistics',
+    'job_turnover_analysis', 'location_employee_report', 'salary_distribution', 'top_bottom_jobs', 'top_salaries',
+]
+MEMORY_EVENT_LIMIT = 20
+_SIZE_SAMPLE = 1000 # Containers larger than this are sized from an evenly spaced sample
+
+@st.cache_resource
+def memory_state() -> dict:
+    """Process-wide accounting state (app.py re-executes on every rerun, so it lives in the resource cache)."""
+    return {'summary_only': False, 'dropped': {}, 'events': [], 'lock': threading.Lock(),
+            'dataset_budgets_mb': _parse_budgets(os.environ.get("HR_DATASET_BUDGETS", ""))}
+
+def process_rss_bytes() -> int:
+    """Current resident set size (Linux /proc), falling back to the peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+def estimate_bytes(obj) -> int:
+    """Approximate deep size of frames, arrays, figures and the dict/list structures the caches hold."""
+    if isinstance(obj, go.Figure):
+        return sum(estimate_bytes(trace.to_plotly_json()) for trace in obj.data)
+    if sp.issparse(obj):
+        return sum(int(getattr(obj, attr).nbytes) for attr in ('data', 'indices', 'indptr', 'row', 'col') if hasattr(obj, attr))
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes) + (_sampled_bytes(obj.ravel()) if obj.dtype == object else 0)
+    if isinstance(obj, (dict, MappingProxyType)):
+        return sys.getsizeof(obj) + _sampled_bytes(list(obj.items()) if len(obj) <= _SIZE_SAMPLE else obj)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + _sampled_bytes(obj)
+    return sys.getsizeof(obj)
+
+def _sampled_bytes(items) -> int:
+    n = len(items)
+    if n == 0:
+        return 0
+    if isinstance(items, (dict, MappingProxyType)):
+        keys = list(items.keys())
+        step = max(1, n // _SIZE_SAMPLE)
+        sample = [(keys[i], items[keys[i]]) for i in range(0, n, step)]
+    else:
+        seq = items if isinstance(items, (list, tuple, np.ndarray)) else list(items)
+        sample = seq[::max(1, n // _SIZE_SAMPLE)]
+    return int(sum(estimate_bytes(item) for item in sample) * n / len(sample))
+
+def dataset_budget_bytes(name: str):
+    budget_mb = memory_state()['dataset_budgets_mb'].get(name, DATASET_BUDGET_MB)
+    return budget_mb * MB if budget_mb > 0 else None
+
+def apply_dataset_budgets(frames: dict) -> dict:
+    """Drops datasets whose deep memory usage is over their budget, recording what was dropped."""
+    state = memory_state()
+    if not DATASET_BUDGET_MB and not state['dataset_budgets_mb']:
+        return frames
+    kept = {}
+    for name, df in frames.items():
+        budget, size = dataset_budget_bytes(name), None
+        if budget is not None:
+            size = estimate_bytes(df)
+        if budget is not None and size > budget:
+            with state['lock']:
+                state['dropped'][name] = size
+            notify("warning", f"Dataset '{name}' uses {size / MB:,.1f} MB, over its {budget / MB:,.0f} MB budget; it is not kept in memory.")
+        else:
+            kept[name] = df
+    return kept
+
+def _record_memory_event(state: dict, action: str, rss: int):
+    state['events'] = (state['events'] + [{
+        'time': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'), 'action': action, 'rss_mb': round(rss / MB, 1),
+    }])[-MEMORY_EVENT_LIMIT:]
+    _logger.warning("Memory budget: %s (RSS %.1f MB, budget %.0f MB)", action, rss / MB, MEMORY_BUDGET_MB)
+
+DERIVED_CACHE_LAYERS = ['indexes', 'aggregates', 'figures']
+
+def evict_derived_caches():
+    """Clears the indexes, aggregates and figures; they are rebuilt on the next visit to their pages."""
+    for layer in DERIVED_CACHE_LAYERS:
+        clear_cache_layer(layer)
+
+def derived_cache_bytes() -> int:
+    return sum(cache_layers()[layer]['bytes'] for layer in DERIVED_CACHE_LAYERS)
+
+def enforce_memory_budget() -> bool:
+    """Checks RSS against HR_MEMORY_BUDGET_MB; returns True when the process just entered summary-only mode."""
+    if not MEMORY_BUDGET_MB:
+        return False
+    budget = MEMORY_BUDGET_MB * MB
+    rss = process_rss_bytes()
+    if rss <= budget:
+        return False
+    state = memory_state()
+    if derived_cache_bytes():
+        evict_derived_caches()
+        gc.collect()
+        with state['lock']:
+            _record_memory_event(state, "evicted indexes, aggregates and figures", rss)
+        rss = process_rss_bytes()
+        if rss <= budget:
+            return False
+    with state['lock']:
+        if state['summary_only']:
+            return False
+        state['summary_only'] = True
+        _record_memory_event(state, "switched to summary-only mode", rss)
+    build_data_store.clear()
+    evict_derived_caches()
+    gc.collect()
+    return True
+
+def summary_only_mode() -> bool:
+    return memory_state()['summary_only']
+
+def build_memory_report(dfs: dict, data_version: str) -> pd.DataFrame:
+    """One row per dataset and derived cache entry: layer, name, rows, MB, budget MB and status."""
+    rows = []
+    for name, df in sorted(dfs.items()):
+        budget = dataset_budget_bytes(name)
+        rows.append({'layer': 'dataset', 'name': name, 'rows': len(df), 'mb': estimate_bytes(df) / MB,
+                     'budget_mb': budget / MB if budget else None, 'status': 'ok'})
+    state = memory_state()
+    with state['lock']:
+        dropped = dict(state['dropped'])
+    for name, size in sorted(dropped.items()):
+        if name not in dfs:
+            rows.append({'layer': 'dataset', 'name': name, 'rows': None, 'mb': size / MB,
+                         'budget_mb': dataset_budget_bytes(name) / MB, 'status': 'dropped (over budget)'})
+    sizes = {}
+    for layer in DERIVED_CACHE_LAYERS:
+        cache = cache_layers()[layer]
+        with cache['lock']:
+            for key, entry in cache['entries'].items():
+                status = 'current' if data_version in key else 'stale'
+                sizes[(key[0], status)] = sizes.get((key[0], status), 0) + entry['bytes']
+    for (name, status), size in sorted(sizes.items()):
+        rows.append({'layer': 'cache', 'name': name, 'rows': None, 'mb': size / MB, 'budget_mb': None, 'status': status})
+    report_df = pd.DataFrame(rows, columns=['layer', 'name', 'rows', 'mb', 'budget_mb', 'status'])
+    return report_df.sort_values(['layer', 'mb'], ascending=[False, False], kind='stable').reset_index(drop=True)
+
+# --- Background Refresh ---
+# One daemon thread per process polls the export directory every HR_REFRESH_INTERVAL_S seconds
+# (0 = check on every rerun instead). A new version is loaded and cleaned off the request path and
+# swapped in as a single snapshot, so reruns keep serving the previous version until it is ready.
+REFRESH_INTERVAL_S = float(os.environ.get("HR_REFRESH_INTERVAL_S", "30") or 0)
+REFRESH_SETTLE_S = 2.0 # A new fingerprint must hold this long before it is built (exports are written file by file)
+
+def build_data_snapshot(directory: str, data_version: str, summary_only: bool) -> MappingProxyType:
+    """An immutable (version, store, load time) triple; swapping the reference swaps the whole version."""
+    start = time.perf_counter()
+    store = build_data_store(directory, data_version, summary_only)
+    if not os.path.isdir(directory): # Snapshot pruned while it was being read: the store may be partial
+        build_data_store.clear()
+        raise FileNotFoundError(f"Snapshot '{directory}' was removed while loading")
+    return MappingProxyType({'version': data_version, 'store': store, 'summary_only': summary_only,
+                             'directory': directory, 'loaded_at': pd.Timestamp.now(),
+                             'load_seconds': time.perf_counter() - start})
+
+@st.cache_resource(show_spinner="Loading HR data...")
+def data_server(directory: str) -> dict:
+    """Process-wide double buffer: 'current' is the snapshot every rerun serves, the refresher builds the next one."""
+    note_cache_miss("data_server")
+    source_dir = resolve_snapshot_dir(directory)
+    state = {
+        'directory': directory,
+        'current': build_data_snapshot(source_dir, get_data_version(source_dir), summary_only_mode()),
+        'lock': threading.Lock(), # One build at a time
+        'stop': threading.Event(),
+        'last_check': pd.Timestamp.now(),
+        'last_error': None,
+    }
+    if REFRESH_INTERVAL_S > 0:
+        threading.Thread(target=_refresh_loop, args=(state,), name="hr-data-refresh", daemon=True).start()
+    return state
+
+def refresh_data(state: dict) -> bool:
+    """Builds the directory's current version if it is not the one being served and swaps it in; True on a swap."""
+    with state['lock']:
+        source_dir = resolve_snapshot_dir(state['directory']) # Resolved once: the build reads this snapshot only
+        version = get_data_version(source_dir)
+        current, summary_only = state['current'], summary_only_mode()
+        state['last_check'] = pd.Timestamp.now()
+        if not version or (version == current['version'] and summary_only == current['summary_only']):
+            return False
+        try:
+            snapshot = build_data_snapshot(source_dir, version, summary_only)
+        except Exception as e: # Keep serving the current version
+            state['last_error'] = f"{pd.Timestamp.now():%Y-%m-%d %H:%M:%S}: {e}"
+            _logger.exception("Loading data version %s failed; still serving %s", version, current['version'])
+            return False
+        state['current'] = snapshot # Atomic swap: a rerun holds either the old or the new snapshot, never a mix
+        state['last_error'] = None
+        _logger.info("Swapped in data version %s (%.1fs to load)", version, snapshot['load_seconds'])
+        return True
+
+def _refresh_loop(state: dict):
+    while not state['stop'].wait(REFRESH_INTERVAL_S):
+        source_dir = resolve_snapshot_dir(state['directory'])
+        version = get_data_version(source_dir)
+        if version == state['current']['version'] and summary_only_mode() == state['current']['summary_only']:
+            state['last_check'] = pd.Timestamp.now()
+            continue
+        if source_dir != state['directory']: # Published snapshots are complete; no need to wait
+            refresh_data(state)
+            continue
+        if state['stop'].wait(REFRESH_SETTLE_S):
+            break
+        if get_data_version(state['directory']) == version: # Unchanged while settling: the export is complete
+            refresh_data(state)
+
 # --- Visualization Functions ---
 def plot_employee_demographics(dfs: dict):
     dept_salary_df = dfs.get('department_salary_analysis', pd.DataFrame())
     if dept_salary_df.empty:
-        st.warning("Data for 'Department Salary Comparison' (department_salary_analysis.csv) not available.")
+        notify("warning", "Data for 'Department Salary Comparison' (department_salary_analysis.csv) not available.")
         return None
 
     required_cols = ['department', 'avg_salary', 'min_salary', 'max_salary']
     for col in required_cols:
         if col not in dept_salary_df.columns:
-            st.error(f"Missing column '{col}' in department_salary_analysis.csv for demographics plot.")
+            notify("error", f"Missing column '{col}' in department_salary_analysis.csv for demographics plot.")
             return None
     numeric_salary_cols = ['avg_salary', 'min_salary', 'max_salary']
     for col in numeric_salary_cols:
         if not pd.api.types.is_numeric_dtype(dept_salary_df[col]):
-            try: dept_salary_df[col] = pd.to_numeric(dept_salary_df[col])
+            try: dept_salary_df = dept_salary_df.assign(**{col: pd.to_numeric(dept_salary_df[col])})
             except ValueError:
-                st.error(f"Column '{col}' in department_salary_analysis.csv must be numeric for demographics plot.")
+                notify("error", f"Column '{col}' in department_salary_analysis.csv must be numeric for demographics plot.")
                 return None
 
     fig = go.Figure()
@@ -139,18 +880,18 @@ def plot_employee_demographics(dfs: dict):
 def plot_salary_analysis(dfs: dict):
     exp_df = dfs.get('job_experience_salary', pd.DataFrame())
     if exp_df.empty:
-        st.warning("Data for 'Experience vs. Salary' (job_experience_salary.csv) not available.")
+        notify("warning", "Data for 'Experience vs. Salary' (job_experience_salary.csv) not available.")
         return None
     required_cols = ['avg_experience_(years)', 'avg_salary', 'job_title']
     if not all(col in exp_df.columns for col in required_cols):
-        st.error(f"Missing required columns in job_experience_salary.csv. Need: {', '.join(required_cols)}")
+        notify("error", f"Missing required columns in job_experience_salary.csv. Need: {', '.join(required_cols)}")
         return None
     for col in ['avg_experience_(years)', 'avg_salary']:
         if not pd.api.types.is_numeric_dtype(exp_df[col]):
             try:
-                exp_df[col] = pd.to_numeric(exp_df[col])
+                exp_df = exp_df.assign(**{col: pd.to_numeric(exp_df[col])})
             except ValueError:
-                st.error(f"Column '{col}' in job_experience_salary.csv must be numeric.")
+                notify("error", f"Column '{col}' in job_experience_salary.csv must be numeric.")
                 return None
 
     trendline_arg = 'ols'
@@ -159,7 +900,7 @@ def plot_salary_analysis(dfs: dict):
         import statsmodels.api # Try to import to see if it's available
     except ImportError:
         trendline_arg = None # Set trendline to None if statsmodels is not found
-        st.info("`statsmodels` library not found. Plotting Experience vs. Salary without OLS trendline. To enable trendline, please install statsmodels (`pip install statsmodels`).")
+        notify("info", "`statsmodels` library not found. Plotting Experience vs. Salary without OLS trendline. To enable trendline, please install statsmodels (`pip install statsmodels`).")
 
     fig = px.scatter(
         exp_df,
@@ -185,21 +926,21 @@ def plot_salary_analysis(dfs: dict):
 def plot_hiring_trends(dfs: dict):
     emp_df = dfs.get('all_employees', pd.DataFrame()) # Assuming 'all_employees' is the correct key
     if emp_df.empty or 'hire_date' not in emp_df.columns:
-        st.warning("Data for 'Hiring Trends' (all_employees.csv with 'hire_date') not available.")
+        notify("warning", "Data for 'Hiring Trends' (all_employees.csv with 'hire_date') not available.")
         return None
     if not pd.api.types.is_datetime64_any_dtype(emp_df['hire_date']):
-        try: emp_df['hire_date'] = pd.to_datetime(emp_df['hire_date'])
+        try: emp_df = emp_df.assign(hire_date=pd.to_datetime(emp_df['hire_date']))
         except Exception:
-            st.error("'hire_date' column in all_employees.csv is not in a valid date format for hiring trends.")
+            notify("error", "'hire_date' column in all_employees.csv is not in a valid date format for hiring trends.")
             return None
     
     emp_df_filtered = emp_df.dropna(subset=['hire_date'])
     if emp_df_filtered.empty:
-        st.warning("No valid 'hire_date' data available after attempting to clean for hiring trends.")
+        notify("warning", "No valid 'hire_date' data available after attempting to clean for hiring trends.")
         return None
 
-    emp_df_filtered['hire_year'] = emp_df_filtered['hire_date'].dt.year
-    hire_trends = emp_df_filtered['hire_year'].value_counts().sort_index().reset_index()
+    hire_years = emp_df_filtered['hire_date'].dt.year
+    hire_trends = hire_years.value_counts().sort_index().reset_index()
     hire_trends.columns = ['year', 'hires']
 
     fig = px.line(
@@ -218,21 +959,21 @@ def plot_hiring_trends(dfs: dict):
 def plot_turnover_analysis(dfs: dict):
     turnover_df = dfs.get('job_turnover_analysis', pd.DataFrame())
     if turnover_df.empty:
-        st.warning("Data for 'Turnover Rate by Job' (job_turnover_analysis.csv) not available.")
+        notify("warning", "Data for 'Turnover Rate by Job' (job_turnover_analysis.csv) not available.")
         return None
     required_cols = ['job_title', 'turnover_rate_(%)']
     if not all(col in turnover_df.columns for col in required_cols):
-        st.error(f"Missing required columns in job_turnover_analysis.csv. Need: {', '.join(required_cols)}")
+        notify("error", f"Missing required columns in job_turnover_analysis.csv. Need: {', '.join(required_cols)}")
         return None
     if not pd.api.types.is_numeric_dtype(turnover_df['turnover_rate_(%)']):
-        try: turnover_df['turnover_rate_(%)'] = pd.to_numeric(turnover_df['turnover_rate_(%)'])
+        try: turnover_df = turnover_df.assign(**{'turnover_rate_(%)': pd.to_numeric(turnover_df['turnover_rate_(%)'])})
         except ValueError:
-            st.error("'turnover_rate_(%)' column in job_turnover_analysis.csv must be numeric.")
+            notify("error", "'turnover_rate_(%)' column in job_turnover_analysis.csv must be numeric.")
             return None
     
     turnover_df_sorted = turnover_df.dropna(subset=['turnover_rate_(%)', 'job_title']).sort_values('turnover_rate_(%)', ascending=True)
     if turnover_df_sorted.empty:
-        st.warning("No valid data to display for turnover analysis after cleaning.")
+        notify("warning", "No valid data to display for turnover analysis after cleaning.")
         return None
 
     fig = px.bar(
@@ -255,17 +996,17 @@ def plot_turnover_analysis(dfs: dict):
 def plot_tenure_distribution(dfs: dict):
     tenure_df = dfs.get('tenure_comparison', pd.DataFrame()) # Key for tenure data
     if tenure_df.empty or 'tenure' not in tenure_df.columns:
-        st.warning("Data for 'Tenure Distribution' (tenure_comparison.csv with 'tenure' column) not available.")
+        notify("warning", "Data for 'Tenure Distribution' (tenure_comparison.csv with 'tenure' column) not available.")
         return None
     if not pd.api.types.is_numeric_dtype(tenure_df['tenure']):
-        try: tenure_df['tenure'] = pd.to_numeric(tenure_df['tenure'])
+        try: tenure_df = tenure_df.assign(tenure=pd.to_numeric(tenure_df['tenure']))
         except ValueError:
-            st.error("'tenure' column in tenure_comparison.csv must be numeric.")
+            notify("error", "'tenure' column in tenure_comparison.csv must be numeric.")
             return None
             
     tenure_df_cleaned = tenure_df.dropna(subset=['tenure'])
     if tenure_df_cleaned.empty:
-        st.warning("No valid tenure data to display after cleaning.")
+        notify("warning", "No valid tenure data to display after cleaning.")
         return None
 
     fig = px.histogram(
@@ -282,27 +1023,27 @@ def plot_tenure_distribution(dfs: dict):
 def plot_salary_distribution(dfs: dict):
     salary_dist_df = dfs.get('salary_distribution', pd.DataFrame())
     if salary_dist_df.empty:
-        st.warning("Data for 'Salary Distribution' (salary_distribution.csv) not available.")
+        notify("warning", "Data for 'Salary Distribution' (salary_distribution.csv) not available.")
         return None
     
     expected_cols = ['salary_range', 'employee_count']
     if not all(col in salary_dist_df.columns for col in expected_cols):
         if len(salary_dist_df.columns) >= 2:
-            st.info("Attempting to use first two columns for salary distribution as 'salary_range' and 'employee_count'.")
-            salary_dist_df.columns = ['salary_range', 'employee_count'] + list(salary_dist_df.columns[2:])
+            notify("info", "Attempting to use first two columns for salary distribution as 'salary_range' and 'employee_count'.")
+            salary_dist_df = salary_dist_df.set_axis(['salary_range', 'employee_count'] + list(salary_dist_df.columns[2:]), axis=1)
         else:
-            st.error(f"Salary distribution data needs at least two columns. Expected: {', '.join(expected_cols)}.")
+            notify("error", f"Salary distribution data needs at least two columns. Expected: {', '.join(expected_cols)}.")
             return None
 
     if not pd.api.types.is_numeric_dtype(salary_dist_df['employee_count']):
-        try: salary_dist_df['employee_count'] = pd.to_numeric(salary_dist_df['employee_count'])
+        try: salary_dist_df = salary_dist_df.assign(employee_count=pd.to_numeric(salary_dist_df['employee_count']))
         except ValueError:
-            st.error("'employee_count' column in salary_distribution.csv must be numeric.")
+            notify("error", "'employee_count' column in salary_distribution.csv must be numeric.")
             return None
             
     salary_dist_df_cleaned = salary_dist_df.dropna(subset=['employee_count', 'salary_range'])
     if salary_dist_df_cleaned.empty:
-        st.warning("No valid data for salary distribution after cleaning.")
+        notify("warning", "No valid data for salary distribution after cleaning.")
         return None
         
     # Sort the data by salary range for better visualization
@@ -339,22 +1080,22 @@ def plot_salary_distribution(dfs: dict):
 def plot_location_report(dfs: dict):
     loc_df = dfs.get('location_employee_report', pd.DataFrame())
     if loc_df.empty:
-        st.warning("Data for 'Location Report' (location_employee_report.csv) not available.")
+        notify("warning", "Data for 'Location Report' (location_employee_report.csv) not available.")
         return None
     required_cols = ['city', 'average_salary', 'employee_count']
     if not all(col in loc_df.columns for col in required_cols):
-        st.error(f"Missing required columns in location_employee_report.csv. Need at least: {', '.join(required_cols)}")
+        notify("error", f"Missing required columns in location_employee_report.csv. Need at least: {', '.join(required_cols)}")
         return None
     for col in ['average_salary', 'employee_count']:
         if not pd.api.types.is_numeric_dtype(loc_df[col]):
-            try: loc_df[col] = pd.to_numeric(loc_df[col])
+            try: loc_df = loc_df.assign(**{col: pd.to_numeric(loc_df[col])})
             except ValueError:
-                st.error(f"Column '{col}' in location_employee_report.csv must be numeric.")
+                notify("error", f"Column '{col}' in location_employee_report.csv must be numeric.")
                 return None
                 
     loc_df_cleaned = loc_df.dropna(subset=required_cols)
     if loc_df_cleaned.empty:
-        st.warning("No valid data for location report after cleaning.")
+        notify("warning", "No valid data for location report after cleaning.")
         return None
         
     text_col = 'department' if 'department' in loc_df_cleaned.columns else None
@@ -383,24 +1124,24 @@ def plot_location_report(dfs: dict):
 def plot_salary_growth(dfs: dict):
     growth_df = dfs.get('salary_growth', pd.DataFrame())
     if growth_df.empty or 'growth_%' not in growth_df.columns:
-        st.warning("Data for 'Salary Growth' (salary_growth.csv with 'growth_%' column) not available.")
+        notify("warning", "Data for 'Salary Growth' (salary_growth.csv with 'growth_%' column) not available.")
         return None
     if not pd.api.types.is_numeric_dtype(growth_df['growth_%']):
-        try: growth_df['growth_%'] = pd.to_numeric(growth_df['growth_%'])
+        try: growth_df = growth_df.assign(**{'growth_%': pd.to_numeric(growth_df['growth_%'])})
         except ValueError:
-            st.error("'growth_%' column in salary_growth.csv must be numeric.")
+            notify("error", "'growth_%' column in salary_growth.csv must be numeric.")
             return None
 
     growth_df_cleaned = growth_df.dropna(subset=['growth_%'])
     if growth_df_cleaned.empty:
-        st.warning("No valid salary growth data after cleaning.")
+        notify("warning", "No valid salary growth data after cleaning.")
         return None
         
     bins = [-float('inf'), -50.0001, -0.0001, 0.0001, 50.0001, float('inf')]
     labels = ['Decrease >50%', 'Decrease 0-50%', 'No Change', 'Increase 0-50%', 'Increase >50%']
-    growth_df_cleaned['growth_bucket'] = pd.cut(growth_df_cleaned['growth_%'], bins=bins, labels=labels, include_lowest=True, right=True)
+    growth_buckets = pd.cut(growth_df_cleaned['growth_%'], bins=bins, labels=labels, include_lowest=True, right=True)
     
-    growth_dist = growth_df_cleaned['growth_bucket'].value_counts().reindex(labels).fillna(0).reset_index()
+    growth_dist = growth_buckets.value_counts().reindex(labels).fillna(0).reset_index()
     growth_dist.columns = ['growth_range', 'count']
 
     color_map = {
@@ -426,21 +1167,21 @@ def plot_salary_growth(dfs: dict):
 def plot_top_salaries(dfs: dict):
     top_df = dfs.get('top_salaries', pd.DataFrame())
     if top_df.empty:
-        st.warning("Data for 'Top Salaries' (top_salaries.csv) not available.")
+        notify("warning", "Data for 'Top Salaries' (top_salaries.csv) not available.")
         return None
     required_cols = ['name', 'salary']
     if not all(col in top_df.columns for col in required_cols):
-        st.error(f"Missing required columns in top_salaries.csv. Need: {', '.join(required_cols)}")
+        notify("error", f"Missing required columns in top_salaries.csv. Need: {', '.join(required_cols)}")
         return None
     if not pd.api.types.is_numeric_dtype(top_df['salary']):
-        try: top_df['salary'] = pd.to_numeric(top_df['salary'])
+        try: top_df = top_df.assign(salary=pd.to_numeric(top_df['salary']))
         except ValueError:
-            st.error("'salary' column in top_salaries.csv must be numeric.")
+            notify("error", "'salary' column in top_salaries.csv must be numeric.")
             return None
             
     top_df_cleaned = top_df.dropna(subset=['name', 'salary'])
     if top_df_cleaned.empty:
-        st.warning("No valid data for top salaries after cleaning.")
+        notify("warning", "No valid data for top salaries after cleaning.")
         return None
         
     top_df_sorted = top_df_cleaned.sort_values('salary', ascending=False).head(15)
@@ -460,10 +1201,1137 @@ def plot_top_salaries(dfs: dict):
     return fig
 
 
-def main():
-    st.set_page_config(layout="wide", page_title="HR Workforce Dynamics Dashboard")
+# --- Department Drill-Down ---
+DEPT_KEY_PREFIX = "dept_"
+ROSTER_PAGE_SIZES = [25, 50, 100, 250]
+ROSTER_SORT_COLUMNS = {
+    'Name': 'name', 'Employee ID': 'employee_id', 'Salary': 'salary', 'Hire Date': 'hire_date'
+}
+
+def get_department_options(dfs: dict) -> dict:
+    """Maps a display label (e.g. 'Sales (80)') to the dfs key of each dept_<id> roster."""
+    dept_names = {}
+    departments_df = dfs.get('all_departments', pd.DataFrame())
+    if not departments_df.empty and {'department_id', 'department_name'}.issubset(departments_df.columns):
+        ids = pd.to_numeric(departments_df['department_id'], errors='coerce')
+        dept_names = dict(zip(ids, departments_df['department_name']))
+
+    options = []
+    for key, roster_df in dfs.items():
+        dept_id = key[len(DEPT_KEY_PREFIX):]
+        if not key.startswith(DEPT_KEY_PREFIX) or not dept_id.isdigit():
+            continue
+        name = dept_names.get(int(dept_id))
+        if (name is None or pd.isna(name)) and 'department' in roster_df.columns and not roster_df.empty:
+            name = roster_df['department'].iloc[0] # Empty departments only exist in all_departments.csv
+        label = f"{name} ({dept_id})" if name is not None and pd.notna(name) else f"Department {dept_id}"
+        options.append((int(dept_id), label, key))
+    return {label: key for _, label, key in sorted(options)}
+
+def summarize_department_roster(roster_df: pd.DataFrame) -> dict:
+    """Headcount and salary summary for one department roster."""
+    salaries = roster_df['salary'].dropna() if 'salary' in roster_df.columns else pd.Series(dtype=float)
+    summary = {'headcount': len(roster_df)}
+    for stat, value in [('avg', salaries.mean()), ('median', salaries.median()),
+                        ('min', salaries.min()), ('max', salaries.max()), ('total', salaries.sum())]:
+        summary[f'{stat}_salary'] = value if not salaries.empty and pd.notnull(value) else None
+    return summary
+
+def query_department_roster(roster_df: pd.DataFrame, search: str = "", sort_by: str = None,
+                            ascending: bool = True) -> pd.DataFrame:
+    """Filters and sorts a roster server-side; only the requested page is sent to the browser."""
+    view = roster_df
+    needle = (search or "").strip().lower()
+    if needle:
+        mask = pd.Series(False, index=view.index)
+        if 'name' in view.columns:
+            mask |= view['name'].astype(str).str.lower().str.contains(needle, regex=False, na=False)
+        if 'employee_id' in view.columns:
+            mask |= view['employee_id'].astype(str).str.startswith(needle, na=False)
+        view = view[mask]
+    if sort_by in view.columns:
+        view = view.sort_values(sort_by, ascending=ascending, kind='stable', na_position='last')
+    return view
+
+def paginate_frame(df: pd.DataFrame, page: int, page_size: int) -> tuple:
+    """Returns (page_slice, total_rows, total_pages) with the page number clamped to the valid range."""
+    total_rows = len(df)
+    total_pages = max(1, -(-total_rows // page_size))
+    page = min(max(1, int(page)), total_pages)
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size], total_rows, total_pages
+
+def plot_department_salary_histogram(roster_df: pd.DataFrame, department_label: str):
+    if roster_df.empty or 'salary' not in roster_df.columns:
+        return None
+    salaries_df = roster_df.dropna(subset=['salary'])
+    if salaries_df.empty:
+        return None
+
+    fig = px.histogram(
+        salaries_df, x='salary', nbins=min(30, max(5, len(salaries_df) // 2)),
+        title=f"Salary Distribution - {department_label}",
+        color_discrete_sequence=[COLORS['purple']],
+        labels={'salary': 'Salary (Currency)'}
+    )
+    fig.update_layout(
+        xaxis_title="Salary (Currency)", yaxis_title="Number of Employees", bargap=0.05,
+        paper_bgcolor=COLORS['graph_bg'], plot_bgcolor=COLORS['graph_bg'], font_color=COLORS['text']
+    )
+    return fig
+
+def format_currency(value) -> str:
+    return f"${value:,.0f}" if value is not None and pd.notnull(value) else "N/A"
+
+
+# --- Employee Search Index ---
+SEARCH_REPORTS = ['all_employees', 'salary_rank', 'tenure_comparison', 'salary_growth', 'job_history_analysis']
+SEARCH_RESULT_LIMIT = 50
+
+def _collect_employee_directory(dfs: dict) -> pd.DataFrame:
+    """One row per employee_id with name, email, department, job title and the reports mentioning them."""
+    frames = []
+    for report in SEARCH_REPORTS:
+        report_df = dfs.get(report, pd.DataFrame())
+        if report_df.empty or 'employee_id' not in report_df.columns:
+            continue
+        if 'name' in report_df.columns:
+            names = report_df['name']
+        elif {'first_name', 'last_name'}.issubset(report_df.columns):
+            names = report_df['first_name'].fillna('').astype(str) + ' ' + report_df['last_name'].fillna('').astype(str)
+        else:
+            continue
+        frame = pd.DataFrame({
+            'employee_id': pd.to_numeric(report_df['employee_id'], errors='coerce'),
+            'name': names.astype(str).str.strip(),
+            'email': report_df['email'] if 'email' in report_df.columns else pd.NA,
+            'department': report_df['department'] if 'department' in report_df.columns else pd.NA,
+            # job_history_analysis lists past roles, so its titles are not the current job
+            'job_title': report_df['job_title'] if 'job_title' in report_df.columns and report != 'job_history_analysis' else pd.NA,
+            'report_bit': 1 << SEARCH_REPORTS.index(report),
+        })
+        frames.append(frame.dropna(subset=['employee_id']))
+    if not frames:
+        return pd.DataFrame(columns=['employee_id', 'name', 'email', 'department', 'job_title', 'reports'])
+
+    combined = pd.concat(frames, ignore_index=True)
+    combined['employee_id'] = combined['employee_id'].astype('int64')
+    grouped = combined.groupby('employee_id', sort=True)
+    # first non-null per column; plain objects so the fallbacks below can fill in any value
+    directory_df = grouped[['name', 'email', 'department', 'job_title']].first().astype(object)
+    # Encode report membership as a bitmask so it aggregates without a per-employee Python loop
+    report_bits = combined[['employee_id', 'report_bit']].drop_duplicates().groupby('employee_id')['report_bit'].sum()
+    mask_labels = {mask: ', '.join(r for i, r in enumerate(SEARCH_REPORTS) if mask & (1 << i)) for mask in report_bits.unique()}
+    directory_df['reports'] = report_bits.map(mask_labels)
+
+    # all_employees only carries ids; resolve department and job names for employees missing them
+    emp_df = dfs.get('all_employees', pd.DataFrame())
+    depts_df = dfs.get('all_departments', pd.DataFrame())
+    jobs_df = dfs.get('job_salary_statistics', pd.DataFrame())
+    if not emp_df.empty and 'employee_id' in emp_df.columns:
+        emp_ids = pd.to_numeric(emp_df['employee_id'], errors='coerce')
+        emp_by_id = emp_df[emp_ids.notna()].set_index(emp_ids.dropna().astype('int64'))
+        emp_by_id = emp_by_id[~emp_by_id.index.duplicated()]
+        if 'department_id' in emp_by_id.columns and {'department_id', 'department_name'}.issubset(depts_df.columns):
+            dept_names = depts_df.set_index(pd.to_numeric(depts_df['department_id'], errors='coerce'))['department_name']
+            fallback = pd.to_numeric(emp_by_id['department_id'], errors='coerce').map(dept_names)
+            directory_df['department'] = directory_df['department'].fillna(fallback.reindex(directory_df.index))
+        if 'job_id' in emp_by_id.columns and {'job_id', 'job_title'}.issubset(jobs_df.columns):
+            job_titles = dict(zip(jobs_df['job_id'].astype(str), jobs_df['job_title']))
+            fallback = emp_by_id['job_id'].astype(str).map(job_titles)
+            directory_df['job_title'] = directory_df['job_title'].fillna(fallback.reindex(directory_df.index))
+    return directory_df.reset_index()
+
+@policy_cache('indexes', spinner="Building employee search index...")
+def build_employee_search_index(_dfs: dict, data_version: str) -> dict:
+    """Builds the employee search index once per data version.
+
+    Holds a sorted array of lower-cased search keys (full name, each name part, email, employee id)
+    with the directory row each key points to, for binary-search prefix lookup, plus a hash index
+    from employee_id to directory row for exact id matches.
+    """
+    directory_df = _collect_employee_directory(_dfs)
+    rows = np.arange(len(directory_df))
+    names = directory_df['name'].fillna('').astype(str).str.lower()
+
+    key_parts = [
+        (names, rows),
+        (directory_df['email'].fillna('').astype(str).str.lower(), rows),
+        (directory_df['employee_id'].astype(str), rows),
+    ]
+    name_tokens = names.str.split().explode()
+    name_tokens = name_tokens[name_tokens.notna() & (name_tokens != '')]
+    key_parts.append((name_tokens, rows[name_tokens.index.to_numpy(dtype='int64')]))
+
+    keys = np.concatenate([np.asarray(part_keys, dtype=object) for part_keys, _ in key_parts])
+    key_rows = np.concatenate([part_rows for _, part_rows in key_parts])
+    keep = keys != ''
+    keys, key_rows = keys[keep], key_rows[keep]
+    order = np.argsort(keys, kind='stable')
+
+    index = {
+        'version': data_version,
+        'directory': directory_df,
+        'keys': keys[order],
+        'key_rows': key_rows[order],
+        'id_to_row': dict(zip(directory_df['employee_id'].tolist(), rows.tolist())),
+    }
+    return index
+
+def _prefix_rows(index: dict, prefix: str) -> np.ndarray:
+    """Directory rows whose keys start with prefix, via two binary searches on the sorted key array."""
+    keys = index['keys']
+    lo = np.searchsorted(keys, prefix, side='left')
+    hi = np.searchsorted(keys, prefix + '\uffff', side='left')
+    return np.unique(index['key_rows'][lo:hi])
+
+def search_employees(index: dict, query: str, limit: int = SEARCH_RESULT_LIMIT) -> tuple:
+    """Returns (matches_df, total_matches) for a name, email or employee id query.
+
+    Every whitespace-separated term must prefix-match one of the employee's keys; an exact
+    employee id is always ranked first.
+    """
+    directory_df = index['directory']
+    terms = (query or '').strip().lower().split()
+    if not terms or directory_df.empty:
+        return directory_df.iloc[0:0], 0
+
+    matched_rows = _prefix_rows(index, ' '.join(terms))
+    if len(terms) > 1: # Also match terms spread across first/last name or email
+        term_rows = _prefix_rows(index, terms[0])
+        for term in terms[1:]:
+            term_rows = np.intersect1d(term_rows, _prefix_rows(index, term), assume_unique=True)
+        matched_rows = np.union1d(matched_rows, term_rows)
+
+    exact_row = index['id_to_row'].get(int(terms[0])) if len(terms) == 1 and terms[0].isdigit() else None
+    if exact_row is not None:
+        matched_rows = np.concatenate([[exact_row], matched_rows[matched_rows != exact_row]])
+    return directory_df.iloc[matched_rows[:limit]], len(matched_rows)
+
+# --- Employee Profile ---
+PROFILE_REPORTS = ['all_employees', 'salary_rank', 'salary_quartiles', 'tenure_comparison', 'salary_growth', 'job_history_analysis']
+
+@policy_cache('indexes', spinner="Indexing employee reports...")
+def build_employee_row_indexes(_dfs: dict, data_version: str) -> dict:
+    """Builds an employee_id -> row-position index for every profile report, once per data version.
+
+    Each report gets its row positions sorted by employee_id ('order'), the distinct sorted ids
+    ('ids') and CSR-style 'offsets', so an employee's rows (several for job_history_analysis) are
+    order[offsets[i]:offsets[i + 1]] for the id found by one binary search. Everything is a numpy
+    array, about 24 bytes per row instead of a Python dict entry per employee.
+    """
+    row_indexes = {}
+    for report in PROFILE_REPORTS:
+        report_df = _dfs.get(report, pd.DataFrame())
+        if report_df.empty or 'employee_id' not in report_df.columns:
+            continue
+        ids = pd.to_numeric(report_df['employee_id'], errors='coerce').to_numpy(dtype='float64')
+        order = np.argsort(ids, kind='stable')
+        order = order[~np.isnan(ids[order])]
+        sorted_ids = ids[order].astype('int64')
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]]) if len(sorted_ids) else np.array([], dtype='int64')
+        row_indexes[report] = {
+            'order': order, 'ids': sorted_ids[starts], 'offsets': np.r_[starts, len(sorted_ids)],
+        }
+    return row_indexes
+
+def lookup_employee_rows(dfs: dict, row_indexes: dict, report: str, employee_id: int) -> pd.DataFrame:
+    """All rows of one report for an employee, via the shared row index."""
+    report_df = dfs.get(report, pd.DataFrame())
+    report_index = row_indexes.get(report)
+    if report_index is None:
+        return report_df.iloc[0:0]
+    slot = int(np.searchsorted(report_index['ids'], employee_id))
+    if slot == len(report_index['ids']) or report_index['ids'][slot] != employee_id:
+        return report_df.iloc[0:0]
+    return report_df.iloc[report_index['order'][report_index['offsets'][slot]:report_index['offsets'][slot + 1]]]
+
+def assemble_employee_profile(dfs: dict, row_indexes: dict, employee_id: int) -> dict:
+    """Collects an employee's rows from every profile report (empty frames where they are absent)."""
+    return {report: lookup_employee_rows(dfs, row_indexes, report, employee_id) for report in PROFILE_REPORTS}
+
+def _first_value(df: pd.DataFrame, col: str):
+    if df.empty or col not in df.columns:
+        return None
+    value = df[col].iloc[0]
+    return value if pd.notnull(value) else None
+
+# --- Employment Intervals ---
+# Every role an employee held, as [start, end] day intervals: past roles from job_history_analysis
+# plus the current role (from the later of hire_date and the day after the last past role, open-ended).
+# Counts use two binary searches over sorted start/end arrays; listing the roles that overlap a date
+# range walks a centered interval tree, so no query scans all intervals.
+OPEN_END = np.iinfo(np.int64).max # End day of current (open) roles
+HEADCOUNT_FREQUENCIES = {"Monthly": "MS", "Quarterly": "QS", "Yearly": "YS"}
+
+def _to_days(values) -> np.ndarray:
+    """Datetime-like values as int64 days since the epoch (NaT stays at the int64 minimum)."""
+    return np.asarray(pd.to_datetime(values), dtype='datetime64[ns]').astype('datetime64[D]').astype('int64')
+
+def _to_day(date) -> int:
+    return int(pd.Timestamp(date).to_datetime64().astype('datetime64[D]').astype('int64'))
+
+def _collect_employment_intervals(dfs: dict, directory_df: pd.DataFrame) -> pd.DataFrame:
+    """One row per role held: employee_id, name, job_title, department, start/end days and whether it is current."""
+    columns = ['employee_id', 'name', 'job_title', 'department', 'start', 'end', 'current']
+    frames = []
+    last_end = pd.Series(dtype='int64')
+    history_df = dfs.get('job_history_analysis', pd.DataFrame())
+    if not history_df.empty and {'employee_id', 'start_date', 'end_date'}.issubset(history_df.columns):
+        history_df = history_df.dropna(subset=['employee_id', 'start_date'])
+        ids = pd.to_numeric(history_df['employee_id'], errors='coerce').astype('int64')
+        ends = _to_days(history_df['end_date'])
+        past = pd.DataFrame({
+            'employee_id': ids.to_numpy(),
+            'name': history_df['name'].to_numpy() if 'name' in history_df.columns else pd.NA,
+            'job_title': history_df['job_title'].to_numpy() if 'job_title' in history_df.columns else pd.NA,
+            'department': pd.NA,
+            'start': _to_days(history_df['start_date']),
+            'end': np.where(ends == np.iinfo(np.int64).min, OPEN_END, ends),
+            'current': False,
+        })
+        frames.append(past)
+        last_end = past[past['end'] != OPEN_END].groupby('employee_id')['end'].max()
+
+    emp_df = dfs.get('all_employees', pd.DataFrame())
+    if not emp_df.empty and {'employee_id', 'hire_date'}.issubset(emp_df.columns):
+        emp_df = emp_df.dropna(subset=['employee_id', 'hire_date'])
+        ids = pd.to_numeric(emp_df['employee_id'], errors='coerce').astype('int64')
+        details = directory_df.set_index('employee_id').reindex(ids)
+        starts = pd.Series(_to_days(emp_df['hire_date']), index=ids.to_numpy())
+        starts = np.maximum(starts, last_end.reindex(starts.index).fillna(np.iinfo(np.int64).min).astype('int64') + 1)
+        frames.append(pd.DataFrame({
+            'employee_id': ids.to_numpy(), 'name': details['name'].to_numpy(), 'job_title': details['job_title'].to_numpy(),
+            'department': details['department'].to_numpy(), 'start': starts.to_numpy(), 'end': OPEN_END, 'current': True,
+        }))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    intervals_df = pd.concat(frames, ignore_index=True)[columns]
+    return intervals_df[intervals_df['start'] <= intervals_df['end']].reset_index(drop=True)
+
+def _build_interval_tree(starts: np.ndarray, ends: np.ndarray) -> dict:
+    """Centered interval tree in flat arrays.
+
+    Each node keeps the intervals containing its center (the median start of its subtree) twice:
+    ordered by start ascending and by end descending, so the ones overlapping a query are one
+    contiguous prefix found by binary search. Intervals ending before the center go left, those
+    starting after it go right, which halves the subtree at every level.
+    """
+    centers, lefts, rights, by_start, by_end = [], [], [], [], []
+    offsets = [0]
+    pending = [(np.arange(len(starts)), -1, 0)] # (interval ids, parent node, 0 = left child / 1 = right child)
+    while pending:
+        ids, parent, side = pending.pop()
+        node = len(centers)
+        if parent >= 0:
+            (lefts if side == 0 else rights)[parent] = node
+        center = int(np.median(starts[ids]))
+        here = ids[(starts[ids] <= center) & (ends[ids] >= center)]
+        by_start.append(here[np.argsort(starts[here], kind='stable')])
+        by_end.append(here[np.argsort(-ends[here], kind='stable')])
+        offsets.append(offsets[-1] + len(here))
+        centers.append(center)
+        lefts.append(-1)
+        rights.append(-1)
+        left_ids, right_ids = ids[ends[ids] < center], ids[starts[ids] > center]
+        if len(left_ids):
+            pending.append((left_ids, node, 0))
+        if len(right_ids):
+            pending.append((right_ids, node, 1))
+    by_start = np.concatenate(by_start) if by_start else np.array([], dtype='int64')
+    by_end = np.concatenate(by_end) if by_end else np.array([], dtype='int64')
+    return {
+        'center': np.array(centers, dtype='int64'), 'left': np.array(lefts), 'right': np.array(rights),
+        'offsets': np.array(offsets), 'by_start': by_start, 'start_keys': starts[by_start],
+        'by_end': by_end, 'neg_end_keys': -ends[by_end],
+    }
+
+@policy_cache('indexes', spinner="Indexing employment history...")
+def build_interval_index(_dfs: dict, data_version: str) -> dict:
+    """Builds the employment interval index once per data version."""
+    directory_df = build_employee_search_index(_dfs, data_version)['directory']
+    intervals_df = _collect_employment_intervals(_dfs, directory_df)
+    starts = intervals_df['start'].to_numpy(dtype='int64')
+    ends = intervals_df['end'].to_numpy(dtype='int64')
+    return {
+        'intervals': intervals_df,
+        'sorted_starts': np.sort(starts),
+        'sorted_ends': np.sort(ends),
+        'tree': _build_interval_tree(starts, ends) if len(intervals_df) else None,
+    }
+
+def headcount_as_of(index: dict, date) -> int:
+    """Roles held on date: starts on or before it minus ends before it (two binary searches)."""
+    day = _to_day(date)
+    return int(np.searchsorted(index['sorted_starts'], day, side='right') - np.searchsorted(index['sorted_ends'], day, side='left'))
+
+def headcount_series(index: dict, start_date, end_date, freq: str = "MS") -> pd.DataFrame:
+    """Headcount on every date of a date range (e.g. month starts), two binary searches per date."""
+    dates = pd.date_range(start_date, end_date, freq=freq)
+    days = _to_days(dates)
+    counts = np.searchsorted(index['sorted_starts'], days, side='right') - np.searchsorted(index['sorted_ends'], days, side='left')
+    return pd.DataFrame({'date': dates, 'headcount': counts})
+
+def overlapping_roles(index: dict, start_date, end_date=None) -> pd.DataFrame:
+    """Roles overlapping [start_date, end_date] (a single date when end_date is None), via the interval tree."""
+    intervals_df = index['intervals']
+    tree = index['tree']
+    if tree is None:
+        return intervals_df.iloc[0:0]
+    lo_day = _to_day(start_date)
+    hi_day = lo_day if end_date is None else _to_day(end_date)
+    offsets, found, pending = tree['offsets'], [], [0]
+    while pending:
+        node = pending.pop()
+        first, last = offsets[node], offsets[node + 1]
+        center = tree['center'][node]
+        if hi_day < center: # Node intervals overlap iff they start by hi_day
+            count = np.searchsorted(tree['start_keys'][first:last], hi_day, side='right')
+            found.append(tree['by_start'][first:first + count])
+            children = [tree['left'][node]]
+        elif lo_day > center: # Node intervals overlap iff they end on or after lo_day
+            count = np.searchsorted(tree['neg_end_keys'][first:last], -lo_day, side='right')
+            found.append(tree['by_end'][first:first + count])
+            children = [tree['right'][node]]
+        else: # The query contains the center, so every node interval overlaps it
+            found.append(tree['by_start'][first:last])
+            children = [tree['left'][node], tree['right'][node]]
+        pending.extend(child for child in children if child >= 0)
+    rows = np.sort(np.concatenate(found))
+    return intervals_df.iloc[rows]
+
+def format_interval_roles(roles_df: pd.DataFrame) -> pd.DataFrame:
+    """Interval rows for display: day numbers back to dates, open ends blank."""
+    display_df = roles_df.drop(columns=['start', 'end'])
+    display_df.insert(4, 'start_date', pd.to_datetime(roles_df['start'].to_numpy(), unit='D').strftime('%Y-%m-%d'))
+    ends = roles_df['end'].to_numpy()
+    end_dates = pd.to_datetime(np.where(ends == OPEN_END, 0, ends), unit='D').strftime('%Y-%m-%d')
+    display_df.insert(5, 'end_date', np.where(ends == OPEN_END, '', end_dates))
+    return display_df
+
+def plot_headcount_history(series_df: pd.DataFrame):
+    if series_df.empty:
+        return None
+    fig = px.line(
+        series_df, x='date', y='headcount', title="Headcount Over Time",
+        color_discrete_sequence=[COLORS['purple']], labels={'date': 'Date', 'headcount': 'Headcount'}
+    )
+    fig.update_layout(
+        xaxis_title="Date", yaxis_title="Employees in a Role",
+        paper_bgcolor=COLORS['graph_bg'], plot_bgcolor=COLORS['graph_bg'], font_color=COLORS['text']
+    )
+    return fig
+
+# --- Career Paths ---
+# Job-to-job moves: each employee's roles (past and current, from the interval index) are ordered by
+# start date once, and consecutive pairs are counted into a sparse title x title matrix.
+CAREER_TOP_N = [10, 25, 50, 100]
+
+@policy_cache('aggregates')
+def build_transition_matrix(_dfs: dict, data_version: str) -> dict:
+    """Sparse transition counts (row = from job title, column = to job title) for one data version."""
+    intervals_df = build_interval_index(_dfs, data_version)['intervals']
+    titles_codes, titles = pd.factorize(intervals_df['job_title'].fillna('Unknown'), sort=True)
+    order = np.lexsort((intervals_df['start'].to_numpy(), intervals_df['employee_id'].to_numpy()))
+    ids, codes = intervals_df['employee_id'].to_numpy()[order], titles_codes[order]
+    same_employee = ids[1:] == ids[:-1]
+    sources, targets = codes[:-1][same_employee], codes[1:][same_employee]
+    matrix = sp.coo_matrix((np.ones(len(sources), dtype='int64'), (sources, targets)),
+                           shape=(len(titles), len(titles))).tocsr() # Duplicate pairs are summed
+    return {'matrix': matrix, 'titles': titles, 'moves': int(matrix.sum())}
+
+def top_transitions(transitions: dict, top_n: int, focus: str = None) -> pd.DataFrame:
+    """The top_n most frequent moves (optionally only those into or out of the focus job), largest first."""
+    matrix, titles = transitions['matrix'], transitions['titles']
+    if focus is not None and focus in titles:
+        code = titles.get_loc(focus)
+        outgoing, incoming = matrix[code].tocoo(), matrix[:, code].tocoo()
+        not_self = incoming.row != code # A move from the focus job to itself is already in the outgoing row
+        rows = np.r_[np.full(outgoing.nnz, code), incoming.row[not_self]]
+        cols = np.r_[outgoing.col, np.full(int(not_self.sum()), code)]
+        counts = np.r_[outgoing.data, incoming.data[not_self]]
+    else:
+        coo = matrix.tocoo()
+        rows, cols, counts = coo.row, coo.col, coo.data
+    if len(counts) > top_n:
+        keep = np.argpartition(-counts, top_n - 1)[:top_n]
+        rows, cols, counts = rows[keep], cols[keep], counts[keep]
+    edges_df = pd.DataFrame({'from_job': titles[rows], 'to_job': titles[cols], 'moves': counts})
+    return edges_df.sort_values(['moves', 'from_job', 'to_job'], ascending=[False, True, True]).reset_index(drop=True)
+
+def plot_career_sankey(edges_df: pd.DataFrame):
+    """Sankey of job moves; source and target jobs are separate columns, so repeated or reverse moves cannot form loops."""
+    if edges_df.empty:
+        return None
+    sources = pd.Index(edges_df['from_job'].unique())
+    targets = pd.Index(edges_df['to_job'].unique())
+    palette = COLORS['pie_colors']
+    fig = go.Figure(go.Sankey(
+        node=dict(label=[*sources, *targets], pad=12, thickness=14,
+                  color=[palette[i % len(palette)] for i in range(len(sources))] + [COLORS['light_purple']] * len(targets)),
+        link=dict(source=sources.get_indexer(edges_df['from_job']), target=len(sources) + targets.get_indexer(edges_df['to_job']),
+                  value=edges_df['moves'], color='rgba(111, 66, 193, 0.25)'),
+    ))
+    fig.update_layout(
+        title="Career Paths: Job-to-Job Moves", height=max(450, 22 * max(len(sources), len(targets))),
+        paper_bgcolor=COLORS['graph_bg'], plot_bgcolor=COLORS['graph_bg'], font_color=COLORS['text']
+    )
+    return fig
+
+# --- Compensation Scenarios ---
+# What-if raises by department and/or job, recomputed from the employee salary array instead of a
+# new Oracle run. Employees carry integer department and job codes, so a scenario is one gather of
+# raise factors plus grouped reductions; the reports below mirror the PL/SQL exports.
+SALARY_BANDS = ['Low ( < $3000 )', 'Mid ( $3000 - $7000 )', 'High ( > $7000 )'] # generate_salary_distribution buckets
+RAISE_LIMITS = (-50.0, 100.0) # Percent
+
+@policy_cache('indexes', spinner="Indexing salaries...")
+def build_compensation_base(_dfs: dict, data_version: str) -> dict:
+    """Per-employee salary array with department and job codes (-1 = unknown), once per data version.
+
+    Department codes point into the shared 'department' dictionary; jobs are coded by job_id.
+    'rows' maps each entry back to its all_employees row.
+    """
+    emp_df = _dfs.get('all_employees', pd.DataFrame())
+    if emp_df.empty or 'salary' not in emp_df.columns:
+        return {'salary': np.array([], dtype='float64')}
+    rows = np.flatnonzero(emp_df['salary'].notna().to_numpy())
+    emp_df = emp_df.iloc[rows]
+    salary = emp_df['salary'].to_numpy(dtype='float64')
+
+    depts_df = _dfs.get('all_departments', pd.DataFrame())
+    dept_codes, departments = np.full(len(salary), -1), pd.Index([])
+    if {'department_id', 'department_name'}.issubset(depts_df.columns) and 'department_id' in emp_df.columns:
+        depts_df = depts_df.drop_duplicates('department_id')
+        dept_names = depts_df.set_index(pd.to_numeric(depts_df['department_id'], errors='coerce'))['department_name']
+        dept_values = dept_names.reindex(pd.to_numeric(emp_df['department_id'], errors='coerce')).astype('category')
+        dept_codes, departments = dept_values.cat.codes.to_numpy(), dept_values.cat.categories
+
+    job_codes, job_ids = pd.factorize(emp_df['job_id'].astype(str) if 'job_id' in emp_df.columns else pd.Series('N/A', index=emp_df.index), sort=True)
+    jobs_df = _dfs.get('job_salary_statistics', pd.DataFrame())
+    job_titles = pd.Index(job_ids)
+    if {'job_id', 'job_title'}.issubset(jobs_df.columns):
+        titles = dict(zip(jobs_df['job_id'].astype(str), jobs_df['job_title'].astype(str)))
+        job_titles = pd.Index([titles.get(job_id, job_id) for job_id in job_ids])
+    return {
+        'salary': salary, 'rows': rows,
+        'dept_codes': dept_codes.astype('int64'), 'departments': departments,
+        'job_codes': job_codes.astype('int64'), 'job_ids': pd.Index(job_ids), 'job_titles': job_titles,
+    }
+
+def parse_raise_rules(rules_df: pd.DataFrame) -> tuple:
+    """({department: pct}, {job title: pct}) from editor rows like ('Department: Sales', 3.0); later rows win."""
+    dept_raises, job_raises = {}, {}
+    for target, pct in zip(rules_df.get('applies_to', []), rules_df.get('raise_pct', [])):
+        if not isinstance(target, str) or pd.isna(pct):
+            continue
+        scope, _, name = target.partition(': ')
+        (dept_raises if scope == 'Department' else job_raises)[name] = float(np.clip(pct, *RAISE_LIMITS))
+    return dept_raises, job_raises
+
+def apply_raises(base: dict, dept_raises: dict, job_raises: dict) -> np.ndarray:
+    """New salaries: department and job raises compound, via one lookup per code array."""
+    # One extra slot so code -1 (unknown) indexes a zero raise
+    dept_pct = np.zeros(len(base['departments']) + 1)
+    for name, pct in dept_raises.items():
+        if name in base['departments']:
+            dept_pct[base['departments'].get_loc(name)] = pct
+    job_pct = np.zeros(len(base['job_ids']) + 1)
+    for title, pct in job_raises.items():
+        job_pct[np.flatnonzero(base['job_titles'] == title)] = pct
+    return base['salary'] * (1 + dept_pct[base['dept_codes']] / 100) * (1 + job_pct[base['job_codes']] / 100)
+
+def job_department_codes(base: dict) -> np.ndarray:
+    """One integer per (job, department) pair, the grouping of generate_job_salary_statistics."""
+    return base['job_codes'] * (len(base['departments']) + 1) + (base['dept_codes'] + 1)
+
+def job_department_labels(base: dict, pair_codes: np.ndarray) -> pd.DataFrame:
+    """job_id, job_title and department (N/A when unknown) for (job, department) pair codes."""
+    job_codes, dept_codes = np.divmod(pair_codes, len(base['departments']) + 1)
+    departments = np.append(np.asarray(base['departments'], dtype=object), 'N/A') # Code 0 wraps to 'N/A'
+    return pd.DataFrame({'job_id': base['job_ids'][job_codes], 'job_title': base['job_titles'][job_codes],
+                         'department': departments[dept_codes - 1]})
+
+def compensation_aggregates(base: dict, salary: np.ndarray) -> dict:
+    """department_salary_analysis, job_salary_statistics and salary_distribution recomputed for a salary array."""
+    known = base['dept_codes'] >= 0
+    by_dept = pd.Series(salary[known]).groupby(base['dept_codes'][known])
+    dept_df = by_dept.agg(['count', 'mean', 'min', 'max'])
+    dept_df = dept_df.join(by_dept.quantile([0.25, 0.5, 0.75]).unstack().set_axis(['p25', 'median', 'p75'], axis=1))
+    dept_df.index = base['departments'][dept_df.index]
+    dept_df = dept_df.rename_axis('department').set_axis(
+        ['employee_count', 'avg_salary', 'min_salary', 'max_salary', 'p25_salary', 'median_salary', 'p75_salary'], axis=1)
+
+    job_df = pd.Series(salary).groupby(job_department_codes(base)).agg(['count', 'mean', 'median', 'min', 'max'])
+    job_df = pd.concat([job_department_labels(base, job_df.index.to_numpy()), job_df.reset_index(drop=True)], axis=1)
+    job_df = job_df.set_axis(['job_id', 'job_title', 'department', 'total_employees', 'avg_salary', 'median_salary', 'min_salary', 'max_salary'], axis=1)
+
+    bands = (salary >= 3000).astype('int64') + (salary > 7000) # BETWEEN 3000 AND 7000 is inclusive
+    distribution_df = pd.DataFrame({'salary_range': SALARY_BANDS, 'employee_count': np.bincount(bands, minlength=len(SALARY_BANDS))})
+    return {
+        'department_salary_analysis': dept_df.reset_index(),
+        'job_salary_statistics': job_df.sort_values('avg_salary', ascending=False).reset_index(drop=True),
+        'salary_distribution': distribution_df,
+        'total_payroll': float(salary.sum()), 'max_salary': float(salary.max()) if len(salary) else float('nan'),
+    }
+
+def simulate_compensation(base: dict, dept_raises: dict, job_raises: dict) -> dict:
+    """Scenario aggregates plus the number of employees whose salary changes."""
+    salary = apply_raises(base, dept_raises, job_raises)
+    scenario = compensation_aggregates(base, salary)
+    scenario['employees_affected'] = int(np.count_nonzero(salary != base['salary']))
+    return scenario
+
+def compare_aggregates(baseline_df: pd.DataFrame, scenario_df: pd.DataFrame, keys: list, value: str) -> pd.DataFrame:
+    """Scenario report with the baseline value and percentage change of one column alongside."""
+    compared = scenario_df.merge(baseline_df[keys + [value]].rename(columns={value: f'baseline_{value}'}), on=keys, how='left')
+    compared[f'{value}_change_%'] = (compared[value] / compared[f'baseline_{value}'] - 1) * 100
+    return compared
+
+def plot_scenario_distribution(baseline_df: pd.DataFrame, scenario_df: pd.DataFrame):
+    combined = pd.concat([baseline_df.assign(scenario='Current'), scenario_df.assign(scenario='Scenario')], ignore_index=True)
+    fig = px.bar(
+        combined, x='salary_range', y='employee_count', color='scenario', barmode='group', text='employee_count',
+        title="Salary Range Distribution: Current vs Scenario",
+        color_discrete_sequence=[COLORS['light_purple'], COLORS['purple']],
+        labels={'salary_range': 'Salary Range', 'employee_count': 'Number of Employees', 'scenario': ''}
+    )
+    fig.update_traces(textposition='outside')
+    fig.update_layout(paper_bgcolor=COLORS['graph_bg'], plot_bgcolor=COLORS['graph_bg'], font_color=COLORS['text'])
+    return fig
+
+# --- Pay Outliers ---
+# Every employee is scored against their (job, department) group, the grouping of
+# job_salary_statistics.csv. One sort by (group, salary) yields each group's mean, standard
+# deviation and quantiles plus every employee's rank, so the page only filters cached arrays.
+OUTLIER_Z_THRESHOLDS = [1.5, 2.0, 2.5, 3.0]
+OUTLIER_SORT_COLUMNS = {
+    'Deviation': 'abs_z_score', 'Z-Score': 'z_score', 'Percentile': 'percentile', 'Salary': 'salary', 'Employee ID': 'employee_id'
+}
+
+def _sorted_group_quantile(sorted_salary: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """Linearly interpolated quantile of every group in a (group, salary)-sorted array."""
+    position = starts + q * (counts - 1)
+    lower = np.floor(position).astype('int64')
+    upper = np.minimum(lower + 1, starts + counts - 1)
+    return sorted_salary[lower] + (position - lower) * (sorted_salary[upper] - sorted_salary[lower])
+
+@policy_cache('indexes', spinner="Scoring salaries...")
+def build_pay_outlier_scores(_dfs: dict, data_version: str) -> dict:
+    """Per-(job, department) salary statistics and every employee's z-score and percentile in their group.
+
+    The standard deviation is the sample one (Oracle STDDEV); groups of one employee or with equal
+    salaries have no z-score. Percentiles are mid-ranks: employees paid less plus half of those paid
+    the same, over the group size.
+    """
+    base = build_compensation_base(_dfs, data_version)
+    salary = base['salary']
+    if len(salary) == 0:
+        return {'groups': pd.DataFrame(), 'scores': pd.DataFrame()}
+    group_codes, groups = np.unique(job_department_codes(base), return_inverse=True)
+    order = np.lexsort((salary, groups))
+    sorted_salary, sorted_groups = salary[order], groups[order]
+
+    counts = np.bincount(groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    mean = np.bincount(groups, weights=salary) / counts
+    deviation = salary - mean[groups]
+    std = np.sqrt(np.bincount(groups, weights=deviation ** 2) / np.maximum(counts - 1, 1))
+    std[(counts < 2) | (std == 0)] = np.nan
+
+    # Runs of equal (group, salary) give each employee the count paid less and the count paid the same
+    new_run = np.concatenate(([True], (np.diff(sorted_groups) != 0) | (np.diff(sorted_salary) != 0)))
+    run_starts = np.flatnonzero(new_run)
+    run_lengths = np.diff(np.append(run_starts, len(order)))
+    run_ids = np.cumsum(new_run) - 1
+    percentile = np.empty(len(order))
+    percentile[order] = ((run_starts[run_ids] - starts[sorted_groups]) + 0.5 * run_lengths[run_ids]) / counts[sorted_groups] * 100
+
+    groups_df = job_department_labels(base, group_codes).assign(
+        employees=counts, avg_salary=mean, std_salary=std,
+        p25_salary=_sorted_group_quantile(sorted_salary, starts, counts, 0.25),
+        median_salary=_sorted_group_quantile(sorted_salary, starts, counts, 0.5),
+        p75_salary=_sorted_group_quantile(sorted_salary, starts, counts, 0.75))
+    z_score = deviation / std[groups]
+    emp_df = _dfs['all_employees']
+    scores_df = pd.DataFrame({
+        'employee_id': emp_df['employee_id'].to_numpy()[base['rows']] if 'employee_id' in emp_df.columns else base['rows'],
+        'group': groups, 'salary': salary, 'group_avg_salary': mean[groups],
+        'z_score': z_score, 'abs_z_score': np.abs(z_score), 'percentile': percentile,
+    })
+    return {'groups': groups_df, 'scores': scores_df}
+
+def query_pay_outliers(outliers: dict, threshold: float, direction: str, sort_column: str, ascending: bool) -> pd.DataFrame:
+    """Scores with |z| >= threshold ('Both'), z >= threshold ('Above') or z <= -threshold ('Below'), sorted."""
+    scores_df = outliers['scores']
+    z_score = scores_df['z_score'].to_numpy()
+    if direction == 'Above':
+        mask = z_score >= threshold
+    elif direction == 'Below':
+        mask = z_score <= -threshold
+    else:
+        mask = np.abs(z_score) >= threshold
+    return scores_df[mask].sort_values(sort_column, ascending=ascending, kind='stable')
+
+def format_pay_outliers(page_df: pd.DataFrame, outliers: dict, emp_df: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+    """Display rows for one page: name, job, department and the scores, rounded."""
+    display_df = page_df.drop(columns=['group', 'abs_z_score']).reset_index(drop=True)
+    if {'first_name', 'last_name'}.issubset(emp_df.columns):
+        names_df = emp_df.iloc[rows[page_df.index.to_numpy()]]
+        display_df.insert(1, 'name', (names_df['first_name'].fillna('').astype(str) + ' ' + names_df['last_name'].fillna('').astype(str)).to_numpy())
+    labels_df = outliers['groups'].iloc[page_df['group'].to_numpy()]
+    position = display_df.columns.get_loc('salary')
+    display_df.insert(position, 'department', labels_df['department'].to_numpy())
+    display_df.insert(position, 'job_title', labels_df['job_title'].to_numpy())
+    return display_df.round({'group_avg_salary': 2, 'z_score': 2, 'percentile': 1})
+
+# --- Location Hierarchy ---
+# location_employee_report.csv is one row per (region, country, city, department). The rollup
+# aggregates it once per data version into a node table at every level, with ids and parents that
+# Plotly's sunburst and treemap drill into on the client, so clicking a region never regroups rows.
+LOCATION_LEVELS = ['region', 'country', 'city', 'department']
+LOCATION_CHART_TYPES = ["Sunburst", "Treemap"]
+
+@policy_cache('aggregates')
+def build_location_rollup(_dfs: dict, data_version: str) -> pd.DataFrame:
+    """Nodes of the region -> country -> city -> department tree with employee count, salary total and weighted average.
+
+    Node ids are the '/'-joined path, so equal names under different parents stay distinct; each
+    node also keeps its own and its ancestors' names in the level columns.
+    """
+    loc_df = _dfs.get('location_employee_report', pd.DataFrame())
+    levels = [level for level in LOCATION_LEVELS if level in loc_df.columns]
+    if loc_df.empty or not levels or not {'employee_count', 'average_salary'}.issubset(loc_df.columns):
+        return pd.DataFrame(columns=['id', 'parent', 'label', 'level', 'employee_count', 'salary_total', 'avg_salary'])
+    counts = pd.to_numeric(loc_df['employee_count'], errors='coerce').fillna(0)
+    leaf_df = pd.DataFrame({level: loc_df[level].astype('string').fillna('Unknown') for level in levels})
+    leaf_df['employee_count'] = counts
+    leaf_df['salary_total'] = counts * pd.to_numeric(loc_df['average_salary'], errors='coerce').fillna(0)
+
+    nodes = []
+    for depth, level in enumerate(levels, start=1):
+        level_df = leaf_df.groupby(levels[:depth], observed=True, sort=True)[['employee_count', 'salary_total']].sum().reset_index()
+        parents = pd.Series('', index=level_df.index, dtype='string')
+        for path_level in levels[:depth - 1]:
+            parents = parents + level_df[path_level] + '/'
+        level_df['id'] = parents + level_df[level]
+        level_df['parent'] = parents.str[:-1]
+        level_df['label'] = level_df[level]
+        level_df['level'] = level
+        nodes.append(level_df)
+    rollup_df = pd.concat(nodes, ignore_index=True)[['id', 'parent', 'label', 'level', *levels, 'employee_count', 'salary_total']]
+    rollup_df['avg_salary'] = (rollup_df['salary_total'] / rollup_df['employee_count'].where(rollup_df['employee_count'] > 0)).round(2)
+    return rollup_df
+
+def plot_location_hierarchy(rollup_df: pd.DataFrame, chart_type: str):
+    """Sunburst or treemap of the rollup, sized by employees and colored by weighted average salary."""
+    nodes_df = rollup_df[rollup_df['employee_count'] > 0]
+    if nodes_df.empty:
+        return None
+    trace = go.Sunburst if chart_type == "Sunburst" else go.Treemap
+    fig = go.Figure(trace(
+        ids=nodes_df['id'], parents=nodes_df['parent'], labels=nodes_df['label'], values=nodes_df['employee_count'],
+        branchvalues='total', customdata=nodes_df[['salary_total', 'avg_salary']].to_numpy(),
+        marker=dict(colors=nodes_df['avg_salary'], colorscale=COLORS['continuous_scale'], showscale=True,
+                    colorbar=dict(title="Avg Salary")),
+        hovertemplate="<b>%{label}</b><br>Employees: %{value:,}<br>Salary total: %{customdata[0]:,.0f}<br>Average salary: %{customdata[1]:,.2f}<extra></extra>",
+    ))
+    fig.update_layout(
+        title="Employees and Salary by Region, Country, City and Department", height=650, margin=dict(t=60, l=10, r=10, b=10),
+        paper_bgcolor=COLORS['graph_bg'], plot_bgcolor=COLORS['graph_bg'], font_color=COLORS['text']
+    )
+    return fig
+
+# --- Salary Bands ---
+# User-defined salary bands counted from sorted salary arrays: overall, and per department as
+# contiguous slices of one (department, salary)-sorted array. Each re-banding is a binary search per
+# edge, O(k log n), instead of a rescan of every salary.
+DEFAULT_BAND_EDGES = "3000, 7000" # The generate_salary_distribution bands
+
+@policy_cache('indexes', spinner="Indexing salaries...")
+def build_salary_band_index(_dfs: dict, data_version: str) -> dict:
+    """Sorted salaries overall and by department, with each department's [start, end) slice."""
+    base = build_compensation_base(_dfs, data_version)
+    if len(base['salary']) == 0:
+        return {'salary': base['salary'], 'departments': pd.Index([])}
+    order = np.lexsort((base['salary'], base['dept_codes']))
+    # Bounds of codes -1 (unknown) .. n-1, so department code c spans dept_bounds[c + 1]:dept_bounds[c + 2]
+    dept_bounds = np.searchsorted(base['dept_codes'][order], np.arange(-1, len(base['departments']) + 1))
+    return {
+        'salary': np.sort(base['salary']),
+        'dept_salary': base['salary'][order], 'dept_bounds': dept_bounds, 'departments': base['departments'],
+    }
+
+def parse_band_edges(text: str) -> list:
+    """Sorted, distinct band edges from comma-separated amounts ('3000, 7000'); ValueError on anything else."""
+    edges = sorted({float(part.replace('$', '').replace('_', '')) for part in text.replace(';', ',').split(',') if part.strip()})
+    if not edges or not np.isfinite(edges).all():
+        raise ValueError("enter at least one finite band edge")
+    return edges
+
+def salary_band_labels(edges: list) -> list:
+    """'< $3,000', '$3,000–<$7,000', ..., '≥ $7,000' for edges [3000, 7000]."""
+    amounts = [f"${edge:,.0f}" if float(edge).is_integer() else f"${edge:,.2f}" for edge in edges]
+    return [f"< {amounts[0]}", *(f"{low}–<{high}" for low, high in zip(amounts, amounts[1:])), f"≥ {amounts[-1]}"]
+
+def count_salary_bands(index: dict, edges: list, department: str = None) -> pd.DataFrame:
+    """Employees per band for the sorted edges, overall or in one department.
+
+    Every band is [lower edge, upper edge): a salary on an edge counts in the band above it, whatever
+    the number of edges. Edges [3000, 7000] match salary_distribution.csv except for salaries of
+    exactly 7000, which the Oracle report counts as Mid.
+    """
+    salary = index['salary']
+    if department is not None:
+        code = index['departments'].get_loc(department)
+        salary = index['dept_salary'][index['dept_bounds'][code + 1]:index['dept_bounds'][code + 2]]
+    counts = np.diff(np.concatenate(([0], np.searchsorted(salary, edges, side='left'), [len(salary)])))
+    return pd.DataFrame({'salary_range': salary_band_labels(edges), 'employee_count': counts})
+
+def plot_salary_bands(bands_df: pd.DataFrame, scope: str):
+    """Bar per band in band order (unlike plot_salary_distribution, which sorts by count)."""
+    fig = px.bar(
+        bands_df, x='salary_range', y='employee_count', text='employee_count',
+        title=f"Custom Salary Bands - {scope}",
+        color='salary_range', color_discrete_sequence=COLORS['pie_colors'],
+        labels={'salary_range': 'Salary Range', 'employee_count': 'Number of Employees'}
+    )
+    fig.update_traces(texttemplate='%{text:,}', textposition='outside')
+    fig.update_layout(
+        paper_bgcolor=COLORS['graph_bg'], plot_bgcolor=COLORS['graph_bg'], font_color=COLORS['text'], showlegend=False,
+        xaxis={'categoryorder': 'array', 'categoryarray': list(bands_df['salary_range'])}
+    )
+    if len(bands_df) > 5:
+        fig.update_layout(xaxis_tickangle=-45)
+    return fig
 
-    st.markdown(f"""
+# --- Org Hierarchy ---
+# The reporting structure from all_employees.manager_id as parent-pointer arrays. Depths come from a
+# level-by-level walk down from the roots; headcount, salary cost and span of control roll up level
+# by level from the deepest, and a pre-order numbering makes every subtree one contiguous slice.
+# Per-manager metrics are then array lookups.
+ORG_DRILL_LIMIT = 200 # Sub-managers offered in the drill-down list, largest teams first
+
+@policy_cache('indexes', spinner="Building the org chart...")
+def build_org_hierarchy(_dfs: dict, data_version: str) -> dict:
+    """Parent, depth, pre-order position and subtree rollups for every employee, once per data version.
+
+    Employees whose manager is missing from the export are roots. Employees in a reporting cycle
+    never reach a root; they get depth -1 and are left out of every rollup. Each step touches every
+    employee a constant number of times, so the build is O(n) after sorting.
+    """
+    emp_df = _dfs.get('all_employees', pd.DataFrame())
+    if emp_df.empty or not {'employee_id', 'manager_id'}.issubset(emp_df.columns):
+        return {'employee_ids': np.array([], dtype='int64')}
+    emp_df = emp_df.drop_duplicates('employee_id')
+    employee_ids = emp_df['employee_id'].to_numpy(dtype='int64')
+    n = len(employee_ids)
+    id_order = np.argsort(employee_ids)
+    sorted_ids = employee_ids[id_order]
+    manager_ids = pd.to_numeric(emp_df['manager_id'], errors='coerce').to_numpy(dtype='float64')
+    lookup = np.searchsorted(sorted_ids, np.nan_to_num(manager_ids, nan=-1).astype('int64')).clip(0, n - 1)
+    parent = id_order[lookup]
+    parent[(employee_ids[parent] != manager_ids) | (parent == np.arange(n))] = -1
+
+    # Children grouped by manager (CSR), so each level is gathered from the one above in O(level size)
+    direct_reports = np.bincount(parent[parent >= 0], minlength=n)
+    children = np.flatnonzero(parent >= 0)
+    children = children[np.argsort(parent[children], kind='stable')]
+    child_start = np.concatenate(([0], np.cumsum(direct_reports)[:-1]))
+    levels = [np.flatnonzero(parent < 0)]
+    while True:
+        counts = direct_reports[levels[-1]]
+        if counts.sum() == 0:
+            break
+        offsets = np.repeat(child_start[levels[-1]] - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+        levels.append(children[offsets + np.arange(counts.sum())])
+    depth = np.full(n, -1, dtype='int64')
+    for level_depth, level in enumerate(levels):
+        depth[level] = level_depth
+
+    # Bottom-up: every level adds its subtree totals to its managers
+    salary = pd.to_numeric(emp_df['salary'], errors='coerce').fillna(0).to_numpy(dtype='float64') if 'salary' in emp_df.columns else np.zeros(n)
+    reached = depth >= 0
+    headcount = reached.astype('int64')
+    cost = np.where(reached, salary, 0.0)
+    levels_below = np.zeros(n, dtype='int64')
+    for level in reversed(levels[1:]):
+        np.add.at(headcount, parent[level], headcount[level])
+        np.add.at(cost, parent[level], cost[level])
+        np.maximum.at(levels_below, parent[level], levels_below[level] + 1)
+
+    # Pre-order: a child starts after its manager and its earlier siblings' subtrees. Each level
+    # lists siblings together, so the offsets are a cumulative sum restarted per manager.
+    position = np.full(n, -1, dtype='int64')
+    roots = levels[0]
+    position[roots] = np.concatenate(([0], np.cumsum(headcount[roots])[:-1]))
+    for level in levels[1:]:
+        sizes = headcount[level]
+        ends = np.cumsum(sizes)
+        group_starts = np.flatnonzero(np.concatenate(([True], parent[level][1:] != parent[level][:-1])))
+        earlier = ends - sizes - np.repeat(ends[group_starts] - sizes[group_starts], np.diff(np.append(group_starts, len(level))))
+        position[level] = position[parent[level]] + 1 + earlier
+    preorder = np.empty(int(headcount[roots].sum()), dtype='int64')
+    preorder[position[reached]] = np.flatnonzero(reached)
+
+    return {
+        'employee_ids': employee_ids, 'sorted_ids': sorted_ids, 'id_order': id_order, 'rows': emp_df.index.to_numpy(),
+        'parent': parent, 'depth': depth, 'direct_reports': direct_reports,
+        'headcount': headcount, 'salary_cost': cost, 'levels_below': levels_below,
+        'children': children, 'child_start': child_start,
+        'position': position, 'preorder': preorder, 'detached': int((~reached).sum()),
+    }
+
+def org_node(org: dict, employee_id: int):
+    """Position of an employee in the org arrays, or None."""
+    sorted_ids = org.get('sorted_ids', [])
+    slot = np.searchsorted(sorted_ids, employee_id)
+    if slot == len(sorted_ids) or sorted_ids[slot] != employee_id:
+        return None
+    return int(org['id_order'][slot])
+
+def org_subtree_metrics(org: dict, node: int) -> dict:
+    """One manager's rollups; O(1) lookups into the precomputed arrays."""
+    return {
+        'employee_id': int(org['employee_ids'][node]), 'depth': int(org['depth'][node]),
+        'direct_reports': int(org['direct_reports'][node]), 'total_reports': int(org['headcount'][node] - 1),
+        'salary_cost': float(org['salary_cost'][node]), 'levels_below': int(org['levels_below'][node]),
+    }
+
+def org_subtree(org: dict, node: int) -> np.ndarray:
+    """Everyone in a manager's subtree (manager first) as org positions: one slice of the pre-order."""
+    start = org['position'][node]
+    return org['preorder'][start:start + org['headcount'][node]] if start >= 0 else np.array([node])
+
+def org_direct_reports(org: dict, node: int) -> np.ndarray:
+    """Org positions of an employee's direct reports: one slice of the children array."""
+    start = org['child_start'][node]
+    return org['children'][start:start + org['direct_reports'][node]]
+
+def org_chain(org: dict, node: int) -> list:
+    """Positions from the root down to the employee's manager; [] for employees outside the tree (depth -1)."""
+    if org['depth'][node] < 0:
+        return []
+    chain = []
+    while org['parent'][node] >= 0:
+        node = int(org['parent'][node])
+        chain.append(node)
+    return chain[::-1]
+
+def org_manager_loop(org: dict, node: int) -> list:
+    """Positions up a detached employee's manager chain, ending with the first one seen twice."""
+    path, seen = [node], {node}
+    while org['parent'][path[-1]] >= 0:
+        path.append(int(org['parent'][path[-1]]))
+        if path[-1] in seen:
+            break
+        seen.add(path[-1])
+    return path
+
+def org_team_table(org: dict, nodes: np.ndarray, emp_df: pd.DataFrame) -> pd.DataFrame:
+    """Name, job and rollups for the given org positions."""
+    people_df = emp_df.loc[org['rows'][nodes]]
+    table_df = pd.DataFrame({'employee_id': org['employee_ids'][nodes]})
+    if {'first_name', 'last_name'}.issubset(people_df.columns):
+        table_df['name'] = (people_df['first_name'].fillna('').astype(str) + ' ' + people_df['last_name'].fillna('').astype(str)).to_numpy()
+    for col in ('job_id', 'salary'):
+        if col in people_df.columns:
+            table_df[col] = people_df[col].to_numpy()
+    return table_df.assign(direct_reports=org['direct_reports'][nodes], total_reports=org['headcount'][nodes] - 1,
+                           salary_cost=org['salary_cost'][nodes], levels_below=org['levels_below'][nodes])
+
+def org_level_summary(org: dict) -> pd.DataFrame:
+    """Employees, managers and average span of control per depth."""
+    reached = org['depth'] >= 0
+    levels_df = pd.DataFrame({'level': org['depth'][reached], 'is_manager': org['direct_reports'][reached] > 0,
+                              'direct_reports': org['direct_reports'][reached]})
+    summary_df = levels_df.groupby('level').agg(employees=('is_manager', 'size'), managers=('is_manager', 'sum'))
+    summary_df['avg_span_of_control'] = (levels_df[levels_df['is_manager']].groupby('level')['direct_reports'].mean()
+                                         .reindex(summary_df.index).round(1))
+    return summary_df.reset_index()
+
+# --- Total Compensation ---
+# Total compensation is salary * (1 + commission_pct), with no commission counted as zero. It is
+# computed once per data version and the salary reports are rebuilt from it in the export formats,
+# so measure-aware pages render them through their usual plot functions and caches, under a
+# separate version key.
+SALARY_MEASURES = ["Base salary", "Total compensation"]
+TOTAL_COMPENSATION_SUFFIX = "+total_compensation"
+MEASURE_PAGES = {"Demographics", "Salary Analysis", "Salary Distribution", "Location Report", "Top Salaries", "Location Hierarchy", "Departments"}
+
+@policy_cache('aggregates', spinner="Computing total compensation...")
+def build_total_compensation_reports(_dfs: dict, data_version: str) -> dict:
+    """Total compensation per all_employees row ('salary') and the salary reports recomputed from it.
+
+    Only the salary array and the small report frames are cached; apply_salary_measure overlays
+    them on the loaded frames. Returns {} when there are no employee salaries (e.g. summary-only mode).
+    """
+    emp_df = _dfs.get('all_employees', pd.DataFrame())
+    if emp_df.empty or 'salary' not in emp_df.columns:
+        return {}
+    commission = emp_df['commission_pct'].fillna(0) if 'commission_pct' in emp_df.columns else 0
+    total = (pd.to_numeric(emp_df['salary'], errors='coerce') * (1 + commission)).round(2).to_numpy(dtype='float64')
+    base = build_compensation_base(_dfs, data_version)
+    base = {**base, 'salary': total[base['rows']]}
+    aggregates = compensation_aggregates(base, base['salary'])
+    dept_avg = aggregates['department_salary_analysis'].set_index('department')['avg_salary'].round(2)
+    dept_avg.index = dept_avg.index.astype(str)
+    reports = {
+        'salary': total, 'department_avg_salary': dept_avg,
+        'department_salary_analysis': aggregates['department_salary_analysis'],
+        'job_salary_statistics': aggregates['job_salary_statistics'],
+        'salary_distribution': aggregates['salary_distribution'],
+    }
+    # generate_job_experience_salary: average per job title, rounded to cents
+    reports['job_avg_salary'] = pd.Series(base['salary']).groupby(base['job_titles'].take(base['job_codes'])).mean().round(2)
+
+    # generate_top_salaries: RANK() of salary within each department, top 3 with ties
+    known = base['dept_codes'] >= 0
+    ranked_df = pd.DataFrame({'dept_code': base['dept_codes'][known], 'salary': base['salary'][known], 'row': base['rows'][known]})
+    ranked_df['rank'] = ranked_df.groupby('dept_code')['salary'].rank(method='min', ascending=False).astype('int64')
+    ranked_df = ranked_df[ranked_df['rank'] <= 3].sort_values(['dept_code', 'rank'], kind='stable')
+    top_df = emp_df.iloc[ranked_df['row'].to_numpy()]
+    reports['top_salaries'] = pd.DataFrame({
+        'department': base['departments'][ranked_df['dept_code'].to_numpy()],
+        'employee_id': top_df['employee_id'].to_numpy() if 'employee_id' in top_df.columns else ranked_df['row'].to_numpy(),
+        'name': (top_df['first_name'].fillna('').astype(str) + ' ' + top_df['last_name'].fillna('').astype(str)).to_numpy()
+                if {'first_name', 'last_name'}.issubset(top_df.columns) else '',
+        'salary': ranked_df['salary'].to_numpy(), 'rank': ranked_df['rank'].to_numpy(),
+    })
+    return reports
+
+def apply_salary_measure(dfs: dict, data_version: str, measure: str) -> tuple:
+    """(dfs, data_version) for a page: unchanged for base salary, else the total compensation reports
+    overlaid and a version key of their own, so page caches never mix the two measures."""
+    if measure != "Total compensation":
+        return dfs, data_version
+    reports = build_total_compensation_reports(dfs, data_version)
+    if not reports:
+        return dfs, data_version
+    overlay = {name: reports[name] for name in ('department_salary_analysis', 'job_salary_statistics', 'salary_distribution', 'top_salaries')}
+    overlay['all_employees'] = dfs['all_employees'].assign(salary=reports['salary']) # Copy-on-write: only the salary column is new
+    loc_df = dfs.get('location_employee_report', pd.DataFrame())
+    if {'department', 'average_salary'}.issubset(loc_df.columns):
+        overlay['location_employee_report'] = loc_df.assign(
+            average_salary=loc_df['department'].astype(str).map(reports['department_avg_salary']).fillna(0).to_numpy())
+    exp_df = dfs.get('job_experience_salary', pd.DataFrame())
+    if {'job_title', 'avg_salary'}.issubset(exp_df.columns):
+        job_avg = exp_df['job_title'].astype(str).map(reports['job_avg_salary'])
+        overlay['job_experience_salary'] = exp_df.assign(avg_salary=job_avg.fillna(exp_df['avg_salary']).to_numpy())
+    return {**dfs, **overlay}, data_version + TOTAL_COMPENSATION_SUFFIX
+
+def measure_roster(dfs: dict, data_version: str, dept_key: str) -> pd.DataFrame:
+    """A dept_<id> roster in the page's salary measure.
+
+    Rosters are not overlaid by apply_salary_measure (rewriting every one costs ~0.2s per rerun at
+    1M employees); under total compensation the shown roster's salaries are looked up by employee_id
+    in the overlaid all_employees instead. Employees missing there keep their roster salary.
+    """
+    roster_df = dfs[dept_key]
+    if not data_version.endswith(TOTAL_COMPENSATION_SUFFIX) or roster_df.empty or 'salary' not in roster_df.columns:
+        return roster_df
+    # The employee_id order does not depend on the measure, so the base version's index is reused
+    row_index = build_employee_row_indexes(dfs, data_version[:-len(TOTAL_COMPENSATION_SUFFIX)]).get('all_employees')
+    if row_index is None or len(row_index['ids']) == 0:
+        return roster_df
+    ids = pd.to_numeric(roster_df['employee_id'], errors='coerce').fillna(-1).to_numpy(dtype='int64')
+    slots = np.searchsorted(row_index['ids'], ids).clip(0, len(row_index['ids']) - 1)
+    found = row_index['ids'][slots] == ids
+    total = dfs['all_employees']['salary'].to_numpy(dtype='float64')[row_index['order'][row_index['offsets'][slots]]]
+    return roster_df.assign(salary=np.where(found, total, roster_df['salary'].to_numpy(dtype='float64')))
+
+# --- Cohort Retention ---
+# Employees are grouped by the year or quarter they were hired. An employee leaves their hired role at
+# the first job_history_analysis end date on or after the hire date, and one without such a date is
+# still in it. Counting employees per (cohort, whole periods in role) and summing from the right gives
+# the share still in role after every N periods, with no loop over employees or cohorts.
+COHORT_FREQUENCIES = {"Yearly": 1, "Quarterly": 4} # Periods per year
+
+def _period_numbers(dates: pd.Series, periods_per_year: int) -> np.ndarray:
+    """Calendar period number of each date: year for yearly, year * 4 + quarter for quarterly."""
+    dates = pd.to_datetime(dates)
+    return (dates.dt.year * periods_per_year + (dates.dt.month - 1) * periods_per_year // 12).to_numpy(dtype='int64')
+
+def _period_label(period: int, periods_per_year: int) -> str:
+    return str(period) if periods_per_year == 1 else f"{period // 4} Q{period % 4 + 1}"
+
+@policy_cache('aggregates', spinner="Computing cohort retention...")
+def build_cohort_retention(_dfs: dict, data_version: str, frequency: str) -> pd.DataFrame:
+    """Cohort x periods-since-hire share (%) of employees still in their hired role, plus cohort sizes.
+
+    Rows are hire cohorts, column N is the share after N periods; cells later than the current
+    period are NaN because that cohort has not reached them yet.
+    """
+    per_year = COHORT_FREQUENCIES[frequency]
+    emp_df = _dfs.get('all_employees', pd.DataFrame())
+    if emp_df.empty or not {'employee_id', 'hire_date'}.issubset(emp_df.columns):
+        return pd.DataFrame()
+    emp_df = emp_df.dropna(subset=['employee_id', 'hire_date']).drop_duplicates('employee_id')
+    if emp_df.empty:
+        return pd.DataFrame()
+    ids = pd.to_numeric(emp_df['employee_id'], errors='coerce').to_numpy(dtype='int64')
+    hire_days = _to_days(emp_df['hire_date'])
+    id_order = np.argsort(ids)
+
+    # First role end on or after hire, per employee: keep matching rows, then the minimum per employee
+    exit_days = np.full(len(ids), OPEN_END, dtype='int64')
+    history_df = _dfs.get('job_history_analysis', pd.DataFrame())
+    if {'employee_id', 'end_date'}.issubset(history_df.columns):
+        history_df = history_df.dropna(subset=['employee_id', 'end_date'])
+        history_ids = pd.to_numeric(history_df['employee_id'], errors='coerce').to_numpy(dtype='int64')
+        slots = np.searchsorted(ids[id_order], history_ids).clip(0, len(ids) - 1)
+        rows = id_order[slots]
+        end_days = _to_days(history_df['end_date'])
+        match = (ids[rows] == history_ids) & (end_days >= hire_days[rows])
+        np.minimum.at(exit_days, rows[match], end_days[match])
+
+    hire_periods = _period_numbers(emp_df['hire_date'], per_year)
+    left = exit_days != OPEN_END
+    exit_periods = np.full(len(ids), np.iinfo(np.int64).max)
+    exit_periods[left] = _period_numbers(pd.Series(pd.to_datetime(exit_days[left], unit='D')), per_year)
+    current_period = int(_period_numbers(pd.Series([pd.Timestamp.today()]), per_year)[0])
+
+    first_cohort = int(hire_periods.min())
+    n_cohorts = max(current_period, int(hire_periods.max())) - first_cohort + 1
+    n_offsets = n_cohorts # No cohort can be followed for longer than the first one
+    cohorts = hire_periods - first_cohort
+    # Leavers counted at the offset they left; stayers past the last column
+    offsets = np.minimum(exit_periods - hire_periods, n_offsets).clip(0)
+    counts = np.bincount(cohorts * (n_offsets + 1) + offsets, minlength=n_cohorts * (n_offsets + 1)).reshape(n_cohorts, n_offsets + 1)
+    still_in_role = counts[:, ::-1].cumsum(axis=1)[:, ::-1][:, :n_offsets] # Offset N: left at N or later, or never
+    sizes = counts.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        retention = still_in_role / sizes[:, None] * 100
+    reached = np.arange(n_cohorts)[:, None] + np.arange(n_offsets)[None, :] <= current_period - first_cohort
+    retention = np.where(reached, retention, np.nan)
+
+    keep = sizes > 0
+    retention_df = pd.DataFrame(retention[keep], columns=pd.RangeIndex(n_offsets, name='periods'),
+                                index=pd.Index([_period_label(first_cohort + c, per_year) for c in np.flatnonzero(keep)], name='cohort'))
+    retention_df = retention_df.loc[:, retention_df.notna().any()]
+    retention_df.insert(0, 'employees', sizes[keep])
+    return retention_df
+
+def plot_cohort_retention(retention_df: pd.DataFrame, frequency: str):
+    if retention_df.empty:
+        return None
+    matrix_df = retention_df.drop(columns='employees')
+    unit = "Years" if frequency == "Yearly" else "Quarters"
+    fig = go.Figure(go.Heatmap(
+        z=matrix_df.to_numpy(), x=list(matrix_df.columns), y=[f"{cohort} ({size:,})" for cohort, size in retention_df['employees'].items()],
+        colorscale=COLORS['continuous_scale'], zmin=0, zmax=100, colorbar=dict(title="% in role"),
+        hovertemplate=f"Cohort %{{y}}<br>{unit} since hire: %{{x}}<br>Still in role: %{{z:.1f}}%<extra></extra>",
+    ))
+    fig.update_layout(
+        title=f"Share of Each Hire Cohort Still in Their Hired Role ({frequency})",
+        xaxis_title=f"{unit} Since Hire", yaxis_title="Hire Cohort (Employees)", yaxis_autorange='reversed',
+        height=max(450, 18 * len(matrix_df)),
+        paper_bgcolor=COLORS['graph_bg'], plot_bgcolor=COLORS['graph_bg'], font_color=COLORS['text']
+    )
+    return fig
+
+# --- Page Rendering ---
+APP_CSS = f"""
     <style>
     /* Main app background */
     .main .block-container {{
@@ -513,180 +2381,744 @@ def main():
         margin-bottom: 20px;
     }}
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+# Chart pages share one layout: (subheader, description, plot function, message when there is no figure)
+CHART_PAGES = {
+    "Demographics": (
+        "Department Salary Metrics",
+        "Compare average, minimum, and maximum salaries across different departments.",
+        plot_employee_demographics, "No data available to display the demographics chart."
+    ),
+    "Salary Analysis": (
+        "Experience vs. Salary Analysis",
+        "Explore the correlation between average years of experience and average salary, with a trendline indicating the general relationship.",
+        plot_salary_analysis, "No data available to display the salary analysis chart."
+    ),
+    "Hiring Trends": (
+        "Annual Hiring Trends",
+        "Visualize the number of new hires per year to understand recruitment patterns over time.",
+        plot_hiring_trends, "No data available to display the hiring trends chart."
+    ),
+    "Turnover Analysis": (
+        "Job Title Turnover Rates",
+        "Identify which job titles experience the highest and lowest employee turnover rates.",
+        plot_turnover_analysis, "No data available to display the turnover analysis chart."
+    ),
+    "Tenure Distribution": (
+        "Employee Tenure Distribution",
+        "See the distribution of employee tenure in years, showing how long employees tend to stay with the company.",
+        plot_tenure_distribution, "No data available to display the tenure distribution chart."
+    ),
+    "Salary Distribution": (
+        "Salary Range Distribution",
+        "Understand the proportion of employees falling into different salary ranges.",
+        plot_salary_distribution, "No data available to display the salary distribution chart."
+    ),
+    "Location Report": (
+        "Employee Distribution and Salary by Location",
+        "Visualize employee counts and average salaries across various company locations or cities.",
+        plot_location_report, "No data available to display the location report chart."
+    ),
+    "Salary Growth": (
+        "Salary Growth Percentage Distribution",
+        "Analyze the distribution of salary growth percentages experienced by employees (e.g., comparing first vs. current salary).",
+        plot_salary_growth, "No data available to display the salary growth chart."
+    ),
+    "Top Salaries": (
+        "Top Employee Salaries",
+        "Display a list of the top-earning employees in the organization.",
+        plot_top_salaries, "No data available to display the top salaries chart."
+    ),
+}
+
+def load_dashboard_data(directory: str) -> tuple:
+    """Returns (dfs, snapshot) for this rerun.
+
+    The snapshot (version, store, load time) is read once, so the whole rerun serves one data
+    version; new exports are loaded by the background refresher (or here, with refresh disabled).
+    """
+    with perf_stage("data_server", cached=True):
+        state = data_server(directory)
+    if REFRESH_INTERVAL_S <= 0:
+        with perf_stage("refresh_data"):
+            refresh_data(state)
+    if enforce_memory_budget():
+        refresh_data(state) # Rebuild the served version in summary-only mode
+    snapshot = state['current']
+    with perf_stage("get_session_views", rows=sum(len(df) for df in snapshot['store'].values())):
+        dfs = get_session_views(snapshot['store'])
+    return dfs, snapshot
+
+def show_figure(fig):
+    """st.plotly_chart, timed as its own stage with the serialized figure size as payload."""
+    payload_bytes = len(fig.to_json()) if perf_active() else None
+    with perf_stage("st.plotly_chart", rows=figure_points(fig) if payload_bytes else None, payload_bytes=payload_bytes):
+        st.plotly_chart(fig, use_container_width=True)
+
+def show_table(df: pd.DataFrame):
+    """st.dataframe, timed as its own stage with the frame's in-memory size as payload."""
+    payload_bytes = int(df.memory_usage(deep=True).sum()) if perf_active() else None
+    with perf_stage("st.dataframe", rows=len(df), payload_bytes=payload_bytes):
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+def build_figure(plot_fn, *args, cache_key: tuple = None):
+    """Calls a plot_* builder as a timed stage named after it.
+
+    With cache_key (the data version plus any other inputs that change the figure) the figure is
+    shared through the 'figures' cache layer; Streamlit only reads it when serializing.
+    """
+    with perf_stage(plot_fn.__name__, cached=cache_key is not None) as record:
+        if cache_key is None:
+            fig = plot_fn(*args)
+        else:
+            fig = cached_call('figures', (plot_fn.__name__, *cache_key), lambda: plot_fn(*args))
+        if fig is not None and record:
+            record['rows'] = figure_points(fig)
+    return fig
+
+def compute_home_metrics(dfs: dict) -> dict:
+    """Key workforce metrics for the Home cards, as display strings keyed by card label."""
+    all_employees_df = dfs.get('all_employees', pd.DataFrame())
+    job_salary_stats_df = dfs.get('job_salary_statistics', pd.DataFrame()) # Assumes a file with this name and max_salary col
+    dept_salary_analysis_df = dfs.get('department_salary_analysis', pd.DataFrame())
+    job_turnover_analysis_df = dfs.get('job_turnover_analysis', pd.DataFrame())
+    tenure_df = dfs.get('tenure_comparison', pd.DataFrame()) # Or 'all_employees' if tenure is calculated from hire_date
+    loc_report_df = dfs.get('location_employee_report', pd.DataFrame())
+
+    total_employees = len(all_employees_df) if not all_employees_df.empty else "N/A"
+
+    max_salary_val = "N/A"
+    if not job_salary_stats_df.empty and 'max_salary' in job_salary_stats_df.columns:
+        max_val = job_salary_stats_df['max_salary'].max()
+        max_salary_val = f"${max_val:,.0f}" if pd.notnull(max_val) else "N/A"
+    elif not all_employees_df.empty and 'salary' in all_employees_df.columns: # Fallback to all_employees salary
+         max_val = all_employees_df['salary'].max()
+         max_salary_val = f"${max_val:,.0f}" if pd.notnull(max_val) else "N/A"
+
+
+    top_dept = "N/A"
+    if not dept_salary_analysis_df.empty and 'department' in dept_salary_analysis_df.columns and 'employee_count' in dept_salary_analysis_df.columns:
+        top_dept_series = dept_salary_analysis_df.sort_values('employee_count', ascending=False)
+        if not top_dept_series.empty: top_dept = top_dept_series.iloc[0]['department']
+    elif not all_employees_df.empty and 'department' in all_employees_df.columns: # Fallback
+        top_dept = all_employees_df['department'].mode()[0] if not all_employees_df['department'].mode().empty else "N/A"
+
+
+    turnover_high_role = "N/A"
+    if not job_turnover_analysis_df.empty and 'job_title' in job_turnover_analysis_df.columns and 'turnover_rate_(%)' in job_turnover_analysis_df.columns:
+        turnover_series = job_turnover_analysis_df.sort_values('turnover_rate_(%)', ascending=False)
+        if not turnover_series.empty: turnover_high_role = turnover_series.iloc[0]['job_title']
+
+    avg_tenure_val = "N/A"
+    if not tenure_df.empty and 'tenure' in tenure_df.columns:
+        mean_tenure = tenure_df['tenure'].mean()
+        avg_tenure_val = f"{mean_tenure:.1f} Yrs" if pd.notnull(mean_tenure) else "N/A"
+    elif not all_employees_df.empty and 'hire_date' in all_employees_df.columns: # Fallback: Calculate tenure if 'hire_date' exists
+        if pd.api.types.is_datetime64_any_dtype(all_employees_df['hire_date']):
+            current_date = pd.to_datetime("today") # Using current date for tenure calculation
+            calculated_tenure = (current_date - all_employees_df['hire_date']).dt.days / 365.25
+            mean_tenure = calculated_tenure.mean()
+            avg_tenure_val = f"{mean_tenure:.1f} Yrs" if pd.notnull(mean_tenure) else "N/A"
+
+
+    top_location = "N/A"
+    if not loc_report_df.empty and 'employee_count' in loc_report_df.columns:
+        loc_col_options = ['city', 'region', 'location_name'] # Check for common location column names
+        loc_col_to_use = next((col for col in loc_col_options if col in loc_report_df.columns), None)
+        if loc_col_to_use:
+            top_loc_series = loc_report_df.sort_values('employee_count', ascending=False)
+            if not top_loc_series.empty: top_location = top_loc_series.iloc[0][loc_col_to_use]
+    elif not all_employees_df.empty : # Fallback
+         loc_col_options = ['city', 'region', 'location']
+         loc_col_to_use = next((col for col in loc_col_options if col in all_employees_df.columns), None)
+         if loc_col_to_use:
+            top_location = all_employees_df[loc_col_to_use].mode()[0] if not all_employees_df[loc_col_to_use].mode().empty else "N/A"
+
+    return {
+        "Total Employees": total_employees,
+        "Largest Department": top_dept,
+        "Average Tenure": avg_tenure_val,
+        "Max Documented Salary": max_salary_val,
+        "Highest Turnover Role": turnover_high_role,
+        "Top Employee Location": top_location,
+    }
+
+def render_home(dfs: dict, data_version: str):
+    if os.path.exists(GIF_PATH):
+        st.markdown('<div class="gif-container",use_column_width="auto">', unsafe_allow_html=True)
+        # Increase the width here for a wider GIF
+        st.image(GIF_PATH, width=650) # Example: Changed from 400 to 650
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    else:
+        st.sidebar.warning(f"HR GIF not found at {GIF_PATH}.")
+
+    st.markdown("### Key Workforce Metrics")
+
+    with perf_stage("compute_home_metrics", cached=True):
+        metrics = list(cached_call('aggregates', ("compute_home_metrics", data_version), lambda: compute_home_metrics(dfs)).items())
+    col1, col2 = st.columns(2)
+    for column, column_metrics in [(col1, metrics[:3]), (col2, metrics[3:])]:
+        with column:
+            for label, value in column_metrics:
+                st.markdown(f'<div class="card"><h3>{value}</h3><p>{label}</p></div>', unsafe_allow_html=True)
+
+@st.fragment
+def render_chart_page(page: str, dfs: dict, data_version: str):
+    """Renders one chart page; widgets added here rerun only this fragment."""
+    subheader, description, plot_fn, empty_message = CHART_PAGES[page]
+    st.subheader(subheader)
+    st.markdown(description)
+    fig = build_figure(plot_fn, dfs, cache_key=(data_version,))
+    if fig: show_figure(fig)
+    else: st.info(empty_message)
+    if page in CHART_PAGE_CONTROLS and not summary_only_mode():
+        CHART_PAGE_CONTROLS[page](dfs, data_version)
+
+def render_salary_bands(dfs: dict, data_version: str):
+    """Salary Distribution controls: re-band raw salaries with any edges, overall or per department."""
+    with perf_stage("build_salary_band_index", cached=True):
+        index = build_salary_band_index(dfs, data_version)
+    if len(index['salary']) == 0:
+        return
+    st.markdown("### Custom Salary Bands")
+    col1, col2 = st.columns([2, 1])
+    edges_text = col1.text_input("Band edges (comma-separated):", value=DEFAULT_BAND_EDGES, key="salary_band_edges")
+    scope = col2.selectbox("Department:", ["All departments", *index['departments']], key="salary_band_department")
+    st.caption("Each band includes its lower edge and stops below its upper edge.")
+    try:
+        edges = parse_band_edges(edges_text)
+    except ValueError:
+        st.warning(f"Could not read band edges from '{edges_text}'. Enter amounts separated by commas, e.g. {DEFAULT_BAND_EDGES}.")
+        return
+    with perf_stage("count_salary_bands", rows=len(edges)):
+        bands_df = count_salary_bands(index, edges, None if scope == "All departments" else scope)
+    fig = build_figure(plot_salary_bands, bands_df, scope, cache_key=(data_version, tuple(edges), scope))
+    if fig: show_figure(fig)
+
+@st.fragment
+def render_departments_page(dfs: dict, data_version: str):
+    st.subheader("Department Drill-Down")
+    st.markdown("Pick a department to browse its roster and salary summary. Search, sorting and paging run on the server, so only the visible page is sent to the browser.")
+    dept_options = get_department_options(dfs)
+    if not dept_options:
+        st.info("No department rosters (dept_*.csv) available to display.")
+    else:
+        dept_label = st.selectbox("Department:", list(dept_options))
+        dept_key = dept_options[dept_label]
+        roster_df = measure_roster(dfs, data_version, dept_key)
+        summary = summarize_department_roster(roster_df)
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown(f'<div class="card"><h3>{summary["headcount"]:,}</h3><p>Headcount</p></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="card"><h3>{format_currency(summary["total_salary"])}</h3><p>Total Payroll</p></div>', unsafe_allow_html=True)
+        with col2:
+            st.markdown(f'<div class="card"><h3>{format_currency(summary["avg_salary"])}</h3><p>Average Salary</p></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="card"><h3>{format_currency(summary["median_salary"])}</h3><p>Median Salary</p></div>', unsafe_allow_html=True)
+        with col3:
+            st.markdown(f'<div class="card"><h3>{format_currency(summary["min_salary"])}</h3><p>Min Salary</p></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="card"><h3>{format_currency(summary["max_salary"])}</h3><p>Max Salary</p></div>', unsafe_allow_html=True)
+
+        if roster_df.empty:
+            st.info(f"{dept_label} has no employees.")
+        else:
+            fig = build_figure(plot_department_salary_histogram, roster_df, dept_label, cache_key=(data_version, dept_key))
+            if fig: show_figure(fig)
+
+            st.markdown("### Roster")
+            ctrl1, ctrl2, ctrl3, ctrl4 = st.columns([3, 2, 1, 1])
+            search = ctrl1.text_input("Search name or employee ID:", key=f"roster_search_{dept_key}")
+            sort_label = ctrl2.selectbox("Sort by:", list(ROSTER_SORT_COLUMNS), key=f"roster_sort_{dept_key}")
+            descending = ctrl3.checkbox("Descending", key=f"roster_desc_{dept_key}")
+            page_size = ctrl4.selectbox("Rows:", ROSTER_PAGE_SIZES, index=1, key=f"roster_size_{dept_key}")
+
+            with perf_stage("query_department_roster", rows=len(roster_df)):
+                view = query_department_roster(roster_df, search, ROSTER_SORT_COLUMNS[sort_label], ascending=not descending)
+            total_pages = max(1, -(-len(view) // page_size))
+            page_number = st.number_input("Page:", min_value=1, max_value=total_pages, value=1, step=1,
+                                          key=f"roster_page_{dept_key}_{search}_{page_size}")
+            page_df, total_rows, total_pages = paginate_frame(view, page_number, page_size)
+
+            display_df = page_df.copy()
+            if 'hire_date' in display_df.columns and pd.api.types.is_datetime64_any_dtype(display_df['hire_date']):
+                display_df['hire_date'] = display_df['hire_date'].dt.strftime('%Y-%m-%d')
+            display_df.columns = [col.replace('_', ' ').title() for col in display_df.columns]
+            show_table(display_df)
+            first_row = (page_number - 1) * page_size + 1 if total_rows else 0
+            st.caption(f"Showing rows {first_row:,}-{min(page_number * page_size, total_rows):,} of {total_rows:,} (page {page_number} of {total_pages}).")
+
+@st.fragment
+def render_employee_search_page(dfs: dict, data_version: str):
+    st.subheader("Find an Employee")
+    st.markdown("Search by name, email or employee ID across all employee reports. Matches come from a prebuilt index that is rebuilt only when the data changes.")
+    with perf_stage("build_employee_search_index", cached=True):
+        search_index = build_employee_search_index(dfs, data_version)
+    query = st.text_input("Name, email or employee ID:", placeholder="e.g. King, SKING or 100")
+    if query.strip():
+        with perf_stage("search_employees", rows=len(search_index['keys'])):
+            matches_df, total_matches = search_employees(search_index, query)
+        if total_matches == 0:
+            st.info(f"No employees match '{query}'.")
+        else:
+            show_table(matches_df.rename(columns=lambda col: col.replace('_', ' ').title()))
+            st.caption(f"Showing {len(matches_df):,} of {total_matches:,} matches.")
+    else:
+        st.caption(f"{len(search_index['directory']):,} employees indexed.")
+
+@st.fragment
+def render_employee_profile_page(dfs: dict, data_version: str):
+    st.subheader("Employee Profile")
+    st.markdown("Look up one employee's rank, quartile, tenure, salary growth and job history in one place.")
+    with perf_stage("build_employee_search_index", cached=True):
+        search_index = build_employee_search_index(dfs, data_version)
+    with perf_stage("build_employee_row_indexes", cached=True):
+        row_indexes = build_employee_row_indexes(dfs, data_version)
+    query = st.text_input("Find employee by name, email or ID:", placeholder="e.g. Kochhar or 101")
+    matches_df, _ = search_employees(search_index, query) if query.strip() else (search_index['directory'].head(SEARCH_RESULT_LIMIT), 0)
+    if matches_df.empty:
+        st.info(f"No employees match '{query}'.")
+    else:
+        labels = [f"{name} ({emp_id})" for name, emp_id in zip(matches_df['name'], matches_df['employee_id'])]
+        choice = st.selectbox("Employee:", range(len(labels)), format_func=lambda i: labels[i])
+        person = matches_df.iloc[choice]
+        employee_id = int(person['employee_id'])
+        with perf_stage("assemble_employee_profile"):
+            profile = assemble_employee_profile(dfs, row_indexes, employee_id)
+
+        details = [f"**ID:** {employee_id}"]
+        for label, value in [('Department', person['department']), ('Job Title', person['job_title']), ('Email', person['email'])]:
+            if pd.notnull(value): details.append(f"**{label}:** {value}")
+        hire_date = _first_value(profile['all_employees'], 'hire_date') or _first_value(profile['tenure_comparison'], 'hire_date')
+        if hire_date is not None: details.append(f"**Hired:** {pd.Timestamp(hire_date).strftime('%Y-%m-%d')}")
+        st.markdown(f"### {person['name']}")
+        st.markdown(" &nbsp;|&nbsp; ".join(details))
+
+        salary = _first_value(profile['all_employees'], 'salary') or _first_value(profile['salary_rank'], 'salary')
+        rank, dense_rank = _first_value(profile['salary_rank'], 'rank'), _first_value(profile['salary_rank'], 'dense_rank')
+        quartile = _first_value(profile['salary_quartiles'], 'quartile')
+        tenure = _first_value(profile['tenure_comparison'], 'tenure')
+        growth = _first_value(profile['salary_growth'], 'growth_%')
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown(f'<div class="card"><h3>{format_currency(salary)}</h3><p>Salary</p></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="card"><h3>{f"{tenure:.0f} Yrs" if tenure is not None else "N/A"}</h3><p>Tenure</p></div>', unsafe_allow_html=True)
+        with col2:
+            rank_text = f"#{rank:.0f}" + (f" (dense #{dense_rank:.0f})" if dense_rank is not None else "") if rank is not None else "N/A"
+            st.markdown(f'<div class="card"><h3>{rank_text}</h3><p>Salary Rank in Department</p></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="card"><h3>{f"{growth:.1f}%" if growth is not None else "N/A"}</h3><p>Salary Growth</p></div>', unsafe_allow_html=True)
+        with col3:
+            st.markdown(f'<div class="card"><h3>{f"Q{quartile:.0f}" if quartile is not None else "N/A"}</h3><p>Department Salary Quartile</p></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="card"><h3>{len(profile["job_history_analysis"])}</h3><p>Previous Roles</p></div>', unsafe_allow_html=True)
+
+        st.markdown("### Job History")
+        history_df = profile['job_history_analysis']
+        if history_df.empty:
+            st.info("No previous roles recorded for this employee.")
+        else:
+            history_df = history_df.drop(columns=['employee_id', 'name', 'job_switch_count'], errors='ignore')
+            if 'start_date' in history_df.columns:
+                history_df = history_df.sort_values('start_date')
+            for col in ['start_date', 'end_date']:
+                if col in history_df.columns and pd.api.types.is_datetime64_any_dtype(history_df[col]):
+                    history_df = history_df.assign(**{col: history_df[col].dt.strftime('%Y-%m-%d')})
+            show_table(history_df.rename(columns=lambda col: col.replace('_', ' ').title()))
+
+@st.fragment
+def render_headcount_page(dfs: dict, data_version: str):
+    st.subheader("Headcount History")
+    st.markdown("See how many employees held a role on any date and who held which job. Counts and lookups use an interval index over past and current roles that is rebuilt only when the data changes. Only employees in the current export are included, so earlier headcounts leave out people who have since left.")
+    with perf_stage("build_interval_index", cached=True):
+        index = build_interval_index(dfs, data_version)
+    intervals_df = index['intervals']
+    if intervals_df.empty:
+        st.info("No job history or hire dates available to build the headcount history.")
+        return
+
+    first_day = pd.Timestamp(int(index['sorted_starts'][0]), unit='D').date()
+    today = pd.Timestamp.today().date()
+    col1, col2 = st.columns([3, 1])
+    date_range = col1.date_input("Date range:", value=(first_day, today), min_value=first_day, max_value=today, key="headcount_range")
+    freq_label = col2.selectbox("Interval:", list(HEADCOUNT_FREQUENCIES), key="headcount_freq")
+    if len(date_range) == 2: # Only the first date is set while a range is being picked
+        with perf_stage("headcount_series"):
+            series_df = headcount_series(index, date_range[0], date_range[1], HEADCOUNT_FREQUENCIES[freq_label])
+        fig = build_figure(plot_headcount_history, series_df, cache_key=(data_version, *date_range, freq_label))
+        if fig: show_figure(fig)
+        else: st.info(f"The selected range contains no {freq_label.lower()} dates.")
+
+    st.markdown("### Who Held Which Job")
+    ctrl1, ctrl2 = st.columns([3, 1])
+    as_of = ctrl1.date_input("As of:", value=today, min_value=first_day, max_value=today, key="headcount_as_of")
+    page_size = ctrl2.selectbox("Rows:", ROSTER_PAGE_SIZES, index=1, key="headcount_page_size")
+    with perf_stage("overlapping_roles", rows=len(intervals_df)):
+        roles_df = overlapping_roles(index, as_of)
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(f'<div class="card"><h3>{headcount_as_of(index, as_of):,}</h3><p>Headcount on {as_of:%Y-%m-%d}</p></div>', unsafe_allow_html=True)
+    with col2:
+        st.markdown(f'<div class="card"><h3>{roles_df["job_title"].nunique():,}</h3><p>Jobs Held</p></div>', unsafe_allow_html=True)
+    if roles_df.empty:
+        st.info(f"Nobody held a role on {as_of:%Y-%m-%d}.")
+        return
+
+    view = roles_df.sort_values(['job_title', 'name'], kind='stable')
+    total_pages = max(1, -(-len(view) // page_size))
+    page_number = st.number_input("Page:", min_value=1, max_value=total_pages, value=1, step=1, key=f"headcount_page_{as_of}_{page_size}")
+    page_df, total_rows, total_pages = paginate_frame(view, page_number, page_size)
+    show_table(format_interval_roles(page_df).rename(columns=lambda col: col.replace('_', ' ').title()))
+    first_row = (page_number - 1) * page_size + 1
+    st.caption(f"Showing rows {first_row:,}-{min(page_number * page_size, total_rows):,} of {total_rows:,} (page {page_number} of {total_pages}).")
+
+@st.fragment
+def render_career_paths_page(dfs: dict, data_version: str):
+    st.subheader("Career Paths")
+    st.markdown("Job-to-job moves across every employee's past and current roles. Only the most frequent moves are drawn so the diagram stays readable; focus on one job to see where its people came from and went next.")
+    with perf_stage("build_transition_matrix", cached=True):
+        transitions = build_transition_matrix(dfs, data_version)
+    if transitions['moves'] == 0:
+        st.info("No job changes recorded in job_history_analysis.csv.")
+        return
+
+    col1, col2 = st.columns([3, 1])
+    focus = col1.selectbox("Focus on job:", ["All jobs", *transitions['titles']], key="career_focus")
+    top_n = col2.selectbox("Top moves:", CAREER_TOP_N, index=1, key="career_top_n")
+    focus = None if focus == "All jobs" else focus
+    with perf_stage("top_transitions", rows=transitions['matrix'].nnz):
+        edges_df = top_transitions(transitions, top_n, focus)
+    if edges_df.empty:
+        st.info(f"Nobody moved into or out of {focus}.")
+        return
+    fig = build_figure(plot_career_sankey, edges_df, cache_key=(data_version, top_n, focus))
+    if fig: show_figure(fig)
+    shown = int(edges_df['moves'].sum())
+    st.caption(f"Showing {len(edges_df):,} of {transitions['matrix'].nnz:,} distinct moves ({shown:,} of {transitions['moves']:,} job changes).")
+    show_table(edges_df.rename(columns=lambda col: col.replace('_', ' ').title()))
+
+@st.fragment
+def render_compensation_page(dfs: dict, data_version: str):
+    st.subheader("Compensation Scenarios")
+    st.markdown("Try raises by department or job and see the department averages and quartiles, job statistics and salary ranges they would produce. Department and job raises compound for employees who match both. Everything is recomputed from current salaries; nothing is written back.")
+    with perf_stage("build_compensation_base", cached=True):
+        base = build_compensation_base(dfs, data_version)
+    if len(base['salary']) == 0:
+        st.info("No salaries available in all_employees.csv.")
+        return
+    baseline = cached_call('aggregates', ("compensation_baseline", data_version), lambda: compensation_aggregates(base, base['salary']))
+
+    targets = [f"Department: {name}" for name in base['departments']] + [f"Job: {title}" for title in sorted(set(base['job_titles']))]
+    defaults = [(target, pct) for target, pct in (("Department: Sales", 3.0), ("Department: IT", 5.0)) if target in targets]
+    rules_df = st.data_editor(
+        pd.DataFrame(defaults, columns=['applies_to', 'raise_pct']), num_rows="dynamic", use_container_width=True, key="compensation_rules",
+        column_config={'applies_to': st.column_config.SelectboxColumn("Applies To", options=targets, required=True),
+                       'raise_pct': st.column_config.NumberColumn("Raise %", min_value=RAISE_LIMITS[0], max_value=RAISE_LIMITS[1], step=0.5, format="%.1f", required=True)})
+    dept_raises, job_raises = parse_raise_rules(rules_df)
+    with perf_stage("simulate_compensation", rows=len(base['salary'])):
+        scenario = simulate_compensation(base, dept_raises, job_raises)
+
+    col1, col2, col3 = st.columns(3)
+    payroll_change = (scenario['total_payroll'] / baseline['total_payroll'] - 1) * 100 if baseline['total_payroll'] else 0.0
+    with col1:
+        st.markdown(f'<div class="card"><h3>{format_currency(scenario["total_payroll"])}</h3><p>Scenario Payroll ({payroll_change:+.1f}%)</p></div>', unsafe_allow_html=True)
+    with col2:
+        st.markdown(f'<div class="card"><h3>{scenario["employees_affected"]:,}</h3><p>Employees Affected</p></div>', unsafe_allow_html=True)
+    with col3:
+        st.markdown(f'<div class="card"><h3>{format_currency(scenario["max_salary"])}</h3><p>Max Salary (now {format_currency(baseline["max_salary"])})</p></div>', unsafe_allow_html=True)
+
+    fig = build_figure(plot_scenario_distribution, baseline['salary_distribution'], scenario['salary_distribution'],
+                       cache_key=(data_version, tuple(sorted(dept_raises.items())), tuple(sorted(job_raises.items()))))
+    if fig: show_figure(fig)
+    st.markdown("### Department Salaries")
+    show_table(compare_aggregates(baseline['department_salary_analysis'], scenario['department_salary_analysis'], ['department'], 'avg_salary')
+               .rename(columns=lambda col: col.replace('_', ' ').title()))
+    st.markdown("### Job Salaries")
+    show_table(compare_aggregates(baseline['job_salary_statistics'], scenario['job_salary_statistics'], ['job_id', 'department'], 'avg_salary')
+               .rename(columns=lambda col: col.replace('_', ' ').title()))
+
+@st.fragment
+def render_pay_outliers_page(dfs: dict, data_version: str):
+    st.subheader("Pay Outliers")
+    st.markdown("Employees paid far from others with the same job in the same department. The z-score is the distance from the group average in standard deviations, and the percentile is the employee's position within the group. Scores are computed once per data version, so filtering and sorting stay fast at any scale.")
+    with perf_stage("build_pay_outlier_scores", cached=True):
+        outliers = build_pay_outlier_scores(dfs, data_version)
+    scores_df = outliers['scores']
+    if scores_df.empty:
+        st.info("No salaries available in all_employees.csv.")
+        return
+
+    ctrl1, ctrl2, ctrl3, ctrl4, ctrl5 = st.columns([1, 1, 2, 1, 1])
+    threshold = ctrl1.selectbox("Min |z|:", OUTLIER_Z_THRESHOLDS, index=1, key="outlier_threshold")
+    direction = ctrl2.selectbox("Paid:", ["Both", "Above", "Below"], key="outlier_direction")
+    sort_label = ctrl3.selectbox("Sort by:", list(OUTLIER_SORT_COLUMNS), key="outlier_sort")
+    descending = ctrl4.checkbox("Descending", value=True, key="outlier_desc")
+    page_size = ctrl5.selectbox("Rows:", ROSTER_PAGE_SIZES, index=1, key="outlier_page_size")
+    with perf_stage("query_pay_outliers", rows=len(scores_df)):
+        view = query_pay_outliers(outliers, threshold, direction, OUTLIER_SORT_COLUMNS[sort_label], ascending=not descending)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(f'<div class="card"><h3>{len(view):,}</h3><p>Outliers (|z| ≥ {threshold})</p></div>', unsafe_allow_html=True)
+    with col2:
+        st.markdown(f'<div class="card"><h3>{len(view) / len(scores_df):.1%}</h3><p>Of {len(scores_df):,} Employees</p></div>', unsafe_allow_html=True)
+    if view.empty:
+        st.info("No employees beyond the selected threshold.")
+    else:
+        total_pages = max(1, -(-len(view) // page_size))
+        page_number = st.number_input("Page:", min_value=1, max_value=total_pages, value=1, step=1,
+                                      key=f"outlier_page_{threshold}_{direction}_{page_size}")
+        page_df, total_rows, total_pages = paginate_frame(view, page_number, page_size)
+        base = build_compensation_base(dfs, data_version)
+        show_table(format_pay_outliers(page_df, outliers, dfs['all_employees'], base['rows']).rename(columns=lambda col: col.replace('_', ' ').title()))
+        first_row = (page_number - 1) * page_size + 1
+        st.caption(f"Showing rows {first_row:,}-{min(page_number * page_size, total_rows):,} of {total_rows:,} (page {page_number} of {total_pages}).")
+
+    with st.expander("Group statistics"):
+        show_table(outliers['groups'].round(2).rename(columns=lambda col: col.replace('_', ' ').title()))
+
+@st.fragment
+def render_location_hierarchy_page(dfs: dict, data_version: str):
+    st.subheader("Location Hierarchy")
+    st.markdown("Employees and salaries rolled up from region to country, city and department. Click a segment to drill into it and the centre to go back up. Averages are weighted by employee count.")
+    with perf_stage("build_location_rollup", cached=True):
+        rollup_df = build_location_rollup(dfs, data_version)
+    if rollup_df.empty:
+        st.info("No data in location_employee_report.csv.")
+        return
+
+    col1, col2 = st.columns([1, 3])
+    chart_type = col1.radio("Chart:", LOCATION_CHART_TYPES, horizontal=True, key="location_chart_type")
+    fig = build_figure(plot_location_hierarchy, rollup_df, chart_type, cache_key=(data_version, chart_type))
+    if fig: show_figure(fig)
+    else: st.info("No employees in location_employee_report.csv.")
+
+    levels = list(rollup_df['level'].unique())
+    level = col2.selectbox("Table level:", levels, format_func=str.title, key="location_level")
+    level_df = rollup_df.loc[rollup_df['level'] == level, [*levels[:levels.index(level) + 1], 'employee_count', 'salary_total', 'avg_salary']]
+    show_table(level_df.rename(columns=lambda col: col.replace('_', ' ').title()))
+
+def _set_org_manager(employee_id: int):
+    st.session_state['org_manager'] = employee_id
+
+def _select_org_manager(widget_key: str):
+    """on_change for the jump box and the drill-down list: show the chosen employee."""
+    value = str(st.session_state.get(widget_key) or '').strip()
+    if value.isdigit():
+        _set_org_manager(int(value))
+
+@st.fragment
+def render_org_explorer_page(dfs: dict, data_version: str):
+    st.subheader("Org Explorer")
+    st.markdown("Walk the reporting structure from all_employees.csv. Each manager shows their direct reports, everyone below them, the salary cost of their organisation and how many levels it spans. These totals are computed once per data version, so moving between managers is instant.")
+    with perf_stage("build_org_hierarchy", cached=True):
+        org = build_org_hierarchy(dfs, data_version)
+    if len(org['employee_ids']) == 0:
+        st.info("No employee_id and manager_id columns in all_employees.csv to build the org chart from.")
+        return
+    emp_df = dfs['all_employees']
+
+    roots = np.flatnonzero(org['depth'] == 0)
+    top = int(org['employee_ids'][roots[np.argmax(org['headcount'][roots])] if len(roots) else 0])
+    st.text_input("Go to employee ID:", key="org_jump", placeholder=f"e.g. {top}", on_change=_select_org_manager, args=("org_jump",))
+    node = org_node(org, st.session_state.get('org_manager', top))
+    if node is None:
+        st.warning(f"No employee with ID '{st.session_state['org_manager']}'; showing the top of the organisation.")
+        node = org_node(org, top)
+
+    chain = org_chain(org, node)
+    if chain:
+        crumbs = st.columns(min(len(chain), 6))
+        for column, ancestor in zip(crumbs, chain[-6:]):
+            label = org_team_table(org, np.array([ancestor]), emp_df).iloc[0]
+            column.button(f"↑ {label.get('name', label['employee_id'])}", key=f"org_up_{ancestor}",
+                          on_click=_set_org_manager, args=(int(label['employee_id']),))
+    metrics = org_subtree_metrics(org, node)
+    person = org_team_table(org, np.array([node]), emp_df).iloc[0]
+    st.markdown(f"### {person.get('name', metrics['employee_id'])} ({metrics['employee_id']})")
+    if metrics['depth'] < 0:
+        loop = " → ".join(str(org['employee_ids'][position]) for position in org_manager_loop(org, node))
+        st.warning(f"This employee's chain of managers loops ({loop}) and never reaches the top of the organisation. "
+                   "They are left out of the org chart and of every team total until MANAGER_ID is fixed.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown(f'<div class="card"><h3>{metrics["direct_reports"]:,}</h3><p>Direct Reports</p></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="card"><h3>{metrics["total_reports"]:,}</h3><p>Total Reports</p></div>', unsafe_allow_html=True)
+        with col2:
+            st.markdown(f'<div class="card"><h3>{format_currency(metrics["salary_cost"])}</h3><p>Organisation Salary Cost</p></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="card"><h3>{metrics["levels_below"]}</h3><p>Levels Below</p></div>', unsafe_allow_html=True)
+        with col3:
+            st.markdown(f'<div class="card"><h3>{metrics["depth"]}</h3><p>Level (0 = top)</p></div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="card"><h3>{len(chain)}</h3><p>Managers Above</p></div>', unsafe_allow_html=True)
+
+        if metrics['direct_reports']:
+            st.markdown("### Direct Reports")
+            reports = org_direct_reports(org, node)
+            reports = reports[np.argsort(-org['headcount'][reports], kind='stable')]
+            sub_managers = reports[org['direct_reports'][reports] > 0][:ORG_DRILL_LIMIT]
+            if len(sub_managers):
+                labels_df = org_team_table(org, sub_managers, emp_df)
+                labels = dict(zip(labels_df['employee_id'], (labels_df['name'] if 'name' in labels_df.columns else labels_df['employee_id'].astype(str))
+                                  + ' (' + labels_df['employee_id'].astype(str) + ') - team of ' + labels_df['total_reports'].map('{:,}'.format)))
+                drill_key = f"org_drill_{metrics['employee_id']}"
+                st.selectbox("Drill into:", list(labels), index=None, format_func=labels.get, key=drill_key,
+                             on_change=_select_org_manager, args=(drill_key,))
+            page_size = st.selectbox("Rows:", ROSTER_PAGE_SIZES, index=1, key="org_page_size")
+            total_pages = max(1, -(-len(reports) // page_size))
+            page_number = st.number_input("Page:", min_value=1, max_value=total_pages, value=1, step=1, key=f"org_page_{metrics['employee_id']}_{page_size}")
+            page_nodes, total_rows, total_pages = paginate_frame(pd.Series(reports), page_number, page_size)
+            show_table(org_team_table(org, page_nodes.to_numpy(), emp_df).rename(columns=lambda col: col.replace('_', ' ').title()))
+            first_row = (page_number - 1) * page_size + 1
+            st.caption(f"Showing rows {first_row:,}-{min(page_number * page_size, total_rows):,} of {total_rows:,} (page {page_number} of {total_pages}).")
+
+    if org['detached']:
+        detached_ids = org['employee_ids'][org['depth'] < 0]
+        shown = ", ".join(str(employee_id) for employee_id in detached_ids[:20])
+        st.warning(f"{org['detached']:,} employees report into a manager cycle and are left out of the org chart and its totals: "
+                   f"{shown}{' …' if len(detached_ids) > 20 else ''}. Enter an ID above to see where the chain loops.")
+    with st.expander("Levels across the organisation"):
+        show_table(org_level_summary(org).rename(columns=lambda col: col.replace('_', ' ').title()))
+
+@st.fragment
+def render_cohort_retention_page(dfs: dict, data_version: str):
+    st.subheader("Cohort Retention")
+    st.markdown("Employees grouped by when they were hired, and the share still in the role they were hired into after each year or quarter. Someone leaves their hired role at their first job history end date after hiring. Only employees in the current export are included, so people who have left the company are not counted.")
+    frequency = st.radio("Cohorts:", list(COHORT_FREQUENCIES), horizontal=True, key="cohort_frequency")
+    with perf_stage("build_cohort_retention", cached=True):
+        retention_df = build_cohort_retention(dfs, data_version, frequency)
+    if retention_df.empty:
+        st.info("No hire dates available in all_employees.csv.")
+        return
+    fig = build_figure(plot_cohort_retention, retention_df, frequency, cache_key=(data_version, frequency))
+    if fig: show_figure(fig)
+    with st.expander("Retention table"):
+        show_table(retention_df.round(1).rename(columns=str).reset_index().rename(columns=lambda col: col.replace('_', ' ').title()))
+
+def render_perf_panel(trace: dict, total_ms: float):
+    """Sidebar table of this rerun's stages (opt-in with ?debug=perf)."""
+    with st.sidebar.expander("Performance (this rerun)", expanded=True):
+        stages_df = pd.DataFrame(trace['stages'], columns=['stage', 'ms', 'rows', 'cache', 'bytes'])
+        stages_df['rows'] = stages_df['rows'].astype('Int64')
+        stages_df['kb'] = stages_df['bytes'].astype('float64') / 1024
+        st.dataframe(stages_df.drop(columns='bytes').rename(columns=str.title), hide_index=True, use_container_width=True,
+                     column_config={'Ms': st.column_config.NumberColumn("ms", format="%.1f"),
+                                    'Kb': st.column_config.NumberColumn("KB", format="%.1f")})
+        st.caption(f"Rerun {trace['run_id']}: {total_ms:,.1f} ms total, {stages_df['ms'].sum():,.1f} ms in {len(stages_df)} timed stages.")
+
+def render_memory_panel(dfs: dict, data_version: str):
+    """Sidebar memory report: every dataset and derived cache, process RSS and budgets (opt-in with ?debug=memory)."""
+    with st.sidebar.expander("Memory", expanded=True):
+        report_df = build_memory_report(dfs, data_version)
+        report_df['rows'] = report_df['rows'].astype('Int64')
+        st.dataframe(report_df.rename(columns=str.title).rename(columns={'Mb': 'MB', 'Budget_Mb': 'Budget MB'}),
+                     hide_index=True, use_container_width=True,
+                     column_config={'MB': st.column_config.NumberColumn(format="%.2f"),
+                                    'Budget MB': st.column_config.NumberColumn(format="%.0f")})
+        rss_mb = process_rss_bytes() / MB
+        budget_text = f" of {MEMORY_BUDGET_MB:,.0f} MB budget" if MEMORY_BUDGET_MB else " (no budget set)"
+        st.caption(f"Process RSS {rss_mb:,.1f} MB{budget_text}; accounted {report_df['mb'].sum():,.1f} MB. "
+                   f"Mode: {'summary-only' if summary_only_mode() else 'full'}.")
+        events = memory_state()['events']
+        if events:
+            st.caption("Recent actions: " + "; ".join(f"{event['time']} {event['action']} (RSS {event['rss_mb']:,.0f} MB)"
+                                                      for event in events[-3:]))
+
+def render_cache_panel():
+    """Sidebar table of every cache layer's policy, size and hit/miss/eviction counters (opt-in with ?debug=cache)."""
+    with st.sidebar.expander("Caches", expanded=True):
+        report_df = build_cache_report()
+        st.dataframe(report_df.rename(columns=lambda col: col.replace('_', ' ').title()).rename(columns={'Mb': 'MB', 'Max Mb': 'Max MB', 'Ttl S': 'TTL s'}),
+                     hide_index=True, use_container_width=True,
+                     column_config={'MB': st.column_config.NumberColumn(format="%.2f"),
+                                    'Hit Rate': st.column_config.NumberColumn(format="%.2f")})
+        events = [(layer, event) for layer, cache in cache_layers().items() for event in cache['events']]
+        if events:
+            st.caption("Recent cache events: " + "; ".join(f"{event['time']} {layer}/{event['key']} {event['reason']} ({event['mb']:,.2f} MB)"
+                                                        for layer, event in sorted(events, key=lambda item: item[1]['time'])[-5:]))
+
+# Extra controls rendered below a chart page's figure, inside the same fragment
+CHART_PAGE_CONTROLS = {
+    "Salary Distribution": render_salary_bands,
+}
+
+# Pages with their own widgets; each renders inside a fragment so its controls only rerun that page
+DATA_PAGES = {
+    "Departments": render_departments_page,
+    "Employee Search": render_employee_search_page,
+    "Employee Profile": render_employee_profile_page,
+    "Headcount History": render_headcount_page,
+    "Career Paths": render_career_paths_page,
+    "Compensation Scenarios": render_compensation_page,
+    "Pay Outliers": render_pay_outliers_page,
+    "Location Hierarchy": render_location_hierarchy_page,
+    "Org Explorer": render_org_explorer_page,
+    "Cohort Retention": render_cohort_retention_page,
+}
+
+
+def main():
+    st.set_page_config(layout="wide", page_title="HR Workforce Dynamics Dashboard")
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
     st.sidebar.title("HR Dashboard Navigation")
-    page_options = ["Home", "Demographics", "Salary Analysis", "Hiring Trends", "Turnover Analysis",
-                    "Tenure Distribution", "Salary Distribution", "Location Report",
-                    "Salary Growth", "Top Salaries"]
+    page_options = ["Home", *CHART_PAGES, *DATA_PAGES]
     page = st.sidebar.radio("Select Visualization:", page_options)
+    debug_panels = set(st.query_params.get(DEBUG_PARAM, "").split(","))
+    show_perf_panel = "perf" in debug_panels
+    trace = start_perf_trace(page, panel=show_perf_panel)
 
     # Load and clean data
     if not os.path.exists(DATA_DIR) or not os.path.isdir(DATA_DIR):
-        st.error(f"Error: Data directory '{DATA_DIR}' not found. Please create it and add your CSV files, or update the DATA_DIR path in the script.")
+        st.error(f"Error: Data directory '{DATA_DIR}' not found. Please create it and add your CSV files, or point HR_DATA_DIR at your export directory.")
         st.info("The dashboard requires CSV files in this directory to function.")
         return # Stop execution if data directory is invalid
 
-    raw_dfs = load_csv_files(DATA_DIR)
-    if not raw_dfs:
+    dfs, snapshot = load_dashboard_data(DATA_DIR)
+    data_version = snapshot['version']
+    if not dfs:
         st.error(f"No CSV files were found or loaded from the directory: '{DATA_DIR}'.")
         st.info("Please ensure your CSV files are present in the specified directory.")
         return
 
-    dfs = {}
-    date_cols_to_clean = ['hire_date', 'start_date', 'end_date', 'date_of_birth', 'exit_date', 'last_promotion_date']
-    for name, df_raw in raw_dfs.items():
-        dfs[name] = clean_dataframe(df_raw, date_cols=date_cols_to_clean)
-
     st.markdown(f"<h1 style='text-align: center; color: {COLORS['title_color']}; margin-bottom: 1rem;'>{page} - HR Workforce Dynamics</h1>", unsafe_allow_html=True)
     
     if page != "Home": # Add a thematic break for non-home pages for visual separation
         st.markdown("---")
 
-    if page == "Home":
-        if os.path.exists(GIF_PATH):
-            st.markdown('<div class="gif-container",use_column_width="auto">', unsafe_allow_html=True)
-            # Increase the width here for a wider GIF
-            st.image(GIF_PATH, width=650) # Example: Changed from 400 to 650
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-        else:
-            st.sidebar.warning(f"HR GIF not found at {GIF_PATH}.")
+    if summary_only_mode():
+        st.sidebar.warning("Summary-only mode: the dashboard reached its memory budget, so only aggregate reports are loaded.")
 
-        st.markdown("### Key Workforce Metrics")
+    page_dfs, page_version = dfs, data_version
+    if page in MEASURE_PAGES and not summary_only_mode():
+        measure = st.sidebar.radio("Salary measure:", SALARY_MEASURES, key="salary_measure",
+                                   help="Total compensation adds commission: salary × (1 + commission_pct).")
+        with perf_stage("apply_salary_measure", cached=True):
+            page_dfs, page_version = apply_salary_measure(dfs, data_version, measure)
 
-        all_employees_df = dfs.get('all_employees', pd.DataFrame())
-        job_salary_stats_df = dfs.get('job_salary_statistics', pd.DataFrame()) # Assumes a file with this name and max_salary col
-        dept_salary_analysis_df = dfs.get('department_salary_analysis', pd.DataFrame())
-        job_turnover_analysis_df = dfs.get('job_turnover_analysis', pd.DataFrame())
-        tenure_df = dfs.get('tenure_comparison', pd.DataFrame()) # Or 'all_employees' if tenure is calculated from hire_date
-        loc_report_df = dfs.get('location_employee_report', pd.DataFrame())
-
-        total_employees = len(all_employees_df) if not all_employees_df.empty else "N/A"
-        
-        max_salary_val = "N/A"
-        if not job_salary_stats_df.empty and 'max_salary' in job_salary_stats_df.columns:
-            max_val = job_salary_stats_df['max_salary'].max()
-            max_salary_val = f"${max_val:,.0f}" if pd.notnull(max_val) else "N/A"
-        elif not all_employees_df.empty and 'salary' in all_employees_df.columns: # Fallback to all_employees salary
-             max_val = all_employees_df['salary'].max()
-             max_salary_val = f"${max_val:,.0f}" if pd.notnull(max_val) else "N/A"
-
-
-        top_dept = "N/A"
-        if not dept_salary_analysis_df.empty and 'department' in dept_salary_analysis_df.columns and 'employee_count' in dept_salary_analysis_df.columns:
-            top_dept_series = dept_salary_analysis_df.sort_values('employee_count', ascending=False)
-            if not top_dept_series.empty: top_dept = top_dept_series.iloc[0]['department']
-        elif not all_employees_df.empty and 'department' in all_employees_df.columns: # Fallback
-            top_dept = all_employees_df['department'].mode()[0] if not all_employees_df['department'].mode().empty else "N/A"
-
-
-        turnover_high_role = "N/A"
-        if not job_turnover_analysis_df.empty and 'job_title' in job_turnover_analysis_df.columns and 'turnover_rate_(%)' in job_turnover_analysis_df.columns:
-            turnover_series = job_turnover_analysis_df.sort_values('turnover_rate_(%)', ascending=False)
-            if not turnover_series.empty: turnover_high_role = turnover_series.iloc[0]['job_title']
-
-        avg_tenure_val = "N/A"
-        if not tenure_df.empty and 'tenure' in tenure_df.columns:
-            mean_tenure = tenure_df['tenure'].mean()
-            avg_tenure_val = f"{mean_tenure:.1f} Yrs" if pd.notnull(mean_tenure) else "N/A"
-        elif not all_employees_df.empty and 'hire_date' in all_employees_df.columns: # Fallback: Calculate tenure if 'hire_date' exists
-            if pd.api.types.is_datetime64_any_dtype(all_employees_df['hire_date']):
-                current_date = pd.to_datetime("today") # Using current date for tenure calculation
-                all_employees_df['calculated_tenure'] = (current_date - all_employees_df['hire_date']).dt.days / 365.25
-                mean_tenure = all_employees_df['calculated_tenure'].mean()
-                avg_tenure_val = f"{mean_tenure:.1f} Yrs" if pd.notnull(mean_tenure) else "N/A"
-
-
-        top_location = "N/A"
-        if not loc_report_df.empty and 'employee_count' in loc_report_df.columns:
-            loc_col_options = ['city', 'region', 'location_name'] # Check for common location column names
-            loc_col_to_use = next((col for col in loc_col_options if col in loc_report_df.columns), None)
-            if loc_col_to_use:
-                top_loc_series = loc_report_df.sort_values('employee_count', ascending=False)
-                if not top_loc_series.empty: top_location = top_loc_series.iloc[0][loc_col_to_use]
-        elif not all_employees_df.empty : # Fallback
-             loc_col_options = ['city', 'region', 'location']
-             loc_col_to_use = next((col for col in loc_col_options if col in all_employees_df.columns), None)
-             if loc_col_to_use:
-                top_location = all_employees_df[loc_col_to_use].mode()[0] if not all_employees_df[loc_col_to_use].mode().empty else "N/A"
-
-
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown(f'<div class="card"><h3>{total_employees}</h3><p>Total Employees</p></div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="card"><h3>{top_dept}</h3><p>Largest Department</p></div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="card"><h3>{avg_tenure_val}</h3><p>Average Tenure</p></div>', unsafe_allow_html=True)
-        with col2:
-            st.markdown(f'<div class="card"><h3>{max_salary_val}</h3><p>Max Documented Salary</p></div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="card"><h3>{turnover_high_role}</h3><p>Highest Turnover Role</p></div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="card"><h3>{top_location}</h3><p>Top Employee Location</p></div>', unsafe_allow_html=True)
-
-    elif page == "Demographics":
-        st.subheader("Department Salary Metrics")
-        st.markdown("Compare average, minimum, and maximum salaries across different departments.")
-        fig = plot_employee_demographics(dfs)
-        if fig: st.plotly_chart(fig, use_container_width=True)
-        else: st.info("No data available to display the demographics chart.")
-
-    elif page == "Salary Analysis":
-        st.subheader("Experience vs. Salary Analysis")
-        st.markdown("Explore the correlation between average years of experience and average salary, with a trendline indicating the general relationship.")
-        fig = plot_salary_analysis(dfs)
-        if fig: st.plotly_chart(fig, use_container_width=True)
-        else: st.info("No data available to display the salary analysis chart.")
-
-    elif page == "Hiring Trends":
-        st.subheader("Annual Hiring Trends")
-        st.markdown("Visualize the number of new hires per year to understand recruitment patterns over time.")
-        fig = plot_hiring_trends(dfs)
-        if fig: st.plotly_chart(fig, use_container_width=True)
-        else: st.info("No data available to display the hiring trends chart.")
-
-    elif page == "Turnover Analysis":
-        st.subheader("Job Title Turnover Rates")
-        st.markdown("Identify which job titles experience the highest and lowest employee turnover rates.")
-        fig = plot_turnover_analysis(dfs)
-        if fig: st.plotly_chart(fig, use_container_width=True)
-        else: st.info("No data available to display the turnover analysis chart.")
-
-    elif page == "Tenure Distribution":
-        st.subheader("Employee Tenure Distribution")
-        st.markdown("See the distribution of employee tenure in years, showing how long employees tend to stay with the company.")
-        fig = plot_tenure_distribution(dfs)
-        if fig: st.plotly_chart(fig, use_container_width=True)
-        else: st.info("No data available to display the tenure distribution chart.")
-
-    elif page == "Salary Distribution":
-        st.subheader("Salary Range Distribution")
-        st.markdown("Understand the proportion of employees falling into different salary ranges.")
-        fig = plot_salary_distribution(dfs)
-        if fig: st.plotly_chart(fig, use_container_width=True)
-        else: st.info("No data available to display the salary distribution chart.")
-
-    elif page == "Location Report":
-        st.subheader("Employee Distribution and Salary by Location")
-        st.markdown("Visualize employee counts and average salaries across various company locations or cities.")
-        fig = plot_location_report(dfs)
-        if fig: st.plotly_chart(fig, use_container_width=True)
-        else: st.info("No data available to display the location report chart.")
-
-    elif page == "Salary Growth":
-        st.subheader("Salary Growth Percentage Distribution")
-        st.markdown("Analyze the distribution of salary growth percentages experienced by employees (e.g., comparing first vs. current salary).")
-        fig = plot_salary_growth(dfs)
-        if fig: st.plotly_chart(fig, use_container_width=True)
-        else: st.info("No data available to display the salary growth chart.")
-
-    elif page == "Top Salaries":
-        st.subheader("Top Employee Salaries")
-        st.markdown("Display a list of the top-earning employees in the organization.")
-        fig = plot_top_salaries(dfs)
-        if fig: st.plotly_chart(fig, use_container_width=True)
-        else: st.info("No data available to display the top salaries chart.")
+    if page == "Home":
+        render_home(dfs, data_version)
+    elif page in CHART_PAGES:
+        render_chart_page(page, page_dfs, page_version)
+    elif summary_only_mode():
+        st.info(f"{page} needs per-employee data, which is not loaded in summary-only mode.")
+    else:
+        DATA_PAGES[page](page_dfs, page_version)
 
     st.sidebar.markdown("---")
-    st.sidebar.info(f"Last data refresh: {pd.Timestamp('today').strftime('%Y-%m-%d %H:%M:%S')}") # Using pd.Timestamp for current time
+    snapshot_label = "" if snapshot['directory'] == DATA_DIR else f", snapshot {os.path.basename(snapshot['directory'])}"
+    st.sidebar.info(f"Last data refresh: {snapshot['loaded_at']:%Y-%m-%d %H:%M:%S} (version {data_version}{snapshot_label})")
+    last_error = data_server(DATA_DIR)['last_error']
+    if last_error:
+        st.sidebar.warning(f"The latest export could not be loaded ({last_error}); showing the previous version.")
+    if trace is not None:
+        total_ms = finish_perf_trace(trace)
+        if show_perf_panel:
+            render_perf_panel(trace, total_ms)
+    if "memory" in debug_panels:
+        render_memory_panel(dfs, data_version)
+    if "cache" in debug_panels:
+        render_cache_panel()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""Benchmark suite for the HR dashboard's data and figure pipeline.
+
+Times and measures peak memory for every stage of a page render outside Streamlit:
+load_csv_files, clean_dataframe, encode_shared_dimensions, each cached index and aggregate builder
+(build_*, uncached) and the default view of every page render_reports.py writes, from the Home KPIs
+to each department's salary histogram. Runs against HR_ALL and/or synthetic datasets at several scales
+(generated once with generate_hr_data.py and reused), writes the results as JSON, and exits
+non-zero when a stage is slower or larger than a stored baseline by more than the threshold.
+
+    python benchmark.py --scales 10000 100000 1000000 --output bench.json
+    python benchmark.py --scales 100000 --baseline bench.json --threshold 0.25
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import app
+import generate_hr_data
+import render_reports
+import snapshots
+
+DEFAULT_WORK_DIR = ".benchmark_data"
+MIN_REGRESSION_SECONDS = 0.005 # Ignore slowdowns smaller than this; sub-millisecond stages are mostly noise
+MIN_REGRESSION_BYTES = 1 << 20
+BUILDER_LAYERS = ('indexes', 'aggregates') # Cache layers whose builders are timed on their own
+BUILDER_ARGS = {'build_cohort_retention': (next(iter(app.COHORT_FREQUENCIES)),)} # Arguments after (dfs, version)
+
+
+def dataset_dirs(scales: list, data_dir: str, work_dir: str, seed: int) -> dict:
+    """Maps scale label -> CSV directory, generating synthetic datasets that are not cached yet."""
+    datasets = {}
+    for scale in scales:
+        if scale == "hr_all":
+            datasets[scale] = snapshots.resolve_snapshot_dir(data_dir)
+            continue
+        n_employees = int(scale)
+        directory = os.path.join(work_dir, f"synthetic_{n_employees}_seed{seed}")
+        if not os.path.isfile(os.path.join(directory, "all_employees.csv")):
+            print(f"Generating {n_employees:,} employees in '{directory}'...")
+            generate_hr_data.generate(n_employees, directory, seed)
+        datasets[scale] = directory
+    return datasets
+
+
+def measure(func, repeat: int) -> tuple:
+    """Runs func `repeat` times for the median wall time, then once more under tracemalloc for peak bytes."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, {'seconds': statistics.median(times), 'min_seconds': min(times), 'peak_bytes': int(peak_bytes)}
+
+
+def benchmark_dataset(directory: str, repeat: int) -> dict:
+    """Per-stage measurements for one dataset, in pipeline order."""
+    stages = {}
+    raw, stages['load_csv_files'] = measure(lambda: app.load_csv_files(directory), repeat)
+    stages['load_csv_files']['rows'] = int(sum(len(df) for df in raw.values()))
+
+    clean = lambda: {name: app.clean_dataframe(df, date_cols=app.DATE_COLS_TO_CLEAN) for name, df in raw.items()}
+    dfs, stages['clean_dataframe'] = measure(clean, repeat)
+    stages['clean_dataframe']['rows'] = stages['load_csv_files']['rows']
+    dfs, stages['encode_shared_dimensions'] = measure(lambda: app.encode_shared_dimensions(dfs), repeat)
+
+    version = render_reports.HEADLESS_VERSION
+    for layer in BUILDER_LAYERS:
+        app.clear_cache_layer(layer) # Every dataset is keyed by the same headless version
+        for name in sorted(app.CACHE_BUILDERS.get(layer, ())):
+            build = getattr(app, name).__wrapped__ # The builder itself, bypassing its cache
+            _, stages[name] = measure(lambda: build(dfs, version, *BUILDER_ARGS.get(name, ())), repeat)
+
+    # Page views read the builders' cached results, so each is timed on its own work only
+    pages = render_reports.list_pages(dfs)
+    for page, detail in pages:
+        render_reports.build_page(dfs, page, detail) # Warm-up: fills the caches; Plotly loads its templates lazily
+    for page, detail in pages:
+        stage = f"page: {page}" if detail is None else f"page: {page}: {detail}"
+        view, stages[stage] = measure(lambda: render_reports.build_page(dfs, page, detail), repeat)
+        if isinstance(view, pd.DataFrame):
+            stages[stage]['table_rows'] = len(view)
+        elif view is not None and hasattr(view, 'to_json'):
+            stages[stage]['figure_bytes'] = len(view.to_json())
+    return stages
+
+
+def run_benchmarks(datasets: dict, repeat: int) -> dict:
+    results = {
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'environment': {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+                        'machine': platform.machine(), 'processor': platform.processor()},
+        'repeat': repeat,
+        'scales': {},
+    }
+    for scale, directory in datasets.items():
+        print(f"Benchmarking '{scale}' ({directory})...")
+        results['scales'][scale] = {'directory': directory, 'stages': benchmark_dataset(directory, repeat)}
+    return results
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list:
+    """Stages whose best time or peak memory grew by more than `threshold` (a fraction) over the baseline.
+
+    Times are compared on the fastest run, which is far less sensitive to scheduler noise than the median.
+    """
+    regressions = []
+    for scale, scale_results in results['scales'].items():
+        baseline_stages = baseline.get('scales', {}).get(scale, {}).get('stages', {})
+        for stage, current in scale_results['stages'].items():
+            previous = baseline_stages.get(stage)
+            if previous is None:
+                continue
+            for metric, floor in (('min_seconds', MIN_REGRESSION_SECONDS), ('peak_bytes', MIN_REGRESSION_BYTES)):
+                limit = previous[metric] * (1 + threshold)
+                if current[metric] > limit and current[metric] - previous[metric] > floor:
+                    regressions.append({'scale': scale, 'stage': stage, 'metric': metric,
+                                        'baseline': previous[metric], 'current': current[metric],
+                                        'ratio': current[metric] / previous[metric] if previous[metric] else float('inf')})
+    return regressions
+
+
+def print_results(results: dict):
+    for scale, scale_results in results['scales'].items():
+        print(f"\n{scale}")
+        print(f"  {'Stage':<44} {'Median (s)':>10} {'Min (s)':>9} {'Peak MiB':>9}")
+        for stage, measured in scale_results['stages'].items():
+            print(f"  {stage:<44} {measured['seconds']:>10.4f} {measured['min_seconds']:>9.4f} {measured['peak_bytes'] / 2**20:>9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the load, clean, index-build and page-view stages of the HR dashboard.")
+    parser.add_argument("--scales", nargs="+", default=["hr_all", "10000", "100000"],
+                        help="'hr_all' for --data-dir and/or synthetic employee counts, e.g. 10000 1000000.")
+    parser.add_argument("--data-dir", default=app.DATA_DIR, help="Directory used for the 'hr_all' scale.")
+    parser.add_argument("--work-dir", default=DEFAULT_WORK_DIR, help="Where generated synthetic datasets are cached.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for the synthetic datasets.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (the median is reported).")
+    parser.add_argument("--output", default="benchmark_results.json", help="File to write the results to.")
+    parser.add_argument("--baseline", help="Results file to compare against; regressions make the exit status 1.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown/growth over the baseline (0.25 = 25%%).")
+    args = parser.parse_args(argv)
+
+    for scale in args.scales:
+        if scale != "hr_all" and not scale.isdigit():
+            parser.error(f"invalid scale '{scale}': use 'hr_all' or an employee count")
+    if args.baseline and not os.path.isfile(args.baseline):
+        parser.error(f"baseline file '{args.baseline}' not found")
+
+    logging.basicConfig(level=logging.ERROR)
+    results = run_benchmarks(dataset_dirs(args.scales, args.data_dir, args.work_dir, args.seed), args.repeat)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = find_regressions(results, baseline, args.threshold)
+        results['baseline'] = {'file': args.baseline, 'threshold': args.threshold, 'regressions': regressions}
+
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+    print_results(results)
+    print(f"\nResults written to '{args.output}'")
+
+    for regression in regressions:
+        print(f"REGRESSION {regression['scale']}/{regression['stage']} {regression['metric']}: "
+              f"{regression['baseline']:.4g} -> {regression['current']:.4g} ({regression['ratio']:.2f}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
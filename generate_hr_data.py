@@ -0,0 +1,589 @@
+"""Deterministic synthetic HR dataset generator.
+
+Writes the same files `hr_analysis_pkg.generate_all_reports` exports to HR_ALL: all_employees.csv
+and all_departments.csv in the raw table layout (DD-MON-YY dates, NULL tokens, Oracle number
+formatting), the dept_<id>.csv partitions, and every derived report computed with the same rules
+as the PL/SQL procedures. The output is reproducible for a given seed and scales to 10M+ employees;
+employee columns are generated as NumPy arrays and written in chunks.
+
+    python generate_hr_data.py --employees 1000000 --out-dir HR_SYNTH --seed 42
+"""
+import argparse
+import math
+import os
+import time
+from decimal import Decimal, ROUND_HALF_UP, localcontext
+
+import numpy as np
+import pandas as pd
+
+FIRST_EMPLOYEE_ID = 100
+PRESIDENT_ID = FIRST_EMPLOYEE_ID
+EMPLOYEES_PER_EXTRA_DEPARTMENT = 50_000 # Above 27 departments, add one per this many employees
+NULL_DEPARTMENT_RATE = 0.001 # Share of employees without a department (like KGRANT in the HR schema)
+JOB_HISTORY_RATE = 0.1 # Share of employees with previous roles in job_history
+ROLE_CHANGE_RATE = 0.15 # Share of employees who have since moved on from the role they were hired into
+WRITE_CHUNK_ROWS = 500_000
+DEFAULT_AS_OF = "2025-06-01" # SYSDATE used for tenure/experience, fixed so output is reproducible
+
+MONTH_ABBREVIATIONS = np.array(['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC'], dtype=object)
+SALARY_RANGE_LABELS = ['Low ( < $3000 )', 'Mid ( $3000 - $7000 )', 'High ( > $7000 )']
+
+# location_id: (city, country, region, phone prefix)
+LOCATIONS = {
+    1400: ('Southlake', 'United States of America', 'Americas', '590.423.'),
+    1500: ('South San Francisco', 'United States of America', 'Americas', '650.121.'),
+    1700: ('Seattle', 'United States of America', 'Americas', '515.123.'),
+    1800: ('Toronto', 'Canada', 'Americas', '515.123.'),
+    2400: ('London', 'United Kingdom', 'Europe', '515.123.'),
+    2500: ('Oxford', 'United Kingdom', 'Europe', '011.44.1344.'),
+    2700: ('Munich', 'Germany', 'Europe', '515.123.'),
+    1000: ('Roma', 'Italy', 'Europe', '011.39.06.'),
+    1200: ('Tokyo', 'Japan', 'Asia', '011.81.3.'),
+    2000: ('Beijing', 'China', 'Asia', '011.86.10.'),
+    2100: ('Bombay', 'India', 'Asia', '011.91.22.'),
+    2200: ('Sydney', 'Australia', 'Asia', '011.61.2.'),
+    2300: ('Singapore', 'Singapore', 'Asia', '011.65.'),
+    2800: ('Sao Paulo', 'Brazil', 'Americas', '011.55.11.'),
+    2900: ('Geneva', 'Switzerland', 'Europe', '011.41.22.'),
+    3100: ('Utrecht', 'Netherlands', 'Europe', '011.31.30.'),
+    3200: ('Mexico City', 'Mexico', 'Americas', '011.52.55.'),
+}
+
+# job_id: (job_title, min_salary, max_salary) as in the HR schema's JOBS table
+JOBS = {
+    'AD_PRES': ('President', 20080, 40000),
+    'AD_VP': ('Administration Vice President', 15000, 30000),
+    'AD_ASST': ('Administration Assistant', 3000, 6000),
+    'FI_MGR': ('Finance Manager', 8200, 16000),
+    'FI_ACCOUNT': ('Accountant', 4200, 9000),
+    'AC_MGR': ('Accounting Manager', 8200, 16000),
+    'AC_ACCOUNT': ('Public Accountant', 4200, 9000),
+    'SA_MAN': ('Sales Manager', 10000, 20080),
+    'SA_REP': ('Sales Representative', 6000, 12008),
+    'PU_MAN': ('Purchasing Manager', 8000, 15000),
+    'PU_CLERK': ('Purchasing Clerk', 2500, 5500),
+    'ST_MAN': ('Stock Manager', 5500, 8500),
+    'ST_CLERK': ('Stock Clerk', 2008, 5000),
+    'SH_CLERK': ('Shipping Clerk', 2500, 5500),
+    'IT_PROG': ('Programmer', 4000, 10000),
+    'MK_MAN': ('Marketing Manager', 9000, 15000),
+    'MK_REP': ('Marketing Representative', 4000, 9000),
+    'HR_REP': ('Human Resources Representative', 4000, 9000),
+    'PR_REP': ('Public Relations Representative', 4500, 10500),
+}
+MANAGER_JOBS = {'AD_PRES', 'AD_VP', 'FI_MGR', 'AC_MGR', 'SA_MAN', 'PU_MAN', 'ST_MAN', 'MK_MAN'}
+COMMISSION_JOBS = {'SA_MAN', 'SA_REP'}
+
+# Job mix per staffed department: (job_id, relative weight)
+JOB_MIX = {
+    'Administration': [('AD_ASST', 1)],
+    'Marketing': [('MK_MAN', 1), ('MK_REP', 6)],
+    'Purchasing': [('PU_MAN', 1), ('PU_CLERK', 5)],
+    'Human Resources': [('HR_REP', 1)],
+    'Shipping': [('ST_MAN', 5), ('SH_CLERK', 20), ('ST_CLERK', 20)],
+    'IT': [('IT_PROG', 1)],
+    'Public Relations': [('PR_REP', 1)],
+    'Sales': [('SA_MAN', 5), ('SA_REP', 29)],
+    'Executive': [('AD_VP', 1)],
+    'Finance': [('FI_MGR', 1), ('FI_ACCOUNT', 5)],
+    'Accounting': [('AC_MGR', 1), ('AC_ACCOUNT', 6)],
+}
+
+# The 27 HR schema departments: (department_id, name, location_id, headcount weight).
+# Departments that are empty in the HR schema stay empty.
+BASE_DEPARTMENTS = [
+    (10, 'Administration', 1700, 1), (20, 'Marketing', 1800, 2), (30, 'Purchasing', 1700, 6),
+    (40, 'Human Resources', 2400, 1), (50, 'Shipping', 1500, 45), (60, 'IT', 1400, 5),
+    (70, 'Public Relations', 2700, 1), (80, 'Sales', 2500, 34), (90, 'Executive', 1700, 0),
+    (100, 'Finance', 1700, 6), (110, 'Accounting', 1700, 2), (120, 'Treasury', 1700, 0),
+    (130, 'Corporate Tax', 1700, 0), (140, 'Control And Credit', 1700, 0), (150, 'Shareholder Services', 1700, 0),
+    (160, 'Benefits', 1700, 0), (170, 'Manufacturing', 1700, 0), (180, 'Construction', 1700, 0),
+    (190, 'Contracting', 1700, 0), (200, 'Operations', 1700, 0), (210, 'IT Support', 1700, 0),
+    (220, 'NOC', 1700, 0), (230, 'IT Helpdesk', 1700, 0), (240, 'Government Sales', 1700, 0),
+    (250, 'Retail Sales', 1700, 0), (260, 'Recruiting', 1700, 0), (270, 'Payroll', 1700, 0),
+]
+
+FIRST_NAMES = np.array([
+    'Steven', 'Neena', 'Lex', 'Alexander', 'Bruce', 'David', 'Valli', 'Diana', 'Nancy', 'Daniel', 'John',
+    'Ismael', 'Jose Manuel', 'Luis', 'Den', 'Shelli', 'Sigal', 'Guy', 'Karen', 'Matthew', 'Adam', 'Payam',
+    'Shanta', 'Kevin', 'Julia', 'Irene', 'James', 'Jason', 'Michael', 'Ki', 'Hazel', 'Renske', 'Stephen',
+    'Joshua', 'Trenna', 'Curtis', 'Randall', 'Peter', 'Alberto', 'Gerald', 'Eleni', 'Christopher', 'Nanette',
+    'Oliver', 'Janette', 'Patrick', 'Allan', 'Lindsey', 'Louise', 'Sarath', 'Clara', 'Danielle', 'Mattea',
+    'Tayler', 'Harrison', 'Lisa', 'Ellen', 'Alyssa', 'Jonathon', 'Jack', 'Kimberely', 'Charles', 'Winston',
+    'Jean', 'Martha', 'Girard', 'Nandita', 'Alexis', 'Anthony', 'Kelly', 'Timothy', 'Sarah', 'Britney',
+    'Samuel', 'Vance', 'Alana', 'Douglas', 'Donald', 'Jennifer', 'Pat', 'Susan', 'Hermann', 'Shelley',
+    'William', 'Amit', 'Sundar', 'Sundita', 'Mozhe', 'Emma', 'Liam', 'Olivia', 'Noah', 'Ava', 'Mia',
+    'Lucas', 'Sofia', 'Ethan', 'Amelia', 'Omar', 'Layla', 'Yusuf', 'Aya', 'Hana', 'Kenji', 'Mei', 'Ravi',
+    'Priya', 'Carlos', 'Lucia', 'Mateo', 'Elena', 'Ivan', 'Olga', 'Pierre', 'Chloe', 'Hans', 'Greta',
+], dtype=object)
+LAST_NAMES = np.array([
+    'King', 'Kochhar', 'De Haan', 'Hunold', 'Ernst', 'Austin', 'Pataballa', 'Lorentz', 'Greenberg', 'Faviet',
+    'Chen', 'Sciarra', 'Urman', 'Popp', 'Raphaely', 'Khoo', 'Baida', 'Tobias', 'Himuro', 'Colmenares',
+    'Weiss', 'Fripp', 'Kaufling', 'Vollman', 'Mourgos', 'Nayer', 'Mikkilineni', 'Landry', 'Markle', 'Bissot',
+    'Atkinson', 'Marlow', 'Olson', 'Mallin', 'Rogers', 'Gee', 'Philtanker', 'Ladwig', 'Stiles', 'Seo', 'Patel',
+    'Rajs', 'Davies', 'Matos', 'Vargas', 'Russell', 'Partners', 'Errazuriz', 'Cambrault', 'Zlotkey', 'Tucker',
+    'Bernstein', 'Hall', 'Olsen', 'Tuvault', 'Ozer', 'Bloom', 'Fox', 'Smith', 'Doran', 'Sewall', 'Vishney',
+    'Greene', 'Marvins', 'Lee', 'Ande', 'Banda', 'Abel', 'Hutton', 'Taylor', 'Livingston', 'Grant', 'Johnson',
+    'Taylor', 'Fleaur', 'Sullivan', 'Geoni', 'Sarchand', 'Bull', 'Dellinger', 'Cabrio', 'Chung', 'Dilly',
+    'Gates', 'Perkins', 'Bell', 'Everett', 'McCain', 'Jones', 'Walsh', 'Feeney', 'OConnell', 'Grant',
+    'Whalen', 'Hartstein', 'Fay', 'Mavris', 'Baer', 'Higgins', 'Gietz', 'Garcia', 'Muller', 'Rossi', 'Silva',
+    'Kim', 'Nguyen', 'Ivanova', 'Tanaka', 'Hassan', 'Ali', 'Dubois', 'Novak', 'Kowalski', 'Jensen', 'Moreau',
+    'Schmidt', 'Lopez', 'Martin', 'Wang', 'Singh', 'Kumar', 'Sato', 'Yamamoto', 'Costa', 'Ferrari', 'Horvat',
+], dtype=object)
+
+
+# --- Formatting helpers (match the PL/SQL exports) ---
+def _pad(values: np.ndarray, width: int) -> np.ndarray:
+    table = np.array([str(v).zfill(width) for v in range(10 ** width)], dtype=object)
+    return table[values]
+
+
+def format_oracle_dates(days: np.ndarray) -> np.ndarray:
+    """datetime64[D] -> 'DD-MON-YY' (the default NLS date format used by export_to_csv)."""
+    dates = pd.DatetimeIndex(days)
+    return _pad(dates.day.to_numpy(), 2) + '-' + MONTH_ABBREVIATIONS[dates.month.to_numpy() - 1] + '-' + _pad(dates.year.to_numpy() % 100, 2)
+
+
+def format_iso_dates(days: np.ndarray) -> np.ndarray:
+    """datetime64[D] -> 'YYYY-MM-DD' (TO_CHAR(..., 'YYYY-MM-DD') in the report procedures)."""
+    dates = pd.DatetimeIndex(days)
+    return _pad(dates.year.to_numpy(), 4) + '-' + _pad(dates.month.to_numpy(), 2) + '-' + _pad(dates.day.to_numpy(), 2)
+
+
+def format_numbers(values, null_token: str = None) -> np.ndarray:
+    """Oracle NUMBER -> VARCHAR2 formatting: no trailing zeros, no leading zero before the point."""
+    values = np.asarray(values, dtype='float64')
+    finite = np.isfinite(values)
+    whole = finite & (values == np.round(values))
+    text = np.full(len(values), '', dtype=object)
+    text[whole] = values[whole].astype('int64').astype(str).astype(object) # Fast path for ids and salaries
+    rest = finite & ~whole
+    text[rest] = [f"{v:.15g}" for v in values[rest]]
+    fractional = (np.abs(values) < 1) & (values != 0)
+    text[fractional] = pd.Series(text[fractional]).str.replace(r'^(-?)0\.', r'\1.', regex=True).to_numpy(dtype=object)
+    if null_token is not None:
+        text[np.isnan(values)] = null_token
+    return text
+
+
+def oracle_division(numerator: int, denominator: int) -> str:
+    """NUMBER division printed with Oracle's 38-digit precision, e.g. 16.66666666666666666666666666666666666667."""
+    if denominator == 0:
+        return '0'
+    with localcontext() as context:
+        context.prec = 80
+        quotient = (Decimal(numerator) / Decimal(denominator)).quantize(Decimal(1).scaleb(-38), rounding=ROUND_HALF_UP)
+        text = format(quotient.normalize(), 'f')
+    return text[1:] if text.startswith('0.') else text
+
+
+def months_between(later: np.ndarray, earlier: np.ndarray) -> np.ndarray:
+    """Oracle MONTHS_BETWEEN for datetime64[D] arrays (31-day month fractions)."""
+    later, earlier = pd.DatetimeIndex(later), pd.DatetimeIndex(earlier)
+    months = (later.year.to_numpy() - earlier.year.to_numpy()) * 12 + (later.month.to_numpy() - earlier.month.to_numpy())
+    day_diff = later.day.to_numpy() - earlier.day.to_numpy()
+    both_month_end = later.is_month_end & earlier.is_month_end
+    return np.where(both_month_end, months, months + day_diff / 31.0)
+
+
+def oracle_round(values: np.ndarray, digits: int) -> np.ndarray:
+    """ROUND(x, digits) with half away from zero, as Oracle does (np.round rounds half to even)."""
+    scale = 10.0 ** digits
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5 + 1e-9) / scale
+
+
+def ntile(group_sizes: np.ndarray, positions: np.ndarray, buckets: int = 4) -> np.ndarray:
+    """NTILE(buckets) for 0-based positions within groups of the given sizes (larger buckets first)."""
+    base, remainder = group_sizes // buckets, group_sizes % buckets
+    big_rows = remainder * (base + 1)
+    safe_base = np.maximum(base, 1)
+    return np.where(positions < big_rows, positions // (base + 1), remainder + (positions - big_rows) // safe_base) + 1
+
+
+def _write_frame(df: pd.DataFrame, path: str, mode: str = 'w', header: bool = True):
+    df.to_csv(path, index=False, mode=mode, header=header, lineterminator='\n')
+
+
+# --- Generation ---
+def build_departments(n_employees: int, rng: np.random.Generator) -> pd.DataFrame:
+    """The 27 HR departments plus extra ones as the workforce grows, with headcount weights."""
+    rows = [(dept_id, name, loc, weight, name if name in JOB_MIX else None) for dept_id, name, loc, weight in BASE_DEPARTMENTS]
+    n_extra = max(0, math.ceil(n_employees / EMPLOYEES_PER_EXTRA_DEPARTMENT) - len(BASE_DEPARTMENTS))
+    staffed = [row for row in rows if row[3] > 0]
+    location_ids = list(LOCATIONS)
+    for i in range(n_extra):
+        template = staffed[rng.integers(len(staffed))]
+        weight = template[3] * rng.lognormal(0.0, 0.5)
+        city = LOCATIONS[location_ids[rng.integers(len(location_ids))]][0]
+        rows.append((280 + 10 * i, f"{template[1]} {city} {i // len(staffed) + 1}",
+                     location_ids[rng.integers(len(location_ids))], weight, template[1]))
+    return pd.DataFrame(rows, columns=['department_id', 'department_name', 'location_id', 'weight', 'template'])
+
+
+def build_employees(n_employees: int, departments: pd.DataFrame, as_of: np.datetime64, rng: np.random.Generator) -> pd.DataFrame:
+    """Vectorized employee table: ids, names, job, salary, commission, hire date, department, manager."""
+    employee_ids = np.arange(FIRST_EMPLOYEE_ID, FIRST_EMPLOYEE_ID + n_employees, dtype='int64')
+    job_ids = np.array(list(JOBS), dtype=object)
+    job_pos = {job: i for i, job in enumerate(job_ids)}
+
+    # Executive: the President plus a few VPs; everyone else is spread by department weight
+    n_exec = min(n_employees, 3 + n_employees // 200_000, 60)
+    exec_pos = int(np.flatnonzero(departments['department_name'].to_numpy() == 'Executive')[0])
+    weights = departments['weight'].to_numpy(dtype='float64').copy()
+    weights[exec_pos] = 0
+    dept_pos = np.empty(n_employees, dtype='int64')
+    dept_pos[:n_exec] = exec_pos
+    dept_pos[n_exec:] = rng.choice(len(departments), size=n_employees - n_exec, p=weights / weights.sum())
+
+    # Jobs drawn from each department's template mix
+    job = np.empty(n_employees, dtype='int64')
+    templates = departments['template'].to_numpy()
+    for pos in np.unique(dept_pos):
+        members = np.flatnonzero(dept_pos == pos)
+        mix = JOB_MIX[templates[pos]]
+        mix_weights = np.array([w for _, w in mix], dtype='float64')
+        job[members] = np.array([job_pos[j] for j, _ in mix])[rng.choice(len(mix), size=len(members), p=mix_weights / mix_weights.sum())]
+    job[0] = job_pos['AD_PRES']
+
+    mins = np.array([JOBS[j][1] for j in job_ids], dtype='float64')[job]
+    maxs = np.array([JOBS[j][2] for j in job_ids], dtype='float64')[job]
+    salary = np.round((mins + (maxs - mins) * rng.beta(2.0, 5.0, n_employees)) / 100) * 100
+    salary[0] = 24000
+
+    commissioned = np.isin(job_ids[job], list(COMMISSION_JOBS))
+    commission = np.where(commissioned, rng.integers(2, 9, n_employees) * 0.05, np.nan)
+
+    # Hire dates skew towards recent years; the HR schema's oldest hire is 2001-01-13
+    first_hire = np.datetime64('2001-01-13')
+    span_days = int((as_of - np.timedelta64(30, 'D') - first_hire).astype(int))
+    hire_date = first_hire + (np.sqrt(rng.random(n_employees)) * span_days).astype('int64').astype('timedelta64[D]')
+    hire_date[0] = np.datetime64('2003-06-17')
+
+    department_id = departments['department_id'].to_numpy(dtype='float64')[dept_pos]
+    n_null = min(max(1, round(n_employees * NULL_DEPARTMENT_RATE)), max(0, n_employees - n_exec))
+    null_rows = rng.choice(np.arange(n_exec, n_employees), size=n_null, replace=False) if n_null else np.array([], dtype='int64')
+    department_id[null_rows] = np.nan
+
+    first = rng.integers(len(FIRST_NAMES), size=n_employees)
+    last = rng.integers(len(LAST_NAMES), size=n_employees)
+    first[0], last[0] = 0, 0 # Steven King
+
+    employees = pd.DataFrame({
+        'employee_id': employee_ids, 'first_idx': first, 'last_idx': last, 'job_id': job_ids[job],
+        'salary': salary, 'commission_pct': commission, 'hire_date': hire_date,
+        'department_id': department_id, 'dept_pos': np.where(np.isnan(department_id), -1, dept_pos),
+    })
+    employees['manager_id'] = assign_managers(employees, rng)
+    return employees
+
+
+def assign_managers(employees: pd.DataFrame, rng: np.random.Generator) -> np.ndarray:
+    """Parent pointers: department heads report to the President, managers to their head, staff to a manager."""
+    manager_id = np.full(len(employees), np.nan)
+    ids = employees['employee_id'].to_numpy()
+    is_manager = employees['job_id'].isin(MANAGER_JOBS).to_numpy()
+    salary = employees['salary'].to_numpy()
+    dept_pos = employees['dept_pos'].to_numpy()
+
+    order = np.argsort(dept_pos, kind='stable')
+    bounds = np.flatnonzero(np.r_[True, dept_pos[order][1:] != dept_pos[order][:-1], True])
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        members = order[start:end]
+        if dept_pos[members[0]] < 0:
+            continue
+        managers = members[is_manager[members]]
+        candidates = managers if len(managers) else members
+        head = candidates[np.argmax(salary[candidates])]
+        staff = members[~is_manager[members]]
+        manager_id[managers] = ids[head]
+        manager_id[staff] = ids[managers[rng.integers(len(managers), size=len(staff))]] if len(managers) else ids[head]
+        manager_id[head] = PRESIDENT_ID
+
+    no_department = np.flatnonzero(dept_pos < 0)
+    all_managers = np.flatnonzero(is_manager)
+    manager_id[no_department] = ids[all_managers[rng.integers(len(all_managers), size=len(no_department))]] if len(all_managers) else PRESIDENT_ID
+    manager_id[0] = np.nan # The President
+    return manager_id
+
+
+def build_job_history(employees: pd.DataFrame, as_of: np.datetime64, rng: np.random.Generator) -> pd.DataFrame:
+    """Past roles for JOB_HISTORY_RATE of employees and the hired-into role for ROLE_CHANGE_RATE of them.
+
+    Earlier roles (one or two) end the day before hire. A role change after hire keeps the hire date,
+    like the HR schema: the hired-into role runs from hire_date to a day at least 90 days later and
+    before as_of, and the employee's current job starts the day after.
+    """
+    hire_dates = employees['hire_date'].to_numpy().astype('datetime64[D]')
+    movers = np.flatnonzero(rng.random(len(employees)) < JOB_HISTORY_RATE)
+    movers = movers[movers != 0]
+    n_roles = rng.integers(1, 3, size=len(movers))
+    rows = np.repeat(movers, n_roles)
+
+    durations = rng.integers(180, 2200, size=len(rows))
+    # Roles are listed oldest first; each ends the day before the next one (or the hire date) starts
+    later_days = pd.Series(durations + 1)[::-1].groupby(rows[::-1]).cumsum()[::-1].to_numpy() - (durations + 1)
+    end = hire_dates[rows] - (later_days + 1).astype('timedelta64[D]')
+    start = end - durations.astype('timedelta64[D]')
+
+    days_employed = (as_of - hire_dates).astype('int64')
+    changers = np.flatnonzero((rng.random(len(employees)) < ROLE_CHANGE_RATE) & (days_employed > 91))
+    changers = changers[changers != 0]
+    changed_end = hire_dates[changers] + (90 + (rng.random(len(changers)) * (days_employed[changers] - 91)).astype('int64')).astype('timedelta64[D]')
+    rows = np.concatenate([rows, changers])
+    start = np.concatenate([start, hire_dates[changers]])
+    end = np.concatenate([end, changed_end])
+
+    job_ids = np.array(list(JOBS), dtype=object)
+    history_jobs = job_ids[rng.integers(1, len(job_ids), size=len(rows))] # Anything but AD_PRES
+    return pd.DataFrame({
+        'employee_id': employees['employee_id'].to_numpy()[rows], 'row': rows, 'job_id': history_jobs,
+        'start_date': start.astype('datetime64[D]'), 'end_date': end.astype('datetime64[D]'),
+        'job_switch_count': np.bincount(rows, minlength=len(employees))[rows],
+    }).sort_values(['employee_id', 'start_date'], kind='stable').reset_index(drop=True)
+
+
+def employee_names(employees: pd.DataFrame, rows=slice(None)) -> np.ndarray:
+    return FIRST_NAMES[employees['first_idx'].to_numpy()[rows]] + ' ' + LAST_NAMES[employees['last_idx'].to_numpy()[rows]]
+
+
+def employee_emails(employees: pd.DataFrame) -> np.ndarray:
+    """HR-style emails (first initial + last name, 8 chars); repeats get the employee id appended."""
+    base = pd.Series(
+        (pd.Series(FIRST_NAMES).str[0].str.upper().to_numpy()[employees['first_idx'].to_numpy()]
+         + pd.Series(LAST_NAMES).str.replace(' ', '').str.upper().to_numpy()[employees['last_idx'].to_numpy()])
+    ).str[:8]
+    repeated = base.duplicated(keep='first').to_numpy()
+    emails = base.to_numpy(dtype=object)
+    emails[repeated] = emails[repeated] + employees['employee_id'].to_numpy()[repeated].astype(str).astype(object)
+    return emails
+
+
+def write_all_employees(employees: pd.DataFrame, departments: pd.DataFrame, out_dir: str, rng: np.random.Generator):
+    path = os.path.join(out_dir, 'all_employees.csv')
+    emails = employee_emails(employees)
+    location_ids = departments['location_id'].to_numpy()
+    phone_prefix = np.array([LOCATIONS[loc][3] for loc in location_ids] + ['515.123.'], dtype=object)
+    phone_suffix = _pad(rng.integers(0, 10000, size=len(employees)), 4)
+    for chunk_start in range(0, len(employees), WRITE_CHUNK_ROWS):
+        rows = slice(chunk_start, chunk_start + WRITE_CHUNK_ROWS)
+        chunk = employees.iloc[rows]
+        _write_frame(pd.DataFrame({
+            'EMPLOYEE_ID': chunk['employee_id'].to_numpy(),
+            'FIRST_NAME': FIRST_NAMES[chunk['first_idx'].to_numpy()],
+            'LAST_NAME': LAST_NAMES[chunk['last_idx'].to_numpy()],
+            'EMAIL': emails[rows],
+            'PHONE_NUMBER': phone_prefix[chunk['dept_pos'].to_numpy()] + phone_suffix[rows],
+            'HIRE_DATE': format_oracle_dates(chunk['hire_date'].to_numpy()),
+            'JOB_ID': chunk['job_id'].to_numpy(),
+            'SALARY': format_numbers(chunk['salary'].to_numpy()),
+            'COMMISSION_PCT': format_numbers(chunk['commission_pct'].to_numpy(), 'NULL'),
+            'MANAGER_ID': format_numbers(chunk['manager_id'].to_numpy(), 'NULL'),
+            'DEPARTMENT_ID': format_numbers(chunk['department_id'].to_numpy(), 'NULL'),
+        }), path, mode='w' if chunk_start == 0 else 'a', header=chunk_start == 0)
+
+
+def write_departments(employees: pd.DataFrame, departments: pd.DataFrame, out_dir: str):
+    """all_departments.csv (manager = department head) and the dept_<id>.csv partitions."""
+    staffed = employees[employees['dept_pos'] >= 0]
+    heads = staffed[staffed['manager_id'] == PRESIDENT_ID].groupby('dept_pos')['employee_id'].first()
+    heads.loc[int(np.flatnonzero(departments['department_name'].to_numpy() == 'Executive')[0])] = PRESIDENT_ID
+    manager_ids = heads.reindex(np.arange(len(departments))).to_numpy(dtype='float64')
+    _write_frame(pd.DataFrame({
+        'DEPARTMENT_ID': departments['department_id'], 'DEPARTMENT_NAME': departments['department_name'],
+        'MANAGER_ID': format_numbers(manager_ids, 'NULL'), 'LOCATION_ID': departments['location_id'],
+    }), os.path.join(out_dir, 'all_departments.csv'))
+
+    order = np.argsort(staffed['dept_pos'].to_numpy(), kind='stable')
+    staffed = staffed.iloc[order]
+    dept_pos = staffed['dept_pos'].to_numpy()
+    for pos, (dept_id, dept_name) in enumerate(zip(departments['department_id'], departments['department_name'])):
+        lo, hi = np.searchsorted(dept_pos, pos, 'left'), np.searchsorted(dept_pos, pos, 'right')
+        members = staffed.iloc[lo:hi]
+        _write_frame(pd.DataFrame({
+            'Employee ID': members['employee_id'].to_numpy(), 'Name': employee_names(members),
+            'Salary': format_numbers(members['salary'].to_numpy()),
+            'Hire Date': format_iso_dates(members['hire_date'].to_numpy()),
+            'Department': np.full(len(members), dept_name, dtype=object),
+        }), os.path.join(out_dir, f'dept_{dept_id}.csv'))
+
+
+def write_department_reports(employees: pd.DataFrame, departments: pd.DataFrame, as_of: np.datetime64, out_dir: str):
+    """salary_rank, salary_quartiles, tenure_comparison, top_salaries and salary_growth (inner join on department)."""
+    staffed = employees[employees['dept_pos'] >= 0]
+    dept_names = departments['department_name'].to_numpy(dtype=object)
+
+    # Ranks: partition by department, order by salary desc
+    by_salary = staffed.sort_values(['dept_pos', 'salary', 'employee_id'], ascending=[True, False, True], kind='stable')
+    grouped = by_salary.groupby('dept_pos')['salary']
+    rank = grouped.rank(method='min', ascending=False).to_numpy(dtype='int64')
+    dense_rank = grouped.rank(method='dense', ascending=False).to_numpy(dtype='int64')
+    common = {
+        'Department': dept_names[by_salary['dept_pos'].to_numpy()], 'Employee ID': by_salary['employee_id'].to_numpy(),
+        'Name': employee_names(by_salary), 'Salary': format_numbers(by_salary['salary'].to_numpy()),
+    }
+    _write_frame(pd.DataFrame({**common, 'Rank': rank, 'Dense Rank': dense_rank}), os.path.join(out_dir, 'salary_rank.csv'))
+    top = rank <= 3
+    _write_frame(pd.DataFrame({key: values[top] for key, values in common.items()} | {'Rank': rank[top]}),
+                 os.path.join(out_dir, 'top_salaries.csv'))
+
+    # Quartiles: NTILE(4) ordered by salary asc
+    by_salary_asc = staffed.sort_values(['dept_pos', 'salary', 'employee_id'], kind='stable')
+    dept_pos = by_salary_asc['dept_pos'].to_numpy()
+    sizes = by_salary_asc.groupby('dept_pos')['salary'].transform('size').to_numpy()
+    positions = by_salary_asc.groupby('dept_pos').cumcount().to_numpy()
+    _write_frame(pd.DataFrame({
+        'Department': dept_names[dept_pos], 'Employee ID': by_salary_asc['employee_id'].to_numpy(),
+        'Name': employee_names(by_salary_asc), 'Salary': format_numbers(by_salary_asc['salary'].to_numpy()),
+        'Quartile': ntile(sizes, positions),
+    }), os.path.join(out_dir, 'salary_quartiles.csv'))
+
+    # Tenure and growth: ordered by hire date within the department
+    by_hire = staffed.sort_values(['dept_pos', 'hire_date', 'employee_id'], kind='stable')
+    dept_pos = by_hire['dept_pos'].to_numpy()
+    hire_dates = by_hire['hire_date'].to_numpy()
+    tenure = np.trunc(months_between(np.full(len(by_hire), as_of), hire_dates) / 12).astype('int64')
+    tenure_series = pd.Series(tenure)
+    same_dept = pd.Series(dept_pos)
+    prev_tenure = tenure_series.shift(1).where(same_dept.shift(1) == same_dept, 0).to_numpy(dtype='int64')
+    next_tenure = tenure_series.shift(-1).where(same_dept.shift(-1) == same_dept, 0).to_numpy(dtype='int64')
+    names, iso_hire = employee_names(by_hire), format_iso_dates(hire_dates)
+    _write_frame(pd.DataFrame({
+        'Department': dept_names[dept_pos], 'Employee ID': by_hire['employee_id'].to_numpy(), 'Name': names,
+        'Hire Date': iso_hire, 'Tenure': tenure, 'Prev Tenure': prev_tenure, 'Next Tenure': next_tenure,
+    }), os.path.join(out_dir, 'tenure_comparison.csv'))
+
+    salaries = by_hire['salary'].to_numpy()
+    first_salary = by_hire.groupby('dept_pos')['salary'].transform('first').to_numpy()
+    growth = oracle_round((salaries - first_salary) / first_salary * 100, 2)
+    _write_frame(pd.DataFrame({
+        'Department': dept_names[dept_pos], 'Employee ID': by_hire['employee_id'].to_numpy(), 'Name': names,
+        'Hire Date': iso_hire, 'Salary': format_numbers(salaries), 'First Salary': format_numbers(first_salary),
+        'Growth %': format_numbers(growth),
+    }), os.path.join(out_dir, 'salary_growth.csv'))
+
+
+def write_job_reports(employees: pd.DataFrame, departments: pd.DataFrame, history: pd.DataFrame, as_of: np.datetime64, out_dir: str):
+    """job_history_analysis, job_salary_statistics, job_experience_salary, top_bottom_jobs, job_turnover_analysis."""
+    titles = {job: spec[0] for job, spec in JOBS.items()}
+    hist_titles = history['job_id'].map(titles).to_numpy(dtype=object)
+    tenure_months = oracle_round(months_between(history['end_date'].to_numpy(), history['start_date'].to_numpy()), 1)
+    _write_frame(pd.DataFrame({
+        'Employee ID': history['employee_id'].to_numpy(), 'Name': employee_names(employees, history['row'].to_numpy()),
+        'Job Title': hist_titles, 'Start Date': format_iso_dates(history['start_date'].to_numpy()),
+        'End Date': format_iso_dates(history['end_date'].to_numpy()), 'Tenure (Months)': format_numbers(tenure_months),
+        'Job Switch Count': history['job_switch_count'].to_numpy(),
+    }), os.path.join(out_dir, 'job_history_analysis.csv'))
+
+    dept_names = np.r_[departments['department_name'].to_numpy(dtype=object), np.array(['N/A'], dtype=object)]
+    stats = employees.assign(department=dept_names[employees['dept_pos'].to_numpy()]) \
+                     .groupby(['job_id', 'department'], sort=False)['salary'] \
+                     .agg(['size', 'mean', 'median', 'min', 'max']).reset_index()
+    stats['mean'] = oracle_round(stats['mean'].to_numpy(), 2)
+    stats = stats.sort_values('mean', ascending=False, kind='stable')
+    _write_frame(pd.DataFrame({
+        'Job ID': stats['job_id'].to_numpy(), 'Job Title': stats['job_id'].map(titles).to_numpy(),
+        'Department': stats['department'].to_numpy(), 'Total Employees': stats['size'].to_numpy(),
+        'Avg Salary': format_numbers(stats['mean']), 'Median Salary': format_numbers(stats['median']),
+        'Min Salary': format_numbers(stats['min']), 'Max Salary': format_numbers(stats['max']),
+    }), os.path.join(out_dir, 'job_salary_statistics.csv'))
+
+    experience_years = months_between(np.full(len(employees), as_of), employees['hire_date'].to_numpy()) / 12
+    by_title = employees.assign(job_title=employees['job_id'].map(titles), experience=experience_years) \
+                        .groupby('job_title', sort=False).agg(avg_salary=('salary', 'mean'), avg_experience=('experience', 'mean'))
+    avg_salary = oracle_round(by_title['avg_salary'].to_numpy(), 2)
+    _write_frame(pd.DataFrame({
+        'Job Title': by_title.index.to_numpy(), 'Avg Salary': format_numbers(avg_salary),
+        'Avg Experience (Years)': format_numbers(oracle_round(by_title['avg_experience'].to_numpy(), 1)),
+    }), os.path.join(out_dir, 'job_experience_salary.csv'))
+
+    ranked = pd.DataFrame({'Job Title': by_title.index.to_numpy(), 'avg': avg_salary})
+    top_bottom = pd.concat([ranked.sort_values('avg', ascending=False, kind='stable').head(5),
+                            ranked.sort_values('avg', ascending=True, kind='stable').head(5)])
+    _write_frame(pd.DataFrame({'Job Title': top_bottom['Job Title'].to_numpy(), 'Avg Salary': format_numbers(top_bottom['avg'])}),
+                 os.path.join(out_dir, 'top_bottom_jobs.csv'))
+
+    current = employees.groupby('job_id')['employee_id'].nunique()
+    past = history.groupby('job_id')['employee_id'].nunique()
+    turnover_rows = []
+    for title in sorted(set(titles.values())):
+        job_ids = [job for job, job_title in titles.items() if job_title == title]
+        n_current, n_past = int(current.reindex(job_ids).fillna(0).sum()), int(past.reindex(job_ids).fillna(0).sum())
+        turnover_rows.append((title, n_current, n_past, oracle_division(n_past * 100, n_current + n_past)))
+    _write_frame(pd.DataFrame(turnover_rows, columns=['Job Title', 'Current Employees', 'Past Employees', 'Turnover Rate (%)']),
+                 os.path.join(out_dir, 'job_turnover_analysis.csv'))
+
+
+def write_summary_reports(employees: pd.DataFrame, departments: pd.DataFrame, out_dir: str):
+    """location_employee_report, salary_distribution and department_salary_analysis."""
+    staffed = employees[employees['dept_pos'] >= 0]
+    per_dept = staffed.groupby('dept_pos')['salary'].agg(['size', 'mean', 'min', 'max']).reindex(np.arange(len(departments)))
+
+    locations = departments['location_id'].map(LOCATIONS)
+    _write_frame(pd.DataFrame({
+        'Region': locations.str[2].to_numpy(), 'Country': locations.str[1].to_numpy(), 'City': locations.str[0].to_numpy(),
+        'Department': departments['department_name'].to_numpy(),
+        'Employee Count': per_dept['size'].fillna(0).to_numpy(dtype='int64'),
+        'Average Salary': format_numbers(oracle_round(per_dept['mean'].fillna(0).to_numpy(), 2)),
+    }), os.path.join(out_dir, 'location_employee_report.csv'))
+
+    salary = employees['salary'].to_numpy()
+    band = np.where(salary < 3000, 0, np.where(salary <= 7000, 1, 2))
+    counts = np.bincount(band, minlength=3)
+    present = [i for i in (1, 2, 0) if counts[i] > 0]
+    _write_frame(pd.DataFrame({'Salary Range': [SALARY_RANGE_LABELS[i] for i in present], 'Employee Count': counts[present]}),
+                 os.path.join(out_dir, 'salary_distribution.csv'))
+
+    staffed_depts = per_dept.dropna(subset=['size'])
+    _write_frame(pd.DataFrame({
+        'Department': departments['department_name'].to_numpy()[staffed_depts.index.to_numpy()],
+        'Employee Count': staffed_depts['size'].to_numpy(dtype='int64'),
+        'Avg Salary': format_numbers(oracle_round(staffed_depts['mean'].to_numpy(), 2)),
+        'Min Salary': format_numbers(staffed_depts['min']), 'Max Salary': format_numbers(staffed_depts['max']),
+    }), os.path.join(out_dir, 'department_salary_analysis.csv'))
+
+
+def generate(n_employees: int, out_dir: str, seed: int = 42, as_of: str = DEFAULT_AS_OF, verbose: bool = False) -> dict:
+    """Generates and writes the full HR_ALL file set; returns per-step timings in seconds."""
+    if n_employees < 1:
+        raise ValueError("n_employees must be at least 1")
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    as_of_day = np.datetime64(as_of, 'D')
+    timings = {}
+
+    def step(name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[name] = time.perf_counter() - start
+        if verbose:
+            print(f"{name:<24} {timings[name]:8.2f}s")
+        return result
+
+    departments = step('departments', build_departments, n_employees, rng)
+    employees = step('employees', build_employees, n_employees, departments, as_of_day, rng)
+    history = step('job_history', build_job_history, employees, as_of_day, rng)
+    step('write all_employees', write_all_employees, employees, departments, out_dir, rng)
+    step('write departments', write_departments, employees, departments, out_dir)
+    step('write department reports', write_department_reports, employees, departments, as_of_day, out_dir)
+    step('write job reports', write_job_reports, employees, departments, history, as_of_day, out_dir)
+    step('write summary reports', write_summary_reports, employees, departments, out_dir)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic HR_ALL dataset in the PL/SQL export formats.")
+    parser.add_argument("--employees", type=int, default=100_000, help="Number of employees (e.g. 1000000 or 10000000).")
+    parser.add_argument("--out-dir", default="HR_SYNTH", help="Directory to write the CSV files to.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; the same seed gives identical files.")
+    parser.add_argument("--as-of", default=DEFAULT_AS_OF, help="Date used as SYSDATE for tenure and experience (YYYY-MM-DD).")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    generate(args.employees, args.out_dir, args.seed, args.as_of, verbose=True)
+    print(f"Generated {args.employees:,} employees in '{args.out_dir}' in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
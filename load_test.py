@@ -0,0 +1,208 @@
+"""Multi-session load test for the HR dashboard.
+
+Drives app.py through concurrent streamlit.testing AppTest sessions in one process, the same way
+a single Streamlit server process shares its caches between browser sessions. Each session opens
+the dashboard and then navigates the sidebar page radio at random, with optional think time.
+For every concurrency level it reports p50/p95/p99 rerun latency (overall and per page),
+throughput and resident memory per session. Sessions run in threads, so they contend for the
+GIL exactly as sessions of one `streamlit run` process do.
+
+    python load_test.py --sessions 1 4 8 16 --reruns 20 --output load_test.json
+    python load_test.py --sessions 8 --data-dir HR_SYNTH --think-time 0.5
+
+Sharing one runtime between sessions patches Streamlit internals, so the test refuses to run on
+a Streamlit release other than STREAMLIT_TESTED, and puts the originals back when it finishes.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+import numpy as np
+import streamlit
+
+from app import process_rss_bytes
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+PERCENTILES = (50, 95, 99)
+STREAMLIT_TESTED = "1.66" # Release whose internals share_test_runtime patches
+
+
+@contextlib.contextmanager
+def share_test_runtime():
+    """Makes concurrent AppTest runs behave like sessions of one server process.
+
+    AppTest is built for one run at a time. Every run installs a mock Runtime singleton and clears
+    it at the end, patches the `global.appTest` option for its duration, and compiles app.py into a
+    fresh ScriptCache, so overlapping runs see a missing runtime, lose their widget test hooks, or
+    race in ast.parse (not thread-safe on some CPython 3.11 builds). Here `global.appTest` stays on,
+    Runtime lookups fall back to the last mock seen (interchangeable, since the app only uses the
+    process-wide resource cache), and all runs share one ScriptCache as `streamlit run` does.
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    get_option, compile_script = config.get_option, ScriptCache.get_bytecode
+    instance_lookup, exists_lookup = Runtime.__dict__['instance'], Runtime.__dict__['exists']
+    config.get_option = build_mock_config_get_option({"global.appTest": True})
+
+    shared_script_cache = ScriptCache()
+    ScriptCache.get_bytecode = lambda self, script_path: compile_script(shared_script_cache, script_path)
+
+    last_seen = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            last_seen[:] = [cls._instance]
+        if not last_seen:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last_seen[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(last_seen))
+    try:
+        yield
+    finally:
+        config.get_option, ScriptCache.get_bytecode = get_option, compile_script
+        Runtime.instance, Runtime.exists = instance_lookup, exists_lookup
+
+
+def latency_summary(latencies: list) -> dict:
+    if not latencies:
+        return {'count': 0}
+    values = np.asarray(latencies)
+    summary = {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+    summary.update(count=len(latencies), mean=float(values.mean()), max=float(values.max()))
+    return summary
+
+
+def run_session(session_id: int, reruns: int, think_time: float, timeout: float, seed: int,
+                start_barrier: threading.Barrier, samples: list, errors: list):
+    """One simulated user: open the app, then `reruns` page navigations chosen at random."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed + session_id)
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    start_barrier.wait()
+
+    page = '(open)'
+    try:
+        start = time.perf_counter()
+        at.run()
+        samples.append((page, time.perf_counter() - start))
+        if at.exception:
+            errors.append(f"session {session_id} {page}: {at.exception[0].value}")
+            return
+
+        pages = list(at.sidebar.radio[0].options)
+        for _ in range(reruns):
+            if think_time > 0:
+                time.sleep(rng.expovariate(1 / think_time))
+            page = rng.choice([p for p in pages if p != at.sidebar.radio[0].value])
+            start = time.perf_counter()
+            at.sidebar.radio[0].set_value(page).run()
+            samples.append((page, time.perf_counter() - start))
+            if at.exception:
+                errors.append(f"session {session_id} {page}: {at.exception[0].value}")
+    except Exception as e:
+        errors.append(f"session {session_id} {page}: {type(e).__name__}: {e}")
+
+
+def run_level(n_sessions: int, reruns: int, think_time: float, timeout: float, seed: int) -> dict:
+    """Runs n_sessions concurrent sessions and summarizes latency, throughput and memory."""
+    gc.collect()
+    rss_before = process_rss_bytes()
+    samples, errors = [], []
+    barrier = threading.Barrier(n_sessions + 1)
+    threads = [threading.Thread(target=run_session, name=f"session-{i}", daemon=True,
+                                args=(i, reruns, think_time, timeout, seed, barrier, samples, errors))
+               for i in range(n_sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    peak_rss = rss_before
+    while any(thread.is_alive() for thread in threads):
+        peak_rss = max(peak_rss, process_rss_bytes())
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+
+    by_page = {}
+    for page, latency in samples:
+        by_page.setdefault(page, []).append(latency)
+    navigations = [latency for page, latency in samples if page != '(open)']
+    return {
+        'sessions': n_sessions,
+        'reruns': len(samples),
+        'elapsed_s': elapsed,
+        'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+        'latency_s': latency_summary(navigations),
+        'open_latency_s': latency_summary(by_page.pop('(open)', [])),
+        'pages': {page: latency_summary(latencies) for page, latencies in sorted(by_page.items())},
+        'memory': {'rss_before_bytes': rss_before, 'peak_rss_bytes': peak_rss,
+                   'per_session_bytes': max(0, peak_rss - rss_before) / n_sessions},
+        'errors': errors,
+    }
+
+
+def print_level(result: dict):
+    latency = result['latency_s']
+    percentiles = "  ".join(f"p{p} {latency.get(f'p{p}', float('nan')):.3f}s" for p in PERCENTILES)
+    print(f"{result['sessions']:>4} sessions  {result['reruns']:>5} reruns  {result['throughput_rps']:7.2f} reruns/s  "
+          f"{percentiles}  peak RSS {result['memory']['peak_rss_bytes'] / 2**20:,.0f} MiB  "
+          f"{result['memory']['per_session_bytes'] / 2**20:,.1f} MiB/session  errors {len(result['errors'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent AppTest load test for app.py.")
+    parser.add_argument("--sessions", nargs="+", type=int, default=[1, 4, 8], help="Concurrency levels to run, in order.")
+    parser.add_argument("--reruns", type=int, default=20, help="Page navigations per session after opening the app.")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between navigations in seconds (exponential).")
+    parser.add_argument("--data-dir", help="CSV directory to serve (sets HR_DATA_DIR; default: the app's HR_ALL).")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-rerun timeout in seconds.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the navigation sequences.")
+    parser.add_argument("--output", default="load_test_results.json", help="File to write the results to.")
+    args = parser.parse_args(argv)
+
+    if not streamlit.__version__.startswith(STREAMLIT_TESTED + "."):
+        parser.error(f"load_test.py patches Streamlit {STREAMLIT_TESTED} internals; found Streamlit {streamlit.__version__}")
+    if any(n < 1 for n in args.sessions):
+        parser.error("--sessions values must be at least 1")
+    if args.data_dir:
+        if not os.path.isdir(args.data_dir):
+            parser.error(f"data directory '{args.data_dir}' not found")
+        os.environ["HR_DATA_DIR"] = os.path.abspath(args.data_dir)
+    os.chdir(os.path.dirname(APP_PATH)) # The app resolves HR_ALL and assets relative to the working directory
+    logging.disable(logging.WARNING) # AppTest sessions log a ScriptRunContext warning per thread
+
+    with share_test_runtime():
+        # Warm the shared data store so the first level does not measure the one-off load
+        start = time.perf_counter()
+        warmup = run_level(1, 0, 0.0, args.timeout, args.seed)
+        print(f"Cold start: {time.perf_counter() - start:.2f}s (first session open, includes loading and cleaning)")
+
+        results = {'created': time.strftime("%Y-%m-%dT%H:%M:%S"), 'data_dir': os.environ.get("HR_DATA_DIR", "HR_ALL"),
+                   'streamlit': streamlit.__version__, 'reruns_per_session': args.reruns, 'think_time_s': args.think_time,
+                   'cold_start': warmup, 'levels': []}
+        for n_sessions in args.sessions:
+            result = run_level(n_sessions, args.reruns, args.think_time, args.timeout, args.seed)
+            results['levels'].append(result)
+            print_level(result)
+            for error in result['errors'][:5]:
+                print(f"    {error}")
+
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Results written to '{args.output}'")
+    return 1 if any(level['errors'] for level in results['levels']) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,62 @@
+"""Publishes a finished HR export as an immutable, versioned snapshot for the dashboard.
+
+hr_analysis_pkg.generate_all_reports rewrites its CSVs one by one, so point its UTL_FILE directory
+at a staging area and publish once the run has finished. The CSVs are copied to
+<data-dir>/snapshots/<id>/, the <data-dir>/current pointer is flipped atomically and snapshots
+beyond the retention are removed. Running dashboards pick up the new snapshot on their next refresh.
+
+    python publish_snapshot.py --source /u01/exports/hr_staging --data-dir HR_ALL --retention 3
+    python publish_snapshot.py --data-dir HR_ALL --list
+    python publish_snapshot.py --data-dir HR_ALL --rollback 20250601T020000-1a2b3c
+"""
+import argparse
+import logging
+import os
+
+import snapshots
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish CSV exports as versioned snapshots for the HR dashboard.")
+    parser.add_argument("--source", help="Directory with a complete export to publish.")
+    parser.add_argument("--data-dir", default=os.environ.get("HR_DATA_DIR", "HR_ALL"),
+                        help="Snapshot root the dashboard reads (default: HR_DATA_DIR or HR_ALL).")
+    parser.add_argument("--snapshot-id", help="Name for the new snapshot (default: timestamp plus a random suffix).")
+    parser.add_argument("--retention", type=int, default=snapshots.SNAPSHOT_RETENTION,
+                        help="Snapshots to keep, including the current one (default: HR_SNAPSHOT_RETENTION or 3).")
+    parser.add_argument("--rollback", metavar="SNAPSHOT_ID", help="Point 'current' back at an existing snapshot.")
+    parser.add_argument("--list", action="store_true", help="List snapshots and exit.")
+    args = parser.parse_args(argv)
+
+    if sum(bool(option) for option in (args.source, args.rollback, args.list)) != 1:
+        parser.error("use exactly one of --source, --rollback or --list")
+    if args.retention < 1:
+        parser.error("--retention must be at least 1")
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    if args.list:
+        current = os.path.basename(snapshots.resolve_snapshot_dir(args.data_dir))
+        for snapshot_id in snapshots.list_snapshots(args.data_dir):
+            complete = snapshots.snapshot_is_complete(os.path.join(args.data_dir, snapshots.SNAPSHOTS_DIR, snapshot_id))
+            print(f"{'*' if snapshot_id == current else ' '} {snapshot_id}{'' if complete else '  (incomplete)'}")
+        return 0
+    if args.rollback:
+        try:
+            snapshots.set_current_snapshot(args.data_dir, args.rollback)
+        except (FileNotFoundError, ValueError) as e:
+            parser.error(str(e))
+        print(f"'{args.data_dir}' now serves snapshot {args.rollback}")
+        return 0
+
+    if not os.path.isdir(args.source):
+        parser.error(f"source directory '{args.source}' not found")
+    if not any(filename.endswith(".csv") for filename in os.listdir(args.source)):
+        parser.error(f"no CSV files in '{args.source}'")
+    snapshot_id = snapshots.publish_snapshot(args.source, args.data_dir, args.snapshot_id, args.retention)
+    print(f"Published snapshot {snapshot_id} to '{args.data_dir}' "
+          f"({len(snapshots.list_snapshots(args.data_dir))} kept, version {snapshots.get_data_version(snapshots.resolve_snapshot_dir(args.data_dir))})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
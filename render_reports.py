@@ -0,0 +1,267 @@
+"""Headless batch renderer for the HR dashboard.
+
+Runs the same loading, cleaning and plot_* figure builders as app.py without a Streamlit
+session, and writes every page to standalone HTML and/or Plotly JSON (tables as HTML tables and
+JSON records). Interactive pages are rendered with their controls at the dashboard defaults.
+Pages are rendered in parallel across a process pool; each worker loads the data once.
+
+    python render_reports.py --data-dir HR_ALL --out-dir reports --format html json --workers 4
+"""
+import argparse
+import html
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import app
+import snapshots
+
+_worker_dfs = None
+
+
+def load_data(data_dir: str) -> dict:
+    """Loads, cleans and encodes every CSV exactly as the dashboard does, without Streamlit caching."""
+    return app.encode_shared_dimensions({name: app.clean_dataframe(df_raw, date_cols=app.DATE_COLS_TO_CLEAN)
+                                         for name, df_raw in app.load_csv_files(data_dir).items()})
+
+
+# Each worker loads one dataset, so one fixed version keys the app's per-version caches
+HEADLESS_VERSION = "headless"
+TABLE_ROW_LIMIT = 1000 # Rows written for table views (e.g. the top pay outliers)
+# Dashboard pages that need a person, a query or what-if inputs, so there is nothing to render headless
+INTERACTIVE_PAGES = {"Employee Search", "Employee Profile", "Compensation Scenarios"}
+
+
+def _headcount_view(dfs: dict):
+    index = app.build_interval_index(dfs, HEADLESS_VERSION)
+    if index['intervals'].empty:
+        return None
+    first_day = pd.Timestamp(int(index['sorted_starts'][0]), unit='D')
+    freq = next(iter(app.HEADCOUNT_FREQUENCIES.values()))
+    return app.plot_headcount_history(app.headcount_series(index, first_day, pd.Timestamp.today(), freq))
+
+
+def _career_paths_view(dfs: dict):
+    transitions = app.build_transition_matrix(dfs, HEADLESS_VERSION)
+    return app.plot_career_sankey(app.top_transitions(transitions, app.CAREER_TOP_N[1])) if transitions['moves'] else None
+
+
+def _pay_outliers_view(dfs: dict):
+    outliers = app.build_pay_outlier_scores(dfs, HEADLESS_VERSION)
+    if outliers['scores'].empty:
+        return None
+    view = app.query_pay_outliers(outliers, app.OUTLIER_Z_THRESHOLDS[1], "Both", 'abs_z_score', ascending=False)
+    rows = app.build_compensation_base(dfs, HEADLESS_VERSION)['rows']
+    return app.format_pay_outliers(view.head(TABLE_ROW_LIMIT), outliers, dfs['all_employees'], rows)
+
+
+def _location_hierarchy_view(dfs: dict):
+    rollup_df = app.build_location_rollup(dfs, HEADLESS_VERSION)
+    return app.plot_location_hierarchy(rollup_df, app.LOCATION_CHART_TYPES[0]) if not rollup_df.empty else None
+
+
+def _org_explorer_view(dfs: dict):
+    org = app.build_org_hierarchy(dfs, HEADLESS_VERSION)
+    return app.org_level_summary(org) if len(org['employee_ids']) else None
+
+
+def _cohort_retention_view(dfs: dict):
+    frequency = next(iter(app.COHORT_FREQUENCIES))
+    return app.plot_cohort_retention(app.build_cohort_retention(dfs, HEADLESS_VERSION, frequency), frequency)
+
+
+def _salary_bands_view(dfs: dict):
+    index = app.build_salary_band_index(dfs, HEADLESS_VERSION)
+    if len(index['salary']) == 0:
+        return None
+    return app.plot_salary_bands(app.count_salary_bands(index, app.parse_band_edges(app.DEFAULT_BAND_EDGES)), "All departments")
+
+
+# The default view of each page in app.DATA_PAGES as a figure or a table, keyed by the dashboard's
+# page names. Departments is rendered once per department; pages in INTERACTIVE_PAGES are skipped.
+PAGE_VIEWS = {
+    "Headcount History": _headcount_view,
+    "Career Paths": _career_paths_view,
+    "Pay Outliers": _pay_outliers_view,
+    "Location Hierarchy": _location_hierarchy_view,
+    "Org Explorer": _org_explorer_view,
+    "Cohort Retention": _cohort_retention_view,
+}
+# The default view of each app.CHART_PAGE_CONTROLS section: chart page -> (detail, view)
+CONTROL_VIEWS = {"Salary Distribution": ("Custom Bands", _salary_bands_view)}
+
+
+def list_pages(dfs: dict) -> list:
+    """Every dashboard page in sidebar order as (page, detail), without INTERACTIVE_PAGES.
+
+    Departments get one entry per department and chart pages with controls a second entry for them.
+    """
+    pages = [("Home", None)]
+    for page in app.CHART_PAGES:
+        pages.append((page, None))
+        if page in CONTROL_VIEWS:
+            pages.append((page, CONTROL_VIEWS[page][0]))
+    for page in app.DATA_PAGES:
+        if page == "Departments":
+            pages += [(page, dept_label) for dept_label in app.get_department_options(dfs)]
+        elif page not in INTERACTIVE_PAGES:
+            pages.append((page, None))
+    return pages
+
+
+def page_slug(page: str, detail: str = None) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", f"{page} {detail or ''}".lower()).strip("_")
+
+
+def _init_worker(data_dir: str):
+    global _worker_dfs
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(processName)s: %(message)s")
+    _worker_dfs = load_data(data_dir)
+
+
+def _home_html(metrics: dict) -> str:
+    cards = "".join(
+        f'<div class="card"><h3>{html.escape(str(value))}</h3><p>{html.escape(label)}</p></div>'
+        for label, value in metrics.items()
+    )
+    colors = app.COLORS
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Home - HR Workforce Dynamics</title>
+<style>
+body {{ background-color: {colors['background']}; color: {colors['text']}; font-family: sans-serif; }}
+h1 {{ color: {colors['title_color']}; text-align: center; }}
+.cards {{ display: grid; grid-template-columns: repeat(2, 1fr); gap: 10px; max-width: 900px; margin: auto; }}
+.card {{ background-color: {colors['card_bg']}; padding: 20px; border-radius: 10px; text-align: center;
+         border: 1px solid {colors['light_purple']}; box-shadow: 0 4px 8px rgba(0,0,0,0.1); }}
+.card h3 {{ margin: 0 0 5px 0; font-size: 26px; color: {colors['purple']}; }}
+.card p {{ margin: 0; font-size: 15px; color: {colors['secondary_text']}; }}
+</style></head>
+<body><h1>Key Workforce Metrics</h1><div class="cards">{cards}</div></body></html>
+"""
+
+
+def _table_html(title: str, table_df: pd.DataFrame) -> str:
+    colors = app.COLORS
+    table = table_df.rename(columns=lambda col: str(col).replace('_', ' ').title()).to_html(index=False, border=0, na_rep="")
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)} - HR Workforce Dynamics</title>
+<style>
+body {{ background-color: {colors['background']}; color: {colors['text']}; font-family: sans-serif; }}
+h1 {{ color: {colors['title_color']}; text-align: center; }}
+table {{ border-collapse: collapse; margin: auto; background-color: {colors['card_bg']}; }}
+th, td {{ padding: 6px 12px; border-bottom: 1px solid {colors['light_purple']}; text-align: left; }}
+</style></head>
+<body><h1>{html.escape(title)}</h1>{table}</body></html>
+"""
+
+
+def build_page(dfs: dict, page: str, detail: str = None):
+    """The default view of one list_pages entry: Home's metrics, a figure, a table or None when empty."""
+    if page == "Home":
+        return app.compute_home_metrics(dfs)
+    if page == "Departments":
+        return app.plot_department_salary_histogram(dfs[app.get_department_options(dfs)[detail]], detail)
+    if page in PAGE_VIEWS:
+        return PAGE_VIEWS[page](dfs)
+    if detail is not None:
+        return CONTROL_VIEWS[page][1](dfs)
+    return app.CHART_PAGES[page][2](dfs)
+
+
+def render_page(page: str, detail: str, out_dir: str, formats: list) -> dict:
+    """Builds one page in a worker process and writes it; returns its timings in seconds."""
+    slug = page_slug(page, detail)
+    timing = {'page': page if detail is None else f"{page}: {detail}", 'files': [], 'status': 'ok'}
+
+    start = time.perf_counter()
+    figure = build_page(_worker_dfs, page, detail)
+    if page == "Home":
+        metrics, figure = figure, None
+    timing['build_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if page == "Home":
+        for fmt in formats:
+            path = os.path.join(out_dir, f"{slug}.{fmt}")
+            with open(path, "w", encoding="utf-8") as out_file:
+                if fmt == "html":
+                    out_file.write(_home_html(metrics))
+                else:
+                    json.dump({str(label): str(value) for label, value in metrics.items()}, out_file, indent=2)
+            timing['files'].append(path)
+    elif figure is None:
+        timing['status'] = 'no data'
+    elif isinstance(figure, pd.DataFrame):
+        for fmt in formats:
+            path = os.path.join(out_dir, f"{slug}.{fmt}")
+            if fmt == "html":
+                with open(path, "w", encoding="utf-8") as out_file:
+                    out_file.write(_table_html(timing['page'], figure))
+            else:
+                figure.to_json(path, orient="records", date_format="iso", indent=2)
+            timing['files'].append(path)
+    else:
+        for fmt in formats:
+            path = os.path.join(out_dir, f"{slug}.{fmt}")
+            if fmt == "html":
+                figure.write_html(path, include_plotlyjs="cdn", full_html=True)
+            else:
+                figure.write_json(path)
+            timing['files'].append(path)
+    timing['write_s'] = time.perf_counter() - start
+    return timing
+
+
+def render_all(data_dir: str, out_dir: str, formats: list, workers: int = None) -> list:
+    """Renders every page in parallel and returns per-page timings (also written to timings.json)."""
+    os.makedirs(out_dir, exist_ok=True)
+    data_dir = snapshots.resolve_snapshot_dir(data_dir) # Every worker reads the same snapshot
+    pages = list_pages(load_data(data_dir))
+
+    timings = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_dir,)) as pool:
+        futures = {pool.submit(render_page, page, detail, out_dir, formats): (page, detail) for page, detail in pages}
+        for future in as_completed(futures):
+            page, detail = futures[future]
+            try:
+                timings.append(future.result())
+            except Exception as e:
+                timings.append({'page': page if detail is None else f"{page}: {detail}", 'status': f"error: {e}",
+                                'build_s': 0.0, 'write_s': 0.0, 'files': []})
+
+    timings.sort(key=lambda timing: timing['page'])
+    with open(os.path.join(out_dir, "timings.json"), "w", encoding="utf-8") as timings_file:
+        json.dump(timings, timings_file, indent=2)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render every HR dashboard page to standalone HTML/JSON.")
+    parser.add_argument("--data-dir", default=app.DATA_DIR, help="Directory with the exported CSV files.")
+    parser.add_argument("--out-dir", default="reports", help="Directory to write the rendered pages to.")
+    parser.add_argument("--format", nargs="+", choices=["html", "json"], default=["html"], dest="formats")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.data_dir):
+        parser.error(f"data directory '{args.data_dir}' not found")
+
+    start = time.perf_counter()
+    timings = render_all(args.data_dir, args.out_dir, args.formats, args.workers)
+    total = time.perf_counter() - start
+
+    width = max(len(timing['page']) for timing in timings)
+    print(f"{'Page':<{width}}  {'Build (s)':>9}  {'Write (s)':>9}  Status")
+    for timing in timings:
+        print(f"{timing['page']:<{width}}  {timing['build_s']:>9.3f}  {timing['write_s']:>9.3f}  {timing['status']}")
+    print(f"Rendered {len(timings)} pages to '{args.out_dir}' in {total:.2f}s")
+    return 0 if all(timing['status'] in ('ok', 'no data') for timing in timings) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,166 @@
+"""Versioned snapshots of the HR CSV exports, shared by the dashboard and its command-line tools.
+
+The data directory may hold immutable snapshots instead of loose CSVs:
+    HR_ALL/snapshots/<snapshot_id>/*.csv  plus  HR_ALL/current  (a file naming the served snapshot)
+publish_snapshot copies a finished export into a new snapshot and then flips `current` with one
+atomic rename, so a reader resolves the pointer once and sees a single complete export. A `current`
+symlink to a snapshot directory works too. Directories without `current` are read as is.
+
+This module only needs the standard library, so publishing does not import Streamlit or the app.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+SNAPSHOTS_DIR = "snapshots"
+CURRENT_POINTER = "current"
+SNAPSHOT_MANIFEST = "snapshot.json" # Written last into a staged snapshot: every CSV and its size
+SNAPSHOT_RETENTION = int(os.environ.get("HR_SNAPSHOT_RETENTION", "3") or 3) # Snapshots kept, including the current one
+
+_logger = logging.getLogger("hr_app.snapshots")
+
+
+def get_data_version(directory: str) -> str:
+    """Fingerprints the CSV exports (name, size, mtime) so caches can be keyed by data version."""
+    if not os.path.isdir(directory):
+        return ""
+    fingerprint = hashlib.sha1()
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".csv"):
+            stat = os.stat(os.path.join(directory, filename))
+            fingerprint.update(f"{filename}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return fingerprint.hexdigest()[:12]
+
+
+def get_export_time(directory: str) -> int:
+    """Newest CSV modification time (ns) in an export, which orders data versions by when they were written."""
+    if not os.path.isdir(directory):
+        return 0
+    return max((os.stat(os.path.join(directory, filename)).st_mtime_ns
+                for filename in os.listdir(directory) if filename.endswith(".csv")), default=0)
+
+
+def snapshot_is_complete(snapshot_dir: str) -> bool:
+    """True when every CSV in the snapshot's manifest is present with its published size.
+
+    Snapshots published before manifests existed count as complete when they hold any CSV.
+    """
+    if not os.path.isdir(snapshot_dir):
+        return False
+    manifest_path = os.path.join(snapshot_dir, SNAPSHOT_MANIFEST)
+    if not os.path.isfile(manifest_path):
+        return any(filename.endswith(".csv") for filename in os.listdir(snapshot_dir))
+    try:
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            files = json.load(manifest_file)['files']
+        return all(os.path.getsize(os.path.join(snapshot_dir, filename)) == size for filename, size in files.items())
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+
+def list_snapshots(directory: str) -> list:
+    """Published snapshot ids, oldest first (ids are timestamps, so they sort chronologically)."""
+    snapshots_dir = os.path.join(directory, SNAPSHOTS_DIR)
+    if not os.path.isdir(snapshots_dir):
+        return []
+    return sorted(entry.name for entry in os.scandir(snapshots_dir) if entry.is_dir() and not entry.name.startswith('.'))
+
+
+def resolve_snapshot_dir(directory: str) -> str:
+    """The directory a reader should load: the snapshot `current` points at, or directory itself.
+
+    When `current` names a missing, pruned or incomplete snapshot, the newest complete snapshot is
+    served instead and a warning is logged; the pointer itself is left for an operator to fix.
+    """
+    pointer = os.path.join(directory, CURRENT_POINTER)
+    if os.path.isdir(pointer): # Symlink to a snapshot directory
+        snapshot_dir = os.path.realpath(pointer)
+    elif os.path.isfile(pointer):
+        with open(pointer, encoding="utf-8") as pointer_file:
+            snapshot_id = pointer_file.read().strip()
+        snapshot_dir = os.path.join(directory, SNAPSHOTS_DIR, snapshot_id)
+    elif os.path.islink(pointer): # Dangling symlink
+        snapshot_dir = os.path.join(directory, SNAPSHOTS_DIR, os.path.basename(os.readlink(pointer)))
+    else:
+        return directory
+    if snapshot_is_complete(snapshot_dir):
+        return snapshot_dir
+
+    for fallback_id in reversed(list_snapshots(directory)):
+        fallback_dir = os.path.join(directory, SNAPSHOTS_DIR, fallback_id)
+        if snapshot_is_complete(fallback_dir):
+            _logger.warning("'%s' points to a missing or incomplete snapshot '%s'; serving snapshot '%s' instead.",
+                            pointer, os.path.basename(snapshot_dir), fallback_id)
+            return fallback_dir
+    _logger.error("'%s' points to a missing or incomplete snapshot '%s' and no complete snapshot is left.",
+                  pointer, os.path.basename(snapshot_dir))
+    return snapshot_dir
+
+
+def publish_snapshot(source_dir: str, directory: str, snapshot_id: str = None, retention: int = SNAPSHOT_RETENTION) -> str:
+    """Copies the CSVs in source_dir into a new snapshot, makes it current and prunes old ones.
+
+    The snapshot is staged under a hidden name, gets its manifest once every CSV is copied and is
+    renamed into place before the pointer flips, so readers only ever resolve complete snapshots.
+    Returns the new snapshot id.
+    """
+    snapshot_id = snapshot_id or f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    snapshots_dir = os.path.join(directory, SNAPSHOTS_DIR)
+    os.makedirs(snapshots_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=f".{snapshot_id}-", dir=snapshots_dir)
+    try:
+        files = {}
+        for filename in sorted(os.listdir(source_dir)):
+            if filename.endswith(".csv"):
+                shutil.copy2(os.path.join(source_dir, filename), os.path.join(staging_dir, filename))
+                files[filename] = os.path.getsize(os.path.join(staging_dir, filename))
+        with open(os.path.join(staging_dir, SNAPSHOT_MANIFEST), "w", encoding="utf-8") as manifest_file:
+            json.dump({'snapshot_id': snapshot_id, 'files': files}, manifest_file)
+        os.rename(staging_dir, os.path.join(snapshots_dir, snapshot_id))
+    except OSError:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    set_current_snapshot(directory, snapshot_id)
+    prune_snapshots(directory, retention)
+    return snapshot_id
+
+
+def set_current_snapshot(directory: str, snapshot_id: str):
+    """Points `current` at snapshot_id with an atomic rename (also used to roll back)."""
+    snapshot_dir = os.path.join(directory, SNAPSHOTS_DIR, snapshot_id)
+    if not os.path.isdir(snapshot_dir):
+        raise FileNotFoundError(f"Snapshot '{snapshot_id}' does not exist in '{directory}'")
+    if not snapshot_is_complete(snapshot_dir):
+        raise ValueError(f"Snapshot '{snapshot_id}' in '{directory}' is incomplete")
+    fd, staging_path = tempfile.mkstemp(prefix=f".{CURRENT_POINTER}-", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8") as pointer_file:
+        pointer_file.write(snapshot_id + "\n")
+    os.replace(staging_path, os.path.join(directory, CURRENT_POINTER))
+
+
+def prune_snapshots(directory: str, retention: int = SNAPSHOT_RETENTION) -> list:
+    """Removes all but the newest `retention` snapshots, never the current one; returns the removed ids.
+
+    Each snapshot is first renamed to a hidden name, so no reader resolves it while it is half
+    deleted. Processes that already loaded a removed snapshot keep serving it from memory; one that
+    was still reading it discards the build and retries on its next refresh.
+    """
+    current = os.path.basename(resolve_snapshot_dir(directory))
+    snapshots = [snapshot_id for snapshot_id in list_snapshots(directory) if snapshot_id != current]
+    expired = snapshots[:max(0, len(snapshots) - max(1, retention) + 1)]
+    snapshots_dir = os.path.join(directory, SNAPSHOTS_DIR)
+    removed = []
+    for snapshot_id in expired:
+        doomed_dir = os.path.join(snapshots_dir, f".removing-{snapshot_id}-{uuid.uuid4().hex[:6]}")
+        try:
+            os.rename(os.path.join(snapshots_dir, snapshot_id), doomed_dir)
+        except OSError: # Removed by another publisher already
+            continue
+        shutil.rmtree(doomed_dir, ignore_errors=True)
+        removed.append(snapshot_id)
+    return removed
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+
+@pytest.fixture
+def fresh_caches():
+    """Empties every cache layer before and after a test."""
+    for layer in app.cache_layers():
+        app.clear_cache_layer(layer)
+    yield app.cache_layers()
+    for layer in app.cache_layers():
+        app.clear_cache_layer(layer)
+
+
+@pytest.fixture(scope="session")
+def hr_all_dfs():
+    """The bundled HR_ALL export, loaded and cleaned the way build_data_store does."""
+    directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "HR_ALL")
+    raw = app.load_csv_files(directory)
+    return app.encode_shared_dimensions({name: app.clean_dataframe(df, date_cols=app.DATE_COLS_TO_CLEAN)
+                                         for name, df in raw.items()})
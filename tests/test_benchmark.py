@@ -0,0 +1,17 @@
+import os
+
+import app
+import benchmark
+import render_reports
+
+
+def test_every_page_and_index_builder_is_a_stage(fresh_caches, hr_all_dfs, monkeypatch):
+    monkeypatch.setattr(benchmark, 'measure', lambda func, repeat: (func(), {})) # Coverage only, not timings
+    directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "HR_ALL")
+    stages = benchmark.benchmark_dataset(directory, repeat=1)
+
+    for layer in benchmark.BUILDER_LAYERS:
+        assert app.CACHE_BUILDERS[layer] <= set(stages)
+    for page, detail in render_reports.list_pages(hr_all_dfs):
+        assert (f"page: {page}" if detail is None else f"page: {page}: {detail}") in stages
+    assert stages['page: Departments: Sales (80)']['figure_bytes'] > 0
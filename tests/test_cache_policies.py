@@ -0,0 +1,39 @@
+import numpy as np
+
+import app
+
+
+def test_oversized_value_is_returned_but_not_stored(fresh_caches):
+    cache = fresh_caches['aggregates']
+    rejections = cache['rejections']
+    small = app.cached_call('aggregates', ('small', 1), lambda: np.zeros(1000))
+    big_bytes = int(cache['policy']['max_mb'] * app.MB) + 1024
+    big = app.cached_call('aggregates', ('big', 1), lambda: np.zeros(big_bytes // 8 + 1))
+
+    assert len(small) == 1000 and big.nbytes > big_bytes - 8
+    assert list(cache['entries']) == [('small', 1)]
+    assert cache['rejections'] == rejections + 1
+    assert cache['bytes'] <= cache['policy']['max_mb'] * app.MB
+
+
+def test_entries_that_fit_are_evicted_least_recently_used_first(fresh_caches):
+    cache = fresh_caches['aggregates']
+    chunk = int(cache['policy']['max_mb'] * app.MB) // 3
+    for name in ('a', 'b', 'c', 'd'):
+        app.cached_call('aggregates', (name,), lambda: np.zeros(chunk // 8))
+    assert [key[0] for key in cache['entries']] == ['b', 'c', 'd']
+
+
+def test_index_layer_holds_every_index_of_every_measure_and_version(fresh_caches, hr_all_dfs):
+    cache = fresh_caches['indexes']
+    builders = app.CACHE_BUILDERS['indexes']
+    assert cache['policy']['max_entries'] == len(builders) * len(app.SALARY_MEASURES) * fresh_caches['data_store']['policy']['max_entries']
+
+    evictions = cache['evictions']
+    for version in ["idx-v1", "idx-v2"]:
+        for measure in app.SALARY_MEASURES:
+            dfs, measure_version = app.apply_salary_measure(hr_all_dfs, version, measure)
+            for name in sorted(builders):
+                getattr(app, name)(dfs, measure_version)
+    assert cache['evictions'] == evictions
+    assert len(cache['entries']) == len(builders) * len(app.SALARY_MEASURES) * 2
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+import app
+import generate_hr_data
+
+
+def test_role_ends_after_hire_lower_retention(fresh_caches):
+    employees = pd.DataFrame({'employee_id': [1, 2, 3, 4],
+                              'hire_date': pd.to_datetime(['2010-03-01', '2010-06-01', '2010-09-01', '2011-02-01'])})
+    history = pd.DataFrame({'employee_id': [1, 2, 3],
+                            'end_date': pd.to_datetime(['2009-12-31', '2012-05-31', '2010-12-31'])})
+    retention_df = app.build_cohort_retention({'all_employees': employees, 'job_history_analysis': history}, "cohort-v1", "Yearly")
+
+    # 1's only role ended before hire; 3 left in 2010 and 2 in 2012, each still counted in their leaving year
+    assert retention_df.loc['2010', 'employees'] == 3
+    assert retention_df.loc['2010', [0, 1, 2, 3]].tolist() == [100.0, 2 / 3 * 100, 2 / 3 * 100, 1 / 3 * 100]
+    assert retention_df.loc['2011', [0, 1]].tolist() == [100.0, 100.0]
+
+
+def test_generated_history_has_leavers(fresh_caches, tmp_path):
+    generate_hr_data.generate(2000, str(tmp_path))
+    raw = app.load_csv_files(str(tmp_path))
+    dfs = {name: app.clean_dataframe(df, date_cols=app.DATE_COLS_TO_CLEAN) for name, df in raw.items()}
+    retention = app.build_cohort_retention(dfs, "cohort-v2", "Yearly").drop(columns='employees').to_numpy()
+
+    assert np.nanmin(retention) < 100
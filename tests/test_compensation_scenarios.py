@@ -0,0 +1,39 @@
+import math
+from collections import defaultdict
+
+import app
+
+
+def test_raise_simulation_matches_a_per_employee_loop(fresh_caches, hr_all_dfs):
+    base = app.build_compensation_base(hr_all_dfs, "scenario-test")
+    dept_raises = {"Sales": 5.0, "IT": -10.0, "Not A Department": 50.0}
+    job_raises = {str(base['job_titles'][0]): 3.0, str(base['job_titles'][-1]): 20.0}
+
+    depts_df = hr_all_dfs['all_departments']
+    dept_names = dict(zip(depts_df['department_id'].astype(float), depts_df['department_name'].astype(str)))
+    jobs_df = hr_all_dfs['job_salary_statistics']
+    job_titles = dict(zip(jobs_df['job_id'].astype(str), jobs_df['job_title'].astype(str)))
+    emp_df = hr_all_dfs['all_employees'].dropna(subset=['salary'])
+
+    expected, by_dept, bands, affected = [], defaultdict(list), [0, 0, 0], 0
+    for salary, department_id, job_id in emp_df[['salary', 'department_id', 'job_id']].itertuples(index=False):
+        department = dept_names.get(float(department_id))
+        new_salary = salary * (1 + dept_raises.get(department, 0) / 100) * (1 + job_raises.get(job_titles.get(str(job_id)), 0) / 100)
+        expected.append(new_salary)
+        if department is not None:
+            by_dept[department].append(new_salary)
+        bands[0 if new_salary < 3000 else 1 if new_salary <= 7000 else 2] += 1
+        affected += new_salary != salary
+
+    salary = app.apply_raises(base, dept_raises, job_raises)
+    assert all(math.isclose(got, want) for got, want in zip(salary, expected)) and len(salary) == len(expected)
+
+    scenario = app.simulate_compensation(base, dept_raises, job_raises)
+    assert math.isclose(scenario['total_payroll'], sum(expected))
+    assert scenario['employees_affected'] == affected > 0
+    assert scenario['salary_distribution']['employee_count'].tolist() == bands
+    dept_df = scenario['department_salary_analysis'].set_index('department')
+    assert set(dept_df.index) == set(by_dept)
+    for department, salaries in by_dept.items():
+        assert dept_df.loc[department, 'employee_count'] == len(salaries)
+        assert math.isclose(dept_df.loc[department, 'avg_salary'], sum(salaries) / len(salaries))
@@ -0,0 +1,62 @@
+import json
+import os
+
+import pandas as pd
+
+import app
+
+
+def test_round_trip_keeps_values_and_shared_dictionaries(tmp_path, hr_all_dfs):
+    version_dir = app.publish_data_plane(hr_all_dfs, str(tmp_path), "plane-v1")
+    frames = app.attach_data_plane(str(tmp_path), "plane-v1")
+
+    assert set(frames) == set(hr_all_dfs)
+    for name, df in hr_all_dfs.items():
+        # Text columns come back as categoricals, so compare values rather than dtypes
+        pd.testing.assert_frame_equal(frames[name].astype(object), df.astype(object), check_index_type=False)
+    departments = frames['department_salary_analysis']['department'].dtype
+    assert frames['location_employee_report']['department'].dtype is departments
+
+    with open(os.path.join(version_dir, "manifest.json"), encoding="utf-8") as manifest_file:
+        manifest = json.load(manifest_file)
+    columns = [column for frame in manifest['frames'].values() for column in frame['columns']]
+    assert all('categories' not in column for column in columns)
+    assert len(manifest['dictionaries']) == len({column['dictionary'] for column in columns if column['kind'] == 'categorical'})
+
+
+def test_text_dictionary_survives_any_characters(tmp_path):
+    frame = pd.DataFrame({'label': ["Zoë", "a,b", "", "日本", "line\nbreak", "Zoë"], 'value': range(6)})
+    app.publish_data_plane({'labels': frame}, str(tmp_path), "plane-v2")
+    attached = app.attach_data_plane(str(tmp_path), "plane-v2")['labels']
+
+    assert attached['label'].astype(str).tolist() == frame['label'].tolist()
+    assert attached['value'].tolist() == list(range(6))
+
+
+def test_unpublished_version_is_not_attached(tmp_path):
+    assert app.attach_data_plane(str(tmp_path), "missing") is None
+
+
+def test_prune_keeps_newest_exports_when_an_old_version_is_republished(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "DATA_PLANE_RETENTION", 2)
+    frames = {'labels': pd.DataFrame({'value': [1, 2]})}
+    for exported_at, version in enumerate(["a", "b", "c"], start=1):
+        app.publish_data_plane(frames, str(tmp_path), version, exported_at)
+    assert app.attach_data_plane(str(tmp_path), "a") is None
+
+    app.publish_data_plane(frames, str(tmp_path), "a", 1) # A worker still on the oldest export
+    assert all(app.attach_data_plane(str(tmp_path), version) is not None for version in "abc")
+
+    app.publish_data_plane(frames, str(tmp_path), "d", 4)
+    assert [version for version in "abcd" if app.attach_data_plane(str(tmp_path), version) is not None] == ["c", "d"]
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".")]
+
+
+def test_store_falls_back_to_csvs_when_a_version_disappears_mid_attach(tmp_path, monkeypatch, fresh_caches, hr_all_dfs):
+    monkeypatch.setattr(app, "DATA_PLANE_DIR", str(tmp_path))
+    version_dir = app.publish_data_plane(hr_all_dfs, str(tmp_path), "plane-v3")
+    os.remove(os.path.join(version_dir, "0_0.npy"))
+
+    directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "HR_ALL")
+    store = app.build_data_store(directory, "plane-v3")
+    assert len(store['all_employees']) == len(hr_all_dfs['all_employees'])
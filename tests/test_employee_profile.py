@@ -0,0 +1,24 @@
+import numpy as np
+
+import app
+
+
+def test_row_index_matches_a_scan(fresh_caches, hr_all_dfs):
+    row_indexes = app.build_employee_row_indexes(hr_all_dfs, "profile-v1")
+    history = hr_all_dfs['job_history_analysis']
+
+    for employee_id in [101, 176, 200, 206, 999_999]:
+        profile = app.assemble_employee_profile(hr_all_dfs, row_indexes, employee_id)
+        for report in app.PROFILE_REPORTS:
+            report_df = hr_all_dfs[report]
+            expected = report_df[report_df['employee_id'] == employee_id]
+            assert profile[report].index.tolist() == expected.index.tolist()
+    assert len(app.lookup_employee_rows(hr_all_dfs, row_indexes, 'job_history_analysis', 101)) == (history['employee_id'] == 101).sum() == 2
+
+
+def test_row_index_is_plain_arrays(fresh_caches, hr_all_dfs):
+    row_indexes = app.build_employee_row_indexes(hr_all_dfs, "profile-v2")
+
+    for report_index in row_indexes.values():
+        assert all(isinstance(value, np.ndarray) for value in report_index.values())
+        assert len(report_index['offsets']) == len(report_index['ids']) + 1
@@ -0,0 +1,41 @@
+import numpy as np
+
+import app
+
+
+def _scan(directory_df, query: str) -> list:
+    """Directory rows matching query, by checking every key of every employee."""
+    terms = query.strip().lower().split()
+    if not terms:
+        return []
+    matches = []
+    for row, (name, email, employee_id) in enumerate(directory_df[['name', 'email', 'employee_id']].itertuples(index=False)):
+        name = '' if name is None or name != name else str(name).lower()
+        email = '' if email is None or email != email else str(email).lower()
+        keys = [key for key in [name, email, str(employee_id), *name.split()] if key]
+        if any(key.startswith(' '.join(terms)) for key in keys) or \
+                (len(terms) > 1 and all(any(key.startswith(term) for key in keys) for term in terms)):
+            matches.append(row)
+    if len(terms) == 1 and terms[0].isdigit() and int(terms[0]) in set(directory_df['employee_id']):
+        exact = directory_df['employee_id'].tolist().index(int(terms[0]))
+        matches = [exact] + [row for row in matches if row != exact]
+    return matches
+
+
+def test_prefix_search_matches_a_scan_of_every_key(fresh_caches, hr_all_dfs):
+    index = app.build_employee_search_index(hr_all_dfs, "search-test")
+    directory_df = index['directory']
+    rng = np.random.default_rng(11)
+    names = directory_df['name'].dropna().astype(str).tolist()
+    queries = ["a", "S", "ki", "zzz", "1", "10", "  ", "king steven"]
+    for name in rng.choice(names, 15):
+        first, *rest = name.split()
+        queries += [name[:rng.integers(1, len(name) + 1)], f"{first[:2]} {rest[-1][:3] if rest else ''}", name.upper()]
+    queries += [str(employee_id) for employee_id in rng.choice(directory_df['employee_id'].to_numpy(), 5)]
+    queries += [str(email)[:4] for email in directory_df['email'].dropna().iloc[:5]]
+
+    for query in queries:
+        matches_df, total = app.search_employees(index, query, limit=len(directory_df))
+        expected = _scan(directory_df, query)
+        assert total == len(expected), query
+        assert list(matches_df.index) == list(directory_df.index[expected]), query
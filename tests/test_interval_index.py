@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+import app
+
+
+def test_tree_and_binary_searches_match_a_scan_of_every_interval(fresh_caches, hr_all_dfs):
+    index = app.build_interval_index(hr_all_dfs, "intervals-test")
+    starts = index['intervals']['start'].to_numpy()
+    ends = index['intervals']['end'].to_numpy()
+    first, last = pd.Timestamp(int(starts.min()), unit='D'), pd.Timestamp(int(ends[ends != app.OPEN_END].max()), unit='D')
+
+    rng = np.random.default_rng(7)
+    days = rng.integers(app._to_day(first) - 30, app._to_day(last) + 30, size=(40, 2))
+    for lo, hi in np.sort(days, axis=1):
+        lo_date, hi_date = pd.Timestamp(int(lo), unit='D'), pd.Timestamp(int(hi), unit='D')
+        expected = np.flatnonzero((starts <= hi) & (ends >= lo))
+        assert list(app.overlapping_roles(index, lo_date, hi_date).index) == list(index['intervals'].index[expected])
+        assert len(app.overlapping_roles(index, lo_date)) == int(((starts <= lo) & (ends >= lo)).sum())
+
+    series_df = app.headcount_series(index, first, last, "QS")
+    scanned = [int(((starts <= day) & (ends >= day)).sum()) for day in app._to_days(series_df['date'])]
+    assert series_df['headcount'].tolist() == scanned
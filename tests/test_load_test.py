@@ -0,0 +1,17 @@
+from streamlit import config
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+import load_test
+
+
+def test_shared_runtime_patches_are_undone():
+    originals = (config.get_option, ScriptCache.get_bytecode, Runtime.__dict__['instance'], Runtime.__dict__['exists'])
+    try:
+        with load_test.share_test_runtime():
+            assert config.get_option is not originals[0] and ScriptCache.get_bytecode is not originals[1]
+            raise KeyboardInterrupt
+    except KeyboardInterrupt:
+        pass
+    restored = (config.get_option, ScriptCache.get_bytecode, Runtime.__dict__['instance'], Runtime.__dict__['exists'])
+    assert all(now is before for now, before in zip(restored, originals))
@@ -0,0 +1,29 @@
+import math
+from collections import defaultdict
+
+import app
+
+
+def test_every_node_sums_the_report_rows_under_its_path(fresh_caches, hr_all_dfs):
+    rollup_df = app.build_location_rollup(hr_all_dfs, "rollup-test")
+    loc_df = hr_all_dfs['location_employee_report']
+
+    totals = defaultdict(lambda: [0.0, 0.0])
+    for row in loc_df[[*app.LOCATION_LEVELS, 'employee_count', 'average_salary']].itertuples(index=False):
+        names = ['Unknown' if name is None or name != name else str(name) for name in row[:len(app.LOCATION_LEVELS)]]
+        count = 0.0 if row.employee_count != row.employee_count else float(row.employee_count)
+        average = 0.0 if row.average_salary != row.average_salary else float(row.average_salary)
+        for depth in range(1, len(names) + 1):
+            totals['/'.join(names[:depth])][0] += count
+            totals['/'.join(names[:depth])][1] += count * average
+
+    assert sorted(rollup_df['id']) == sorted(totals)
+    node_ids = set(rollup_df['id'])
+    for node in rollup_df.itertuples(index=False):
+        employee_count, salary_total = totals[node.id]
+        assert node.parent == node.id.rpartition('/')[0] and (node.parent == '' or node.parent in node_ids)
+        assert node.label == node.id.rpartition('/')[2]
+        assert node.employee_count == employee_count
+        assert math.isclose(node.salary_total, salary_total)
+        if employee_count:
+            assert math.isclose(node.avg_salary, round(salary_total / employee_count, 2))
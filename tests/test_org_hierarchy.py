@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+import app
+
+
+def cyclic_org():
+    # 1 is the top; 3 and 4 manage each other and 5 reports into that loop.
+    employees = pd.DataFrame({'employee_id': [1, 2, 3, 4, 5], 'manager_id': [np.nan, 1, 4, 3, 4],
+                              'salary': [100.0, 50.0, 40.0, 30.0, 20.0]})
+    return app.build_org_hierarchy({'all_employees': employees}, "org-cycle")
+
+
+def test_reporting_cycle_is_detached(fresh_caches):
+    org = cyclic_org()
+    depth = {int(employee_id): int(level) for employee_id, level in zip(org['employee_ids'], org['depth'])}
+
+    assert org['detached'] == 3
+    assert depth == {1: 0, 2: 1, 3: -1, 4: -1, 5: -1}
+    root = app.org_node(org, 1)
+    assert app.org_subtree_metrics(org, root)['total_reports'] == 1
+    assert app.org_subtree_metrics(org, root)['salary_cost'] == 150.0
+    assert sorted(org['employee_ids'][app.org_subtree(org, root)]) == [1, 2]
+
+
+def test_chain_of_detached_employee_is_empty(fresh_caches):
+    org = cyclic_org()
+
+    assert app.org_chain(org, app.org_node(org, 5)) == []
+    assert org['employee_ids'][app.org_chain(org, app.org_node(org, 2))].tolist() == [1]
+    loop = org['employee_ids'][app.org_manager_loop(org, app.org_node(org, 5))].tolist()
+    assert loop == [5, 4, 3, 4]
+    assert set(app.org_level_summary(org)['level']) == {0, 1}
@@ -0,0 +1,31 @@
+import math
+import statistics
+from collections import defaultdict
+
+import app
+
+
+def test_z_scores_and_percentiles_match_per_group_statistics(fresh_caches, hr_all_dfs):
+    scores_df = app.build_pay_outlier_scores(hr_all_dfs, "outliers-test")['scores'].set_index('employee_id')
+    emp_df = hr_all_dfs['all_employees'].dropna(subset=['salary'])
+
+    groups = defaultdict(list)
+    for employee_id, job_id, department_id, salary in emp_df[['employee_id', 'job_id', 'department_id', 'salary']].itertuples(index=False):
+        groups[(str(job_id), department_id)].append((employee_id, float(salary)))
+    assert len(scores_df) == len(emp_df)
+    assert scores_df['group'].nunique() == len(groups)
+
+    for members in groups.values():
+        salaries = [salary for _, salary in members]
+        mean = statistics.fmean(salaries)
+        std = statistics.stdev(salaries) if len(salaries) > 1 else 0.0
+        for employee_id, salary in members:
+            row = scores_df.loc[employee_id]
+            assert math.isclose(row['group_avg_salary'], mean)
+            if std == 0:
+                assert math.isnan(row['z_score'])
+            else:
+                assert math.isclose(row['z_score'], (salary - mean) / std, abs_tol=1e-9)
+            below = sum(other < salary for other in salaries)
+            same = sum(other == salary for other in salaries)
+            assert math.isclose(row['percentile'], (below + same / 2) / len(salaries) * 100)
@@ -0,0 +1,17 @@
+import app
+import render_reports
+
+
+def test_every_dashboard_page_is_rendered_or_skipped_on_purpose(hr_all_dfs):
+    pages = render_reports.list_pages(hr_all_dfs)
+    listed = {page for page, _ in pages}
+
+    assert listed == {"Home", *app.CHART_PAGES, *app.DATA_PAGES} - render_reports.INTERACTIVE_PAGES
+    assert set(app.DATA_PAGES) - {"Departments"} == set(render_reports.PAGE_VIEWS) | render_reports.INTERACTIVE_PAGES
+    assert set(app.CHART_PAGE_CONTROLS) == set(render_reports.CONTROL_VIEWS)
+    assert ("Salary Distribution", "Custom Bands") in pages
+
+
+def test_page_views_build_from_hr_all(fresh_caches, hr_all_dfs):
+    for page, view in [*render_reports.PAGE_VIEWS.items(), *((page, view) for page, (_, view) in render_reports.CONTROL_VIEWS.items())]:
+        assert view(hr_all_dfs) is not None, page
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+import app
+
+
+def band_index(salaries):
+    salary = np.sort(np.asarray(salaries, dtype='float64'))
+    return {'salary': salary, 'dept_salary': salary, 'dept_bounds': np.array([0, 0, len(salary)]),
+            'departments': pd.Index(['Sales'])}
+
+
+def test_single_edge_is_half_open():
+    bands_df = app.count_salary_bands(band_index([2999, 3000, 3001]), [3000])
+
+    assert bands_df['salary_range'].tolist() == ['< $3,000', '≥ $3,000']
+    assert bands_df['employee_count'].tolist() == [1, 2]
+
+
+def test_values_on_edges_count_in_the_band_above():
+    index = band_index([1000, 3000, 5000, 7000, 7000, 9000])
+    bands_df = app.count_salary_bands(index, [3000, 7000])
+
+    assert bands_df['salary_range'].tolist() == ['< $3,000', '$3,000–<$7,000', '≥ $7,000']
+    assert bands_df['employee_count'].tolist() == [1, 2, 3]
+    assert app.count_salary_bands(index, [3000, 7000], 'Sales')['employee_count'].tolist() == [1, 2, 3]
+
+
+def test_counts_match_a_scan(fresh_caches, hr_all_dfs):
+    index = app.build_salary_band_index(hr_all_dfs, "bands-v1")
+    salary = hr_all_dfs['all_employees']['salary'].dropna().to_numpy()
+    edges = [2500, 6000, 6000.5, 12000]
+    bands = np.digitize(salary, edges) # Bin i holds edges[i - 1] <= salary < edges[i]
+
+    assert app.count_salary_bands(index, edges)['employee_count'].tolist() == np.bincount(bands, minlength=len(edges) + 1).tolist()
@@ -0,0 +1,67 @@
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+
+import snapshots
+
+
+@pytest.fixture
+def published(tmp_path):
+    """A data directory with two published snapshots, the second one current."""
+    source = tmp_path / "export"
+    source.mkdir()
+    (source / "all_employees.csv").write_text("EMPLOYEE_ID,SALARY\n100,24000\n")
+    (source / "salary_distribution.csv").write_text("Salary Range,Employee Count\nHigh,1\n")
+    data_dir = tmp_path / "data"
+    first = snapshots.publish_snapshot(str(source), str(data_dir), "20250101T000000-first")
+    second = snapshots.publish_snapshot(str(source), str(data_dir), "20250102T000000-second")
+    return str(data_dir), first, second
+
+
+def snapshot_path(data_dir, snapshot_id):
+    return os.path.join(data_dir, snapshots.SNAPSHOTS_DIR, snapshot_id)
+
+
+def test_current_snapshot_is_served(published):
+    data_dir, _, second = published
+
+    assert snapshots.resolve_snapshot_dir(data_dir) == snapshot_path(data_dir, second)
+
+
+def test_half_written_current_falls_back_to_newest_complete(published, caplog):
+    data_dir, first, second = published
+    os.remove(os.path.join(snapshot_path(data_dir, second), "salary_distribution.csv"))
+
+    with caplog.at_level(logging.WARNING, logger="hr_app.snapshots"):
+        assert snapshots.resolve_snapshot_dir(data_dir) == snapshot_path(data_dir, first)
+    assert "incomplete snapshot '20250102T000000-second'" in caplog.text
+    with pytest.raises(ValueError):
+        snapshots.set_current_snapshot(data_dir, second)
+
+
+def test_pruned_current_falls_back_to_newest_complete(published, caplog):
+    data_dir, _, second = published
+    with open(os.path.join(data_dir, snapshots.CURRENT_POINTER), "w", encoding="utf-8") as pointer_file:
+        pointer_file.write("20240101T000000-pruned\n")
+
+    with caplog.at_level(logging.WARNING, logger="hr_app.snapshots"):
+        assert snapshots.resolve_snapshot_dir(data_dir) == snapshot_path(data_dir, second)
+    assert "20240101T000000-pruned" in caplog.text
+
+
+def test_prune_keeps_current_and_retention(published):
+    data_dir, first, second = published
+    snapshots.set_current_snapshot(data_dir, first)
+
+    assert snapshots.prune_snapshots(data_dir, retention=1) == [second]
+    assert snapshots.list_snapshots(data_dir) == [first]
+    assert not [name for name in os.listdir(os.path.join(data_dir, snapshots.SNAPSHOTS_DIR)) if name.startswith(".")]
+
+
+def test_publish_cli_does_not_import_streamlit():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    check = "import sys, publish_snapshot; sys.exit('streamlit' in sys.modules or 'app' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", check], cwd=root).returncode == 0
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+import app
+
+
+def test_reports_stay_cached_between_calls(fresh_caches, hr_all_dfs):
+    cache = fresh_caches['aggregates']
+    rejections = cache['rejections']
+    first = app.build_total_compensation_reports(hr_all_dfs, "tc-v1")
+    misses = cache['misses']
+    second = app.build_total_compensation_reports(hr_all_dfs, "tc-v1")
+
+    assert second is first
+    assert cache['misses'] == misses and cache['rejections'] == rejections
+    assert ('build_total_compensation_reports', "tc-v1") in cache['entries']
+
+
+def test_overlay_adds_commission_to_salary(fresh_caches, hr_all_dfs):
+    dfs, version = app.apply_salary_measure(hr_all_dfs, "tc-v2", "Total compensation")
+    employees = hr_all_dfs['all_employees']
+    expected = employees['salary'] * (1 + employees['commission_pct'].fillna(0))
+
+    assert version == "tc-v2" + app.TOTAL_COMPENSATION_SUFFIX
+    assert np.allclose(dfs['all_employees']['salary'], expected)
+    assert np.isclose(dfs['department_salary_analysis']['employee_count'].sum(), employees['department_id'].notna().sum())
+    assert app.apply_salary_measure(hr_all_dfs, "tc-v2", "Base salary") == (hr_all_dfs, "tc-v2")
+
+
+def test_job_and_department_pages_follow_the_measure(fresh_caches, hr_all_dfs):
+    dfs, version = app.apply_salary_measure(hr_all_dfs, "tc-v3", "Total compensation")
+    employees = hr_all_dfs['all_employees']
+    total = employees['salary'] * (1 + employees['commission_pct'].fillna(0))
+
+    titles = hr_all_dfs['job_salary_statistics'].drop_duplicates('job_id').set_index('job_id')['job_title'].astype(str)
+    expected = total.groupby(employees['job_id'].astype(str).map(titles)).mean().round(2)
+    experience_df = dfs['job_experience_salary']
+    assert np.allclose(experience_df['avg_salary'], experience_df['job_title'].astype(str).map(expected))
+
+    roster_df = app.measure_roster(dfs, version, 'dept_80')
+    by_id = pd.Series(total.to_numpy(), index=employees['employee_id'])
+    assert np.allclose(roster_df['salary'], by_id.reindex(roster_df['employee_id']).to_numpy())
+    assert app.measure_roster(hr_all_dfs, "tc-v3", 'dept_80') is hr_all_dfs['dept_80']